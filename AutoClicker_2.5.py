@@ -12,7 +12,7 @@ AutoClicker 2.4 - 单文件完整版（tkinter + pystray）
 - 托盘最小化（pystray），托盘菜单支持 开/暂停/停止/退出/打开窗口
 - 浅/深主题切换（设置中）
 - 防误触检测：若鼠标快速移动则自动暂停任务
-- 点击统计：总点击数/成功/失败/耗时，实时显示并可导出 click_log.txt
+- 点击统计：总点击数/成功/失败/耗时，实时显示，每次任务的报告追加到 click_report.jsonl，可导出为 CSV/JSON
 - 自动保存/加载上次配置（click_points.json）
 - 导入/导出配置（JSON）
 - 自动更新检查（可配置检查 URL；默认为空不会联网）
@@ -21,40 +21,101 @@ AutoClicker 2.4 - 单文件完整版（tkinter + pystray）
 - 点位独立设置：每个点位可独立设置点击次数和点击间隔
 """
 
+import sys
+
+# --profile-startup：在导入其余模块之前安装导入计时钩子
+from autoclicker.startup import StartupProfiler
+
+startup_profiler = StartupProfiler.from_argv(sys.argv)
+
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, simpledialog
+import tkinter.font as tkfont
 import threading
 import time
-import pyautogui
-import json
 import os
-import random
 import datetime
-import math
-import sys
-
-# optional libs
-try:
-    import keyboard
-
-    HAVE_KEYBOARD = True
-except Exception:
-    HAVE_KEYBOARD = False
-
-try:
-    from pystray import Icon, Menu, MenuItem
-    from PIL import Image, ImageDraw
-
-    HAVE_PYSTRAY = True
-except Exception:
-    HAVE_PYSTRAY = False
-
-try:
-    import requests
 
-    HAVE_REQUESTS = True
-except Exception:
-    HAVE_REQUESTS = False
+from autoclicker import VERSION
+
+# log() 只入队，由后台线程批量写入 LOG_FILE，避免点击循环中每次都打开文件
+from autoclicker.logwriter import (
+    LOG_FILE,
+    LOG_LEVELS,
+    flush_log,
+    get_log_level,
+    log,
+    log_error,
+    log_warning,
+    set_log_level,
+)
+from autoclicker.progress import ProgressSink
+from autoclicker.recorder import MacroRecorder, MouseSampler
+from autoclicker.timing import SPIN_WINDOW
+from autoclicker.config import (
+    CONFIG_FILE,
+    DEFAULT_MATCH_THRESHOLD,
+    DEFAULT_WAIT_TIMEOUT,
+    FLOW_ACTIONS,
+    load_points_file,
+    normalize_points,
+    save_points_file,
+)
+from autoclicker.plan import (
+    SPEED_MAX,
+    SPEED_MIN,
+    clamp_speed,
+    compile_plan,
+    screen_to_relative,
+)
+from autoclicker.engine import LOOP_DELAY, ClickEngine, EngineListener, new_run_stats
+from autoclicker.multirun import (
+    DEFAULT_PRIORITY,
+    STATE_DONE,
+    STATE_LABELS,
+    STATE_PAUSED,
+    STATE_RUNNING,
+    MultiProfileScheduler,
+    Profile,
+)
+from autoclicker.stats import format_histogram_lines
+from autoclicker.reports import (
+    REPORT_FILE,
+    append_report,
+    build_run_report,
+    export_reports,
+)
+from autoclicker.backends import (
+    BACKENDS,
+    DEFAULT_BACKEND,
+    create_backend,
+    cursor_position,
+    enable_dpi_awareness,
+)
+from autoclicker.settings import load_settings, save_settings
+from autoclicker.autosave import AUTOSAVE_BACKUPS, AutoSaver
+from autoclicker.safety import SafetyMonitor
+from autoclicker.updates import fetch_update_info, is_newer_version
+from autoclicker.vision import TemplateMatcher, vision_available
+from autoclicker.waits import RegionWaiter
+from autoclicker.windows import (
+    SYSTEM_WINDOW_CLASSES,
+    WindowGeometry,
+    WindowIndex,
+    activate_window,
+    create_window_provider,
+)
+from autoclicker.lazy import has_module, lazy_import
+from autoclicker.startup import cold_start_report
+
+# optional libs：启动时只探测是否安装，首次使用时才导入
+HAVE_KEYBOARD = has_module("keyboard")
+keyboard = lazy_import("keyboard")
+
+HAVE_PYSTRAY = has_module("pystray") and has_module("PIL")
+pystray = lazy_import("pystray")
+Image = lazy_import("PIL.Image")
+ImageDraw = lazy_import("PIL.ImageDraw")
 
 # winsound for Windows notifications
 try:
@@ -73,10 +134,31 @@ except Exception:
 
 
 # ------------- Files & constants -------------
-CONFIG_FILE = "click_points.json"
-LOG_FILE = "autoclicker_log.txt"
-CLICK_REPORT = "click_log.txt"
-VERSION = "2.5.3"  # 更新版本号
+PROGRESS_MAX_LINES = 1000  # 进度日志文本框最多保留的行数
+PROGRESS_FRAME_MS = 100  # 进度日志刷新间隔（毫秒），即最多 10 帧/秒
+STATS_REFRESH_MS = 1000  # 任务运行中统计标签的刷新间隔（毫秒）
+# 回放倍率输入框中的常用值
+SPEED_PRESETS = ("0.25", "0.5", "1.0", "1.5", "2.0", "3.0", "5.0", "10.0", "20.0")
+# 点位坐标模式 -> 显示名称（窗口相对坐标在每轮循环开始时按目标窗口位置换算）
+COORD_MODE_LABELS = {
+    "absolute": "屏幕坐标",
+    "client": "窗口客户区",
+    "ratio": "窗口比例",
+}
+# 运行时需要截图的操作类型（需要 numpy 和 Pillow，不支持多配置并发运行）
+SCREEN_ACTIONS = ("find_and_click", "wait")
+# 流程控制点位类型 -> 显示名称
+FLOW_ACTION_LABELS = {
+    "label": "标签",
+    "jump": "跳转",
+    "loop": "计数循环",
+    "branch": "条件分支",
+    "call": "调用",
+    "return": "返回",
+    "end": "结束本轮",
+}
+BRANCH_CONDITION_LABELS = {"fail": "上一次等待/识别失败", "ok": "上一次等待/识别成功"}
+# 版本号在 autoclicker/__init__.py 中维护（命令行和基准测试共用）
 # If you have a URL to check updates, set it here.
 # For safety, by default it's empty; update_check won't run if empty.
 # UPDATE_CHECK_URL = "https://raw.githubusercontent.com/MGHYGitHub/AutoClicker/main/version.json"  # e.g. "https://example.com/autoclicker/version.json"
@@ -89,18 +171,6 @@ UPDATE_CHECK_URLS = [
 
 
 # ------------- Logging & helpers -------------
-def log(msg):
-    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    line = f"[{now}] {msg}\n"
-    try:
-        with open(LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(line)
-    except Exception:
-        pass
-    # also print to stdout for debugging
-    print(line, end="")
-
-
 def safe_int(v, default=0):
     try:
         return int(v)
@@ -328,21 +398,277 @@ class ModernButton(tk.Button):
         )
 
 
+# ------------- Virtual Listbox -------------
+class VirtualListbox(tk.Listbox):
+    """只渲染可见行的列表框，适用于数万个点位
+
+    Tk 控件中只保存当前可见的几十行，数据通过 row_count() / row_text(index) 按需读取；
+    滚动条、选中项和 see() 都按数据下标计算。增删改只需通知受影响的下标，
+    不在可见范围内的变化只更新滚动条。
+    """
+
+    def __init__(self, parent, row_count, row_text, **kwargs):
+        self._yscroll = kwargs.pop("yscrollcommand", None)
+        super().__init__(parent, exportselection=False, **kwargs)
+        self.row_count = row_count
+        self.row_text = row_text
+        self._top = 0  # 第一行可见数据的下标
+        self._rows = 1  # 可见行数
+        self._selected = None  # 选中的数据下标
+        self._linespace = tkfont.Font(font=self.cget("font")).metrics("linespace")
+
+        self.bind("<Configure>", self._on_configure)
+        self.bind("<<ListboxSelect>>", self._on_select)
+        # 替换 Listbox 默认的滚动/方向键绑定（它们只能作用于已渲染的行）
+        self.bind("<MouseWheel>", self._on_wheel)
+        self.bind("<Button-4>", lambda e: self._scroll_units(-3))
+        self.bind("<Button-5>", lambda e: self._scroll_units(3))
+        self.bind("<Up>", lambda e: self._move_selection(-1))
+        self.bind("<Down>", lambda e: self._move_selection(1))
+        self.bind("<Prior>", lambda e: self._move_selection(-self._rows))
+        self.bind("<Next>", lambda e: self._move_selection(self._rows))
+
+    # ---------------- Listbox 兼容接口 ----------------
+    def configure(self, cnf=None, **kwargs):
+        if "yscrollcommand" in kwargs:
+            self._yscroll = kwargs.pop("yscrollcommand")
+            if not kwargs and not cnf:
+                self._update_scrollbar()
+                return None
+        return super().configure(cnf, **kwargs)
+
+    config = configure
+
+    def yview(self, *args):
+        count = self.row_count()
+        if not args:
+            if count == 0:
+                return (0.0, 1.0)
+            return (self._top / count, min(1.0, (self._top + self._rows) / count))
+        if args[0] == "moveto":
+            self._set_top(int(float(args[1]) * count))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if args[2] == "pages":
+                step *= max(1, self._rows - 1)
+            self._set_top(self._top + step)
+        return None
+
+    def curselection(self):
+        if self._selected is None or self._selected >= self.row_count():
+            return ()
+        return (self._selected,)
+
+    def selection_set(self, first, last=None):
+        self._selected = int(first)
+        self._apply_selection()
+
+    def selection_clear(self, first=None, last=None):
+        self._selected = None
+        super().selection_clear(0, tk.END)
+
+    def see(self, index):
+        index = int(index)
+        if index < self._top:
+            self._set_top(index)
+        elif index >= self._top + self._rows:
+            self._set_top(index - self._rows + 1)
+
+    # ---------------- 数据变化通知 ----------------
+    def reset(self):
+        """数据整体替换后调用（导入/加载/清空）"""
+        if self._selected is not None and self._selected >= self.row_count():
+            self._selected = None
+        self._set_top(self._top, force=True)
+
+    def row_inserted(self, index):
+        if self._selected is not None and self._selected >= index:
+            self._selected += 1
+        self._touch(index)
+
+    def row_deleted(self, index):
+        if self._selected is not None:
+            if self._selected == index:
+                self._selected = None
+            elif self._selected > index:
+                self._selected -= 1
+        self._set_top(self._top, force=index < self._top + self._rows)
+
+    def rows_swapped(self, a, b):
+        self._touch(min(a, b))
+
+    def refresh_row(self, index):
+        row = index - self._top
+        if 0 <= row < self.size():
+            super().delete(row)
+            super().insert(row, self.row_text(index))
+            self._apply_selection()
+
+    # ---------------- 内部实现 ----------------
+    def _touch(self, index):
+        # 行号前缀会变化，影响到可见范围时重绘可见行，否则只更新滚动条
+        if index < self._top + self._rows:
+            self._render()
+        else:
+            self._update_scrollbar()
+
+    def _set_top(self, top, force=False):
+        count = self.row_count()
+        top = max(0, min(top, count - self._rows))
+        if top != self._top or force:
+            self._top = top
+            self._render()
+        else:
+            self._update_scrollbar()
+
+    def _render(self):
+        super().delete(0, tk.END)
+        end = min(self.row_count(), self._top + self._rows)
+        row_text = self.row_text
+        for i in range(self._top, end):
+            super().insert(tk.END, row_text(i))
+        super().yview_moveto(0)
+        self._apply_selection()
+        self._update_scrollbar()
+
+    def _apply_selection(self):
+        super().selection_clear(0, tk.END)
+        if self._selected is not None:
+            row = self._selected - self._top
+            if 0 <= row < self.size():
+                super().selection_set(row)
+
+    def _update_scrollbar(self):
+        if self._yscroll is not None:
+            first, last = self.yview()
+            self._yscroll(first, last)
+
+    def _on_configure(self, event):
+        border = 2 * int(
+            float(self.cget("borderwidth")) + float(self.cget("highlightthickness"))
+        )
+        rows = max(1, (event.height - border) // max(1, self._linespace))
+        if rows != self._rows:
+            self._rows = rows
+            self._set_top(self._top, force=True)
+
+    def _on_select(self, event):
+        sel = super().curselection()
+        if sel:
+            self._selected = self._top + sel[0]
+
+    def _on_wheel(self, event):
+        self._scroll_units(-3 if event.delta > 0 else 3)
+        return "break"
+
+    def _scroll_units(self, units):
+        self._set_top(self._top + units)
+        return "break"
+
+    def _move_selection(self, delta):
+        count = self.row_count()
+        if count == 0:
+            return "break"
+        current = self._selected if self._selected is not None else self._top
+        self._selected = max(0, min(count - 1, current + delta))
+        self.see(self._selected)
+        self._apply_selection()
+        self.event_generate("<<ListboxSelect>>")
+        return "break"
+
+
 # ------------- Main App -------------
+class TaskEngineListener(EngineListener):
+    """把点击引擎的回调转发到界面（控件更新通过 root.after 回到界面线程）"""
+
+    def __init__(self, app, plan):
+        self.app = app
+        self.root = app.root
+        self.plan = plan
+
+    def on_message(self, text):
+        self.app.add_progress_text(text)
+
+    def on_point(self, loop, index, x, y):
+        app = self.app
+        plan = self.plan
+        # 记录当前目标点位（安全检测使用）
+        app.safety_monitor.note_target(x, y)
+        self.root.after(0, lambda i=index: app.highlight_point(i))
+        cur_info = f"当前: 循环 {loop+1}/{plan.loop_count} — 点位 {index+1}/{len(plan)} - {plan.names[index]} ({x},{y})"
+        self.root.after(0, lambda t=cur_info: app.current_task_label.config(text=t))
+
+    def on_point_done(self, index):
+        self.app.safety_monitor.clear_target()
+
+    def on_click(self, x, y):
+        # 记录点击时间
+        self.app.safety_monitor.note_click()
+
+    def on_progress(self, done, total):
+        if total <= 0:
+            return  # 流程含无限循环时总操作数未知
+        progress = min(100.0, done / total * 100)
+        self.root.after(0, lambda p=progress: self.app.progress_var.set(p))
+
+    def on_paused(self):
+        self.root.after(
+            0, lambda: self.app.status_bar.config(text="已暂停（按 F4 继续）")
+        )
+
+    def on_debug_step(self, index):
+        self.app.add_progress_text(f"调试模式：点位 {index+1} 准备就绪，按 F4 继续...")
+        self.root.after(
+            0,
+            lambda: self.app.status_bar.config(
+                text=f"调试模式：点位 {index+1} 就绪，按 F4 继续"
+            ),
+        )
+
+
+class ProfileListener(EngineListener):
+    """多配置运行时单个配置的回调：消息加上配置名前缀，并通知安全监测"""
+
+    def __init__(self, app, name):
+        self.app = app
+        self.name = name
+
+    def on_message(self, text):
+        self.app.add_progress_text(f"[{self.name}] {text}")
+
+    def on_point(self, loop, index, x, y):
+        self.app.safety_monitor.note_target(x, y)
+
+    def on_point_done(self, index):
+        self.app.safety_monitor.clear_target()
+
+    def on_click(self, x, y):
+        self.app.safety_monitor.note_click()
+
+    def on_paused(self):
+        self.app.add_progress_text(f"[{self.name}] 已暂停")
+
+
 class AutoClickerApp:
-    def __init__(self, root):
+    def __init__(self, root, profiler=None):
         self.root = root
+        # 启动分析（--profile-startup），未启用时各阶段计时为空操作
+        self.profiler = profiler if profiler is not None else StartupProfiler()
+        phase = self.profiler.phase
         self.root.title(f"高级自动连点器 {VERSION}")
         self.root.geometry("1200x800")
         self.root.minsize(1100, 700)
 
         # 设置窗口图标
-        self.setup_icons()
+        with phase("setup_icons"):
+            self.setup_icons()
         # Setup modern styles
-        ModernStyles.setup_styles()
+        with phase("ModernStyles.setup_styles"):
+            ModernStyles.setup_styles()
 
         # 初始化任务设置窗口 - 这行要移到前面！
-        self.settings_window = TaskSettingsWindow(self.root, self)
+        with phase("TaskSettingsWindow"):
+            self.settings_window = TaskSettingsWindow(self.root, self)
 
         # Apply initial styling to root
         self.root.configure(bg=ModernStyles.LIGHT_THEME["bg"])
@@ -353,18 +679,19 @@ class AutoClickerApp:
         self.auto_switch_window = tk.BooleanVar(value=False)
         self.window_title_var = tk.StringVar(value="")
         self.window_handles = {}  # 存储窗口句柄映射
-        # 添加 HAVE_WIN32 变量
-        try:
-            import win32gui
-            import win32con
-
-            self.HAVE_WIN32 = True
-        except ImportError:
-            self.HAVE_WIN32 = False
+        # 添加 HAVE_WIN32 变量（只探测，win32gui 在用到时才导入）
+        self.HAVE_WIN32 = has_module("win32gui")
+        self.window_index = None  # 标题 -> 句柄索引，首次使用窗口功能时创建
+        self._window_geometry = None  # 目标窗口客户区缓存（WindowGeometry）
+        # _target_client_rect 在界面线程和引擎线程中都会调用，保护句柄和客户区缓存的更新
+        self._window_lock = threading.Lock()
+        self.template_matcher = None  # 图像点位的模板定位（首次运行时创建）
+        self.region_waiter = None  # 等待条件点位的屏幕采样（首次运行时创建）
+        # 新捕获点位的坐标模式：absolute / client / ratio
+        self.coord_mode_var = tk.StringVar(value=COORD_MODE_LABELS["absolute"])
         # 添加调试模式设置
         self.debug_mode_var = tk.BooleanVar(value=False)  # 默认关闭调试模式
         self.enable_safety_check = tk.BooleanVar(value=True)  # 默认开启但调整参数
-        self.last_safety_trigger = 0  # 记录上次触发时间
         # 添加快捷键防重复机制
         self.last_capture_time = 0
         self.capture_cooldown = 0.3  # 0.3秒冷却时间
@@ -372,15 +699,16 @@ class AutoClickerApp:
         # 安全检测相关
         self.last_capture_time = 0
         self.capture_cooldown = 0.3
-        self.last_click_time = 0
-        self.current_target_point = None  # 当前目标点位
-        self.last_safety_trigger = 0
 
         # Program state
         # click_points: list of dicts: {'x':int,'y':int,'name':str,'button':'left'/'right','delay':float, 'click_count':int, 'click_interval':float}
         self.click_points = []
         self.is_capturing = False
         self.is_running = False
+        # 宏录制（首次录制时创建）
+        self.recorder = None
+        self.mouse_sampler = None
+        self._record_hook = None
         self.pause_event = threading.Event()
         self.stop_event = threading.Event()
         self.task_thread = None
@@ -391,44 +719,85 @@ class AutoClickerApp:
         self.loop_var = tk.IntVar(value=1)
         self.random_offset_var = tk.IntVar(value=0)
         self.random_delay_var = tk.DoubleVar(value=0.0)
+        # 回放倍率：编译计划时作用于所有间隔和延时
+        self.speed_var = tk.DoubleVar(value=1.0)
+        self.loop_delay_var = tk.DoubleVar(value=LOOP_DELAY)  # 两次循环之间的延时（秒）
         self.countdown_var = tk.IntVar(value=3)
         self.auto_action_var = tk.StringVar(value="none")  # none / sound
         self.theme_var = tk.StringVar(value="light")  # light/dark
+        # 调度器忙等窗口（毫秒）：截止前这段时间忙等以获得亚毫秒精度
+        self.spin_window_ms_var = tk.DoubleVar(value=SPIN_WINDOW * 1000)
 
-        # Safety config
-        self.mouse_move_threshold_px = 250  # 这个现在可以作为默认值，但实际使用动态阈值
-        self.mouse_move_check_interval = 0.25  # seconds
+        # 程序设置（autoclicker_settings.json）
+        self.app_settings = load_settings()
+        self.input_backend_var = tk.StringVar(
+            value=self.app_settings.get("input_backend", DEFAULT_BACKEND)
+        )
+        # 日志级别：DEBUG 时才记录每次点击
+        self.log_level_var = tk.StringVar(
+            value=set_log_level(self.app_settings.get("log_level"))
+        )
 
         # 确保这个变量在UI创建之前初始化
         self.safety_threshold_var = tk.IntVar(value=250)
 
+        # 安全监测在独立线程中运行，只在任务运行时采样；设置变化时同步到监测器
+        self.safety_monitor = SafetyMonitor(
+            self.pause_event, on_trigger=self._on_safety_trigger
+        )
+        self.enable_safety_check.trace_add(
+            "write", lambda *args: self._sync_safety_settings()
+        )
+        self.safety_threshold_var.trace_add(
+            "write", lambda *args: self._sync_safety_settings()
+        )
+        self._sync_safety_settings()
+        self.safety_monitor.start()
+
         # Statistics
-        self.stats = {
-            "total_click_attempts": 0,
-            "successful_clicks": 0,
-            "failed_clicks": 0,
-            "start_time": None,
-            "end_time": None,
-            "loops_completed": 0,
-        }
+        self.stats = new_run_stats()
+        self.engine = None
+        self._last_stats_refresh = 0.0
+        # 多配置并发运行（首次使用时创建）
+        self.multi_scheduler = None
+        self.multi_window = None
+        self._multi_settings = None  # 创建调度器时的 (输入后端, 忙等窗口秒数)
 
         # Tray
         self.tray_icon = None
         self.tray_thread = None
         self.tray_running = False
 
+        # 进度消息缓冲：任意线程写入，界面线程定时批量显示
+        self.progress_sink = ProgressSink()
+
+        # 点位自动保存：编辑只标记脏，空闲后在后台原子写入 CONFIG_FILE
+        self.autosaver = AutoSaver(
+            snapshot=lambda: [dict(p) for p in self.click_points],
+            write=lambda points: save_points_file(
+                points, CONFIG_FILE, backups=AUTOSAVE_BACKUPS
+            ),
+            after=self.root.after,
+            after_cancel=self.root.after_cancel,
+            on_error=lambda e: log_error(f"自动保存失败: {e}"),
+        )
+
         # Build UI
-        self.create_menu()
-        self.create_ui()
+        with phase("create_menu"):
+            self.create_menu()
+        with phase("create_ui"):
+            self.create_ui()
+        self._drain_progress()
 
         # Bind shortcuts
-        self.bind_shortcuts()
+        with phase("bind_shortcuts"):
+            self.bind_shortcuts()
 
         # Load saved config if exists
-        self.load_points(quiet=True)
+        with phase("load_points"):
+            self.load_points(quiet=True)
 
         # Start coordinate preview update
-        self.last_mouse_pos = pyautogui.position()
         self.update_coord_preview()
 
         # Auto update check in background (non-blocking)
@@ -441,6 +810,20 @@ class AutoClickerApp:
 
         log("程序启动")
         self.add_progress_text("程序已启动。")
+        self.root.after_idle(self.report_cold_start)
+
+    def report_cold_start(self):
+        """记录从进程创建到主窗口首次空闲的耗时，并与目标比较"""
+        report = cold_start_report()
+        kind = "打包程序" if report["kind"] == "frozen" else "源码运行"
+        msg = (
+            f"冷启动耗时 {report['elapsed_ms']:.0f} ms"
+            f"（{kind}，目标 {report['target_ms']} ms）"
+        )
+        if not report["within_target"]:
+            msg += "，超出目标"
+        log(msg)
+        self.profiler.finish(log, cold_start=report)
 
     # ---------------- UI: menu ----------------
     def create_menu(self):
@@ -454,6 +837,9 @@ class AutoClickerApp:
         file_menu.add_command(label="另存为...", command=self.save_points_as)
         file_menu.add_separator()
         file_menu.add_command(label="导出执行报告", command=self.export_click_report)
+        file_menu.add_command(
+            label="多配置并发运行...", command=self.show_multi_profile
+        )
         file_menu.add_separator()
         file_menu.add_command(label="退出", command=self.on_exit)
         menubar.add_cascade(label="文件", menu=file_menu)
@@ -631,6 +1017,15 @@ class AutoClickerApp:
         self.stop_capture_btn.pack(side=tk.LEFT, padx=6)
         self.stop_capture_btn.apply_theme(self.theme_var.get())
 
+        self.record_btn = ModernButton(
+            btn_frame,
+            text="录制宏 (F9)",
+            command=lambda: self.toggle_recording(from_button=True),
+            button_type="secondary",
+        )
+        self.record_btn.pack(side=tk.LEFT)
+        self.record_btn.apply_theme(self.theme_var.get())
+
         # 坐标预览
         coord_preview_frame = tk.Frame(
             coord_frame, bg=ModernStyles.get_theme(self.theme_var.get())["card_bg"]
@@ -680,8 +1075,10 @@ class AutoClickerApp:
         )
         list_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-        self.points_listbox = tk.Listbox(
+        self.points_listbox = VirtualListbox(
             list_frame,
+            row_count=lambda: len(self.click_points),
+            row_text=self._point_row_text,
             font=("Consolas", 9),
             activestyle="none",
             bg=ModernStyles.get_theme(self.theme_var.get())["input_bg"],
@@ -709,6 +1106,9 @@ class AutoClickerApp:
         # 主要操作按钮
         op_buttons = [
             ("添加当前坐标", self.add_current_point, "primary"),
+            ("添加图像点位", self.add_template_point, "primary"),
+            ("添加等待条件", self.add_wait_point, "primary"),
+            ("添加流程控制", self.add_flow_point, "primary"),
             ("删除选中", self.delete_selected_point, "danger"),
             ("清空所有", self.clear_all_points, "warning"),
         ]
@@ -1084,8 +1484,10 @@ class AutoClickerApp:
         )
         list_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-        self.points_listbox = tk.Listbox(
+        self.points_listbox = VirtualListbox(
             list_frame,
+            row_count=lambda: len(self.click_points),
+            row_text=self._point_row_text,
             font=("Consolas", 9),
             activestyle="none",
             bg=ModernStyles.get_theme(self.theme_var.get())["input_bg"],
@@ -1606,13 +2008,13 @@ class AutoClickerApp:
     def update_coord_preview(self):
         if not self.root.winfo_exists():
             return
-        try:
-            x, y = pyautogui.position()
-            self.current_coord_label.config(text=f"当前坐标: ({x}, {y})")
-        except Exception:
-            self.current_coord_label.config(text="当前坐标: (N/A)")
-        # schedule mouse move safety check too
-        self.check_mouse_movement()
+        # 窗口隐藏到托盘时不读取坐标（安全检测由 SafetyMonitor 线程负责）
+        if self.root.state() != "withdrawn":
+            try:
+                x, y = cursor_position()
+                self.current_coord_label.config(text=f"当前坐标: ({x}, {y})")
+            except Exception:
+                self.current_coord_label.config(text="当前坐标: (N/A)")
         self.root.after(120, self.update_coord_preview)
 
     def start_coord_capture(self):
@@ -1649,9 +2051,22 @@ class AutoClickerApp:
         click_interval=None,
         keys="",
         action_type="click",
+        coord_mode=None,
     ):
+        """x, y 为屏幕坐标；coord_mode 缺省时使用界面上选择的坐标模式"""
         if name is None:
             name = f"点位{len(self.click_points)+1}({x},{y})"
+        if coord_mode is None:
+            coord_mode = self._capture_coord_mode()
+        if coord_mode != "absolute" and action_type != "keyboard":
+            rect = self._target_client_rect()
+            if rect is None:
+                self.add_progress_text("未找到目标窗口，点位按屏幕坐标保存")
+                coord_mode = "absolute"
+            else:
+                x, y = screen_to_relative(coord_mode, int(x), int(y), rect)
+        else:
+            coord_mode = "absolute"
         if button is None:
             button = self.default_button_var.get() or "left"
         if delay is None:
@@ -1671,9 +2086,11 @@ class AutoClickerApp:
             "click_interval": float(click_interval),
             "keys": keys,
             "action_type": action_type,
+            "coord_mode": coord_mode,
         }
         self.click_points.append(p)
-        self.update_points_list()
+        self.points_listbox.row_inserted(len(self.click_points) - 1)
+        self.autosaver.mark_dirty()
 
         action_desc = (
             f"按键:{keys}"
@@ -1687,7 +2104,7 @@ class AutoClickerApp:
 
     def add_current_point(self):
         try:
-            x, y = pyautogui.position()
+            x, y = cursor_position()
             # 弹出对话框选择按钮、延时、点击次数和点击间隔
             dlg = AddPointDialog(
                 self.root,
@@ -1727,25 +2144,258 @@ class AutoClickerApp:
         except Exception as e:
             messagebox.showerror("错误", f"无法获取当前鼠标坐标: {e}")
 
-    def update_points_list(self):
-        self.points_listbox.delete(0, tk.END)
-        for i, p in enumerate(self.click_points):
-            # 确保所有必要的字段都存在
-            name = p.get("name", f"点位{i+1}")
-            x = p.get("x", 0)
-            y = p.get("y", 0)
-            button = p.get("button", "left")
-            delay = p.get("delay", 1.0)
-            click_count = p.get("click_count", 1)
-            click_interval = p.get("click_interval", 0.1)
-            action_type = p.get("action_type", "click")
-            keys = p.get("keys", "")
-
-            if action_type == "keyboard":
-                display = f"{i+1}. {name} - 键盘操作 [{keys}] 延时:{delay}"
+    def add_template_point(self):
+        """选择模板图片，添加运行时在屏幕上查找并点击的点位"""
+        if not vision_available():
+            messagebox.showwarning(
+                "缺少依赖",
+                "图像识别需要 numpy 和 Pillow\n\n请运行: pip install numpy pillow",
+            )
+            return
+        path = filedialog.askopenfilename(
+            title="选择模板图片",
+            filetypes=[("图片文件", "*.png *.bmp *.jpg *.jpeg"), ("所有文件", "*.*")],
+        )
+        if not path:
+            return
+        threshold = simpledialog.askfloat(
+            "匹配阈值",
+            "匹配阈值（0 ~ 1，越大越严格）:",
+            initialvalue=DEFAULT_MATCH_THRESHOLD,
+            minvalue=0.1,
+            maxvalue=1.0,
+            parent=self.root,
+        )
+        if threshold is None:
+            return
+        # 默认搜索目标窗口的客户区，没有目标窗口时搜索整个屏幕
+        rect = self._target_client_rect()
+        roi_text = simpledialog.askstring(
+            "搜索区域",
+            "搜索区域 left,top,width,height（留空为整个屏幕）:",
+            initialvalue=",".join(str(v) for v in rect) if rect else "",
+            parent=self.root,
+        )
+        if roi_text is None:
+            return
+        roi = None
+        if roi_text.strip():
+            try:
+                roi = [int(v) for v in roi_text.replace("，", ",").split(",")]
+                if len(roi) != 4 or roi[2] <= 0 or roi[3] <= 0:
+                    raise ValueError
+            except ValueError:
+                messagebox.showerror("错误", "搜索区域应为 4 个整数，且宽高为正数")
+                return
+        name = os.path.splitext(os.path.basename(path))[0]
+        point = normalize_points(
+            [
+                {
+                    "name": f"图像:{name}",
+                    "button": self.default_button_var.get(),
+                    "delay": safe_float(self.base_delay_var.get(), 1.0),
+                    "action_type": "find_and_click",
+                    "template": path,
+                    "threshold": threshold,
+                    "roi": roi,
+                }
+            ],
+            self._point_defaults(),
+        )[0]
+        self.click_points.append(point)
+        self.points_listbox.row_inserted(len(self.click_points) - 1)
+        self.autosaver.mark_dirty()
+        self.add_progress_text(
+            f"添加图像点位: {point['name']} 阈值:{threshold:.2f} 区域:{roi or '整个屏幕'}"
+        )
+        log(f"添加图像点位 {path}")
+
+    def add_wait_point(self):
+        """添加等待条件点位：区域变为指定颜色或区域内容变化后才继续，代替固定延时"""
+        if not vision_available():
+            messagebox.showwarning(
+                "缺少依赖",
+                "等待条件需要 numpy 和 Pillow\n\n请运行: pip install numpy pillow",
+            )
+            return
+        try:
+            x, y = cursor_position()
+        except Exception as e:
+            messagebox.showerror("错误", f"无法获取当前鼠标坐标: {e}")
+            return
+        roi_text = simpledialog.askstring(
+            "观察区域",
+            "观察区域 left,top,width,height（留空为当前鼠标位置的一个像素）:",
+            initialvalue=f"{x},{y},1,1",
+            parent=self.root,
+        )
+        if roi_text is None:
+            return
+        roi = None
+        if roi_text.strip():
+            try:
+                roi = [int(v) for v in roi_text.replace("，", ",").split(",")]
+                if len(roi) != 4 or roi[2] <= 0 or roi[3] <= 0:
+                    raise ValueError
+            except ValueError:
+                messagebox.showerror("错误", "观察区域应为 4 个整数，且宽高为正数")
+                return
+        color = simpledialog.askstring(
+            "等待条件",
+            "等待区域变为颜色 #rrggbb（留空则等待区域内容发生变化）:",
+            parent=self.root,
+        )
+        if color is None:
+            return
+        timeout = simpledialog.askfloat(
+            "等待超时",
+            "最长等待时间（秒），超时计为失败并继续:",
+            initialvalue=DEFAULT_WAIT_TIMEOUT,
+            minvalue=0.1,
+            parent=self.root,
+        )
+        if timeout is None:
+            return
+        color = color.strip()
+        try:
+            point = normalize_points(
+                [
+                    {
+                        "x": x,
+                        "y": y,
+                        "name": f"等待{'颜色 ' + color if color else '变化'}",
+                        "delay": 0.0,
+                        "action_type": "wait",
+                        "wait_mode": "color" if color else "change",
+                        "color": color or None,
+                        "roi": roi,
+                        "timeout": timeout,
+                    }
+                ],
+                self._point_defaults(),
+            )[0]
+        except ValueError as e:
+            messagebox.showerror("错误", str(e))
+            return
+        self.click_points.append(point)
+        self.points_listbox.row_inserted(len(self.click_points) - 1)
+        self.autosaver.mark_dirty()
+        self.add_progress_text(
+            f"添加等待条件: {point['name']} 区域:{roi or (x, y)} 超时:{timeout:g}s"
+        )
+        log(f"添加等待条件 {point['name']}")
+
+    def add_flow_point(self):
+        """添加流程控制点位，插入到选中点位之后（没有选中时追加到末尾）"""
+        dlg = FlowPointDialog(
+            self.root, labels=self._flow_labels(), theme=self.theme_var.get()
+        )
+        self.root.wait_window(dlg.top)
+        if not dlg.result:
+            return
+        sel = self.points_listbox.curselection()
+        index = sel[0] + 1 if sel else len(self.click_points)
+        point = self._flow_point(dlg.result)
+        self.click_points.insert(index, point)
+        self.points_listbox.row_inserted(index)
+        self.autosaver.mark_dirty()
+        self.add_progress_text(f"添加流程控制: {point['name']}（第 {index + 1} 行）")
+        log(f"添加流程控制 {point['name']}")
+
+    def _flow_labels(self):
+        return [
+            p["label"] for p in self.click_points if p.get("action_type") == "label"
+        ]
+
+    @staticmethod
+    def _flow_point(fields):
+        """FlowPointDialog 的结果 -> 完整的点位 dict（与 normalize_points 的字段一致）"""
+        ref = fields.get("label") or fields.get("target") or ""
+        point = {
+            "x": 0,
+            "y": 0,
+            "name": f"{fields['action_type']} {ref}".rstrip(),
+            "button": "left",
+            "delay": 0.0,
+            "click_count": 1,
+            "click_interval": 0.0,
+            "keys": "",
+            "coord_mode": "absolute",
+        }
+        point.update(fields)
+        return point
+
+    def _get_template_matcher(self):
+        if self.template_matcher is None:
+            self.template_matcher = TemplateMatcher()
+        return self.template_matcher
+
+    def _get_region_waiter(self):
+        if self.region_waiter is None:
+            self.region_waiter = RegionWaiter()
+        return self.region_waiter
+
+    def _point_row_text(self, i):
+        """列表第 i 行的显示文本（VirtualListbox 只对可见行调用）"""
+        p = self.click_points[i]
+        # 确保所有必要的字段都存在
+        name = p.get("name", f"点位{i+1}")
+        delay = p.get("delay", 1.0)
+        if p.get("action_type", "click") == "keyboard":
+            return f"{i+1}. {name} - 键盘操作 [{p.get('keys', '')}] 延时:{delay}"
+        if p.get("action_type") == "find_and_click":
+            roi = p.get("roi")
+            area = "整个屏幕" if not roi else "({},{} {}x{})".format(*roi)
+            return (
+                f"{i+1}. {name} - 图像识别 [{os.path.basename(p.get('template', ''))}] "
+                f"阈值:{p.get('threshold', DEFAULT_MATCH_THRESHOLD)} 区域:{area} "
+                f"[{p.get('button', 'left')}] 延时:{delay}"
+            )
+        action_type = p.get("action_type")
+        if action_type in FLOW_ACTIONS:
+            text = FLOW_ACTION_LABELS[action_type]
+            if action_type == "label":
+                return f"{i+1}. ▸ {p.get('label', '')}:"
+            if action_type == "loop":
+                text += f" → {p.get('target', '')} 共 {p.get('count', 1)} 次"
+            elif action_type == "branch":
+                cond = BRANCH_CONDITION_LABELS.get(p.get("when", "fail"), "")
+                text += f" {cond} → {p.get('target', '')}"
+            elif "target" in p:
+                text += f" → {p.get('target', '')}"
+            return f"{i+1}.     {text}"
+        if action_type == "wait":
+            roi = p.get("roi")
+            if roi:
+                area = "({},{} {}x{})".format(*roi)
+            else:
+                area = f"({p.get('x', 0)},{p.get('y', 0)})"
+            color = p.get("color")
+            if p.get("wait_mode") == "color" and color:
+                cond = "颜色 #{:02x}{:02x}{:02x}".format(*color)
             else:
-                display = f"{i+1}. {name} - ({x},{y}) [{button}] 延时:{delay} 点击:{click_count}次 间隔:{click_interval}"
-            self.points_listbox.insert(tk.END, display)
+                cond = "内容变化"
+            return (
+                f"{i+1}. {name} - 等待{cond} 区域:{area} "
+                f"超时:{p.get('timeout', DEFAULT_WAIT_TIMEOUT)}s 延时:{delay}"
+            )
+        x = p.get("x", 0)
+        y = p.get("y", 0)
+        button = p.get("button", "left")
+        click_count = p.get("click_count", 1)
+        click_interval = p.get("click_interval", 0.1)
+        coord_mode = p.get("coord_mode", "absolute")
+        if coord_mode == "client":
+            pos = f"窗口({x},{y})"
+        elif coord_mode == "ratio":
+            pos = f"窗口({x / 100:g}%,{y / 100:g}%)"
+        else:
+            pos = f"({x},{y})"
+        return f"{i+1}. {name} - {pos} [{button}] 延时:{delay} 点击:{click_count}次 间隔:{click_interval}"
+
+    def update_points_list(self):
+        """点位列表整体替换后刷新（只重绘可见行）"""
+        self.points_listbox.reset()
 
     def delete_selected_point(self):
         sel = self.points_listbox.curselection()
@@ -1760,7 +2410,8 @@ class AutoClickerApp:
             return
 
         removed = self.click_points.pop(idx)
-        self.update_points_list()  # 确保立即更新列表显示
+        self.points_listbox.row_deleted(idx)  # 确保立即更新列表显示
+        self.autosaver.mark_dirty()
         self.add_progress_text(f"删除点位: {removed['name']}")
         log(f"删除点位 {removed['name']}")
 
@@ -1772,6 +2423,7 @@ class AutoClickerApp:
             cnt = len(self.click_points)
             self.click_points.clear()
             self.update_points_list()
+            self.autosaver.mark_dirty()
             # 清除列表选择
             self.points_listbox.selection_clear(0, tk.END)
             self.add_progress_text(f"已清空 {cnt} 个点位")
@@ -1797,9 +2449,10 @@ class AutoClickerApp:
             self.click_points[new],
             self.click_points[idx],
         )
-        self.update_points_list()
-        self.points_listbox.selection_clear(0, tk.END)
+        self.points_listbox.rows_swapped(idx, new)
+        self.autosaver.mark_dirty()
         self.points_listbox.selection_set(new)
+        self.points_listbox.see(new)
         self.add_progress_text(f"点位移动: {idx+1} -> {new+1}")
         log(f"点位移动 {idx+1} -> {new+1}")
 
@@ -1825,7 +2478,8 @@ class AutoClickerApp:
         if new_name:
             old = p.get("name", f"点位{idx+1}")
             self.click_points[idx]["name"] = new_name
-            self.update_points_list()
+            self.points_listbox.refresh_row(idx)
+            self.autosaver.mark_dirty()
             self.add_progress_text(f"点位重命名: {old} -> {new_name}")
             log(f"点位重命名 {old} -> {new_name}")
 
@@ -1841,6 +2495,22 @@ class AutoClickerApp:
             return
 
         p = self.click_points[idx]
+        if p.get("action_type") in FLOW_ACTIONS:
+            dlg = FlowPointDialog(
+                self.root,
+                labels=self._flow_labels(),
+                point=p,
+                theme=self.theme_var.get(),
+            )
+            self.root.wait_window(dlg.top)
+            if dlg.result:
+                self.click_points[idx] = self._flow_point(dlg.result)
+                self.points_listbox.refresh_row(idx)
+                self.autosaver.mark_dirty()
+                self.add_progress_text(
+                    f"流程控制已编辑: {self.click_points[idx]['name']}"
+                )
+            return
 
         # 确保所有字段都有默认值
         x = p.get("x", 0)
@@ -1880,7 +2550,7 @@ class AutoClickerApp:
                 nkeys,
                 naction_type,
             ) = dlg.result
-            self.click_points[idx] = {
+            edited = {
                 "x": int(nx),
                 "y": int(ny),
                 "name": nname,
@@ -1890,8 +2560,19 @@ class AutoClickerApp:
                 "click_interval": float(nclick_interval),
                 "keys": nkeys,
                 "action_type": naction_type,
+                # 编辑对话框中的坐标按原模式解释
+                "coord_mode": p.get("coord_mode", "absolute"),
             }
-            self.update_points_list()
+            if naction_type == "find_and_click":
+                # 模板、阈值和搜索区域不在对话框中编辑
+                for key in ("template", "threshold", "roi"):
+                    edited[key] = p.get(key)
+            elif naction_type == "wait":
+                for key in ("wait_mode", "roi", "color", "tolerance", "timeout"):
+                    edited[key] = p.get(key)
+            self.click_points[idx] = edited
+            self.points_listbox.refresh_row(idx)
+            self.autosaver.mark_dirty()
 
             action_desc = (
                 f"按键:{nkeys}"
@@ -1912,59 +2593,14 @@ class AutoClickerApp:
         if not path:
             return
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            if isinstance(data, list):
-                # support both old list-of-lists and new list-of-dicts
-                new_list = []
-                for item in data:
-                    if isinstance(item, list) and len(item) >= 3:
-                        x = int(item[0])
-                        y = int(item[1])
-                        name = str(item[2])
-                        new_list.append(
-                            {
-                                "x": x,
-                                "y": y,
-                                "name": name,
-                                "button": self.default_button_var.get(),
-                                "delay": self.base_delay_var.get(),
-                                "click_count": self.click_count_var.get(),
-                                "click_interval": self.base_delay_var.get(),
-                            }
-                        )
-                    elif isinstance(item, dict):
-                        # ensure keys exist
-                        x = int(item.get("x", 0))
-                        y = int(item.get("y", 0))
-                        name = str(item.get("name", f"点位({x},{y})"))
-                        button = item.get("button", self.default_button_var.get())
-                        delay = float(item.get("delay", self.base_delay_var.get()))
-                        click_count = int(
-                            item.get("click_count", self.click_count_var.get())
-                        )
-                        click_interval = float(
-                            item.get("click_interval", self.base_delay_var.get())
-                        )
-                        new_list.append(
-                            {
-                                "x": x,
-                                "y": y,
-                                "name": name,
-                                "button": button,
-                                "delay": delay,
-                                "click_count": click_count,
-                                "click_interval": click_interval,
-                            }
-                        )
-                self.click_points = new_list
-                self.update_points_list()
-                self.add_progress_text(
-                    f"已导入 {len(self.click_points)} 个点位 ({os.path.basename(path)})"
-                )
-                log(f"导入配置 {path}")
-            else:
-                messagebox.showerror("错误", "不支持的配置格式")
+            # 与 load_points 使用同一个加载器（兼容旧版列表格式）
+            self.click_points = load_points_file(path, self._point_defaults())
+            self.update_points_list()
+            self.autosaver.mark_dirty()
+            self.add_progress_text(
+                f"已导入 {len(self.click_points)} 个点位 ({os.path.basename(path)})"
+            )
+            log(f"导入配置 {path}")
         except Exception as e:
             messagebox.showerror("错误", f"导入失败: {e}")
 
@@ -1977,8 +2613,7 @@ class AutoClickerApp:
         if not path:
             return
         try:
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(self.click_points, f, ensure_ascii=False, indent=2)
+            save_points_file(self.click_points, path, compact=False)
             self.add_progress_text(f"已导出到 {os.path.basename(path)}")
             log(f"导出配置 {path}")
         except Exception as e:
@@ -1986,8 +2621,7 @@ class AutoClickerApp:
 
     def save_points(self):
         try:
-            with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.click_points, f, ensure_ascii=False, indent=2)
+            self.autosaver.save_now()
             messagebox.showinfo(
                 "成功", f"已保存 {len(self.click_points)} 个点位到 {CONFIG_FILE}"
             )
@@ -2005,88 +2639,77 @@ class AutoClickerApp:
         if not path:
             return
         try:
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(self.click_points, f, ensure_ascii=False, indent=2)
+            save_points_file(self.click_points, path, compact=False)
             self.add_progress_text(f"已另存为 {os.path.basename(path)}")
             log(f"另存为 {path}")
         except Exception as e:
             messagebox.showerror("错误", f"保存失败: {e}")
 
+    def _point_defaults(self):
+        """新点位/旧格式点位缺失字段时使用的默认值（取自当前界面设置）"""
+        return {
+            "button": self.default_button_var.get(),
+            "delay": self.base_delay_var.get(),
+            "click_count": self.click_count_var.get(),
+            "click_interval": self.base_delay_var.get(),
+        }
+
     def load_points(self, quiet=False):
         if os.path.exists(CONFIG_FILE):
             try:
-                with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                # normalize
-                new_list = []
-                for item in data:
-                    if isinstance(item, dict):
-                        x = int(item.get("x", 0))
-                        y = int(item.get("y", 0))
-                        name = item.get("name", f"点位({x},{y})")
-                        button = item.get("button", self.default_button_var.get())
-                        delay = float(item.get("delay", self.base_delay_var.get()))
-                        click_count = int(
-                            item.get("click_count", self.click_count_var.get())
-                        )
-                        click_interval = float(
-                            item.get("click_interval", self.base_delay_var.get())
-                        )
-                        keys = item.get("keys", "")
-                        action_type = item.get("action_type", "click")
-
-                        new_list.append(
-                            {
-                                "x": x,
-                                "y": y,
-                                "name": name,
-                                "button": button,
-                                "delay": delay,
-                                "click_count": click_count,
-                                "click_interval": click_interval,
-                                "keys": keys,
-                                "action_type": action_type,
-                            }
-                        )
-                    elif isinstance(item, list):
-                        x = int(item[0])
-                        y = int(item[1])
-                        name = str(item[2])
-                        new_list.append(
-                            {
-                                "x": x,
-                                "y": y,
-                                "name": name,
-                                "button": self.default_button_var.get(),
-                                "delay": self.base_delay_var.get(),
-                                "click_count": self.click_count_var.get(),
-                                "click_interval": self.base_delay_var.get(),
-                                "keys": "",
-                                "action_type": "click",
-                            }
-                        )
-                self.click_points = new_list
+                self.click_points = load_points_file(
+                    CONFIG_FILE, self._point_defaults()
+                )
                 self.update_points_list()
                 if not quiet:
                     self.add_progress_text(f"已加载 {len(self.click_points)} 个点位")
                 log(f"加载配置 {CONFIG_FILE}")
             except Exception as e:
-                log(f"加载点位配置失败: {e}")
+                log_error(f"加载点位配置失败: {e}")
 
     # ---------------- Task control ----------------
     def start_task(self):
         if self.is_running:
             messagebox.showinfo("提示", "任务已在运行中")
             return
+        if self.recorder is not None and self.recorder.recording:
+            # 回放的点击会被录进宏里，F3/托盘启动同样经过这里
+            messagebox.showinfo("提示", "正在录制宏，请先按 F9 停止录制")
+            return
+        if self.multi_scheduler is not None and self.multi_scheduler.active:
+            messagebox.showinfo("提示", "多配置任务正在运行，请先在多配置窗口中停止")
+            return
         if not self.click_points:
             messagebox.showwarning("警告", "请先添加至少一个点位！")
             return
+        if self._uses_window_coords(self.click_points):
+            if self._target_client_rect() is None:
+                messagebox.showwarning(
+                    "警告", "点位使用窗口相对坐标，请先选择目标窗口并确保其已打开"
+                )
+                return
+        if any(p.get("action_type") in FLOW_ACTIONS for p in self.click_points):
+            # 标签重复、跳转目标不存在等错误在启动前提示
+            try:
+                normalize_points(self.click_points, self._point_defaults())
+            except ValueError as e:
+                messagebox.showerror("流程控制错误", str(e))
+                return
+        if not vision_available() and any(
+            p.get("action_type") in SCREEN_ACTIONS for p in self.click_points
+        ):
+            messagebox.showwarning(
+                "缺少依赖",
+                "图像点位和等待条件需要 numpy 和 Pillow\n\n请运行: pip install numpy pillow",
+            )
+            return
 
         # validate params
         base_delay = safe_float(self.base_delay_var.get(), 1.0)
         loop_count = safe_int(self.loop_var.get(), 1)
         offset_px = safe_int(self.random_offset_var.get(), 0)
         rand_delay = safe_float(self.random_delay_var.get(), 0.0)
+        speed = clamp_speed(safe_float(self.speed_var.get(), 1.0))
         countdown = safe_int(self.countdown_var.get(), 0)
 
         # 修改这里：根据设置决定是否显示确认窗口
@@ -2098,12 +2721,18 @@ class AutoClickerApp:
                 f"随机偏移: ±{offset_px} px\n"
                 f"随机延时: ±{rand_delay} 秒\n"
                 f"循环次数: {loop_count}\n"
+                f"回放倍率: {speed:g}x\n"
+                f"循环间隔: {safe_float(self.loop_delay_var.get(), LOOP_DELAY)} 秒\n"
                 f"启动倒计时: {countdown} 秒\n"
                 f"任务结束动作: {self.auto_action_var.get()}"
             )
             if not messagebox.askokcancel("确认任务", summary):
                 return
 
+        backend = self._create_input_backend()
+        if backend is None:
+            return
+
         # countdown
         if countdown > 0:
             for i in range(countdown, 0, -1):
@@ -2115,6 +2744,7 @@ class AutoClickerApp:
         self.stop_event.clear()
         self.pause_event.clear()
         self.is_running = True
+        self.safety_monitor.activate()
         self.start_btn.config(state=tk.DISABLED, text="任务运行中...")
         self.pause_btn.config(state=tk.NORMAL)
         self.stop_btn.config(state=tk.NORMAL)
@@ -2122,20 +2752,29 @@ class AutoClickerApp:
         log("任务启动")
 
         # reset stats
-        self.stats = {
-            "total_click_attempts": 0,
-            "successful_clicks": 0,
-            "failed_clicks": 0,
-            "start_time": datetime.datetime.now().isoformat(),
-            "end_time": None,
-            "loops_completed": 0,
-        }
+        self.stats = new_run_stats()
+        self.stats.start_time = datetime.datetime.now().isoformat()
         self.update_stats_display()
 
+        # 编译执行计划：运行中编辑点位不会影响本次任务；
+        # 报告中的逐点统计按计划下标对应，所以使用同一份点位快照
+        points = [dict(p) for p in self.click_points]
+        plan = compile_plan(points, loop_count, offset_px, rand_delay, speed=speed)
+        # 界面变量只在界面线程中读取
+        run_params = {
+            "base_delay": base_delay,
+            "spin_window_ms": safe_float(
+                self.spin_window_ms_var.get(), SPIN_WINDOW * 1000
+            ),
+            "loop_delay": max(0.0, safe_float(self.loop_delay_var.get(), LOOP_DELAY)),
+            # 引擎线程不读取 Tk 变量，目标窗口标题在这里取好
+            "window_title": self.window_title_var.get().strip(),
+        }
+
         # run task thread
         self.task_thread = threading.Thread(
             target=self.run_click_task,
-            args=(loop_count, offset_px, rand_delay),
+            args=(plan, backend, points, run_params),
             daemon=True,
         )
         self.task_thread.start()
@@ -2146,6 +2785,7 @@ class AutoClickerApp:
         self.stop_event.set()
         self.pause_event.clear()
         self.is_running = False
+        self.safety_monitor.deactivate()
         self.start_btn.config(state=tk.NORMAL, text="启动任务 (F3)")
         self.pause_btn.config(state=tk.DISABLED, text="暂停 (F4)")
         self.stop_btn.config(state=tk.DISABLED)
@@ -2154,7 +2794,9 @@ class AutoClickerApp:
         log("任务停止")
 
     def toggle_pause(self):
-        if not self.is_running:
+        # 多配置运行时 F4 同样暂停/继续全部配置（共用 pause_event）
+        multi_active = self.multi_scheduler is not None and self.multi_scheduler.active
+        if not self.is_running and not multi_active:
             return
         if not self.pause_event.is_set():
             self.pause_event.set()
@@ -2169,189 +2811,65 @@ class AutoClickerApp:
             self.status_bar.config(text="继续运行")
             log("任务继续")
 
-    def run_click_task(self, loop_count, offset_px, rand_delay):
-
-        # 确保目标窗口激活
-        if not self.ensure_target_window_active():
-            self.add_progress_text("错误: 无法切换到目标窗口，任务停止")
-            log("任务停止: 无法切换到目标窗口")
-            self.stop_event.set()
-            return
-
-        total_points = len(self.click_points)
-        total_ops = sum(p["click_count"] for p in self.click_points) * loop_count
-        ops_done = 0
-
+    def _create_input_backend(self):
+        """按设置创建输入后端，不可用时回退到 pyautogui"""
+        name = self.input_backend_var.get() or DEFAULT_BACKEND
         try:
-            for loop in range(loop_count):
-                if self.stop_event.is_set():
-                    break
-                if not self.is_running:
-                    break
-                self.add_progress_text(f"开始第 {loop+1}/{loop_count} 次循环")
-
-                for idx, p in enumerate(self.click_points):
-                    if self.stop_event.is_set():
-                        break
-
-                    # 等待暂停
-                    while self.pause_event.is_set() and not self.stop_event.is_set():
-                        self.status_bar.config(text="已暂停（按 F4 继续）")
-                        time.sleep(0.1)
-
-                    if self.stop_event.is_set():
-                        break
-
-                    # 记录当前目标点位
-                    self.current_target_point = (p["x"], p["y"])
-
-                    # 更新UI显示
-                    self.root.after(0, lambda i=idx: self.highlight_point(i))
-                    cur_info = f"当前: 循环 {loop+1}/{loop_count} — 点位 {idx+1}/{total_points} - {p['name']} ({p['x']},{p['y']})"
-                    self.root.after(
-                        0, lambda t=cur_info: self.current_task_label.config(text=t)
-                    )
-
-                    # 调试模式处理
-                    if self.debug_mode_var.get():
-                        self.add_progress_text(
-                            f"调试模式：点位 {idx+1} 准备就绪，按 F4 继续..."
-                        )
-                        self.status_bar.config(
-                            text=f"调试模式：点位 {idx+1} 就绪，按 F4 继续"
-                        )
-                        self.pause_event.set()
-
-                        while (
-                            self.pause_event.is_set() and not self.stop_event.is_set()
-                        ):
-                            time.sleep(0.1)
-
-                        if self.stop_event.is_set():
-                            break
-
-                    # 关键修复：正确的缩进开始
-                    click_count = p.get("click_count", 1)
-                    action_type = p.get("action_type", "click")
-
-                    for c in range(click_count):
-                        if self.stop_event.is_set():
-                            break
-
-                        if action_type == "keyboard":
-                            # 键盘操作
-                            keys = p.get("keys", "")
-                            if keys and HAVE_KEYBOARD:
-                                try:
-                                    keyboard.send(keys)
-                                    self.stats["successful_clicks"] += 1
-                                    self.add_progress_text(f"执行键盘操作: {keys}")
-                                    log(f"键盘操作: {keys}")
-                                except Exception as e:
-                                    self.stats["failed_clicks"] += 1
-                                    self.add_progress_text(f"键盘操作失败: {e}")
-                                    log(f"键盘操作异常: {e}")
-                        else:
-                            # 鼠标点击操作 - 关键修复：确保使用正确的坐标
-                            rx = p["x"]
-                            ry = p["y"]
-
-                            # 应用随机偏移
-                            if offset_px > 0:
-                                dx = random.randint(-offset_px, offset_px)
-                                dy = random.randint(-offset_px, offset_px)
-                                rx = p["x"] + dx
-                                ry = p["y"] + dy
-
-                            # 执行点击 - 确保坐标正确传递
-                            try:
-                                btn = p.get("button", "left")
-                                # 调试信息：打印实际点击的坐标
-                                debug_msg = f"准备点击: ({rx}, {ry}) - 原始坐标: ({p['x']}, {p['y']})"
-                                self.add_progress_text(debug_msg)
-                                log(debug_msg)
-
-                                pyautogui.click(rx, ry, button=btn)
-                                self.stats["successful_clicks"] += 1
-                            except Exception as e:
-                                self.stats["failed_clicks"] += 1
-                                self.add_progress_text(f"点击失败: {e}，任务停止")
-                                log(f"点击异常: {e}")
-                                self.stop_event.set()
-                                break
-                            finally:
-                                self.stats["total_click_attempts"] += 1
-
-                            # 记录点击时间
-                            self.last_click_time = time.time()
-
-                            ops_done += 1
-                            progress = (
-                                (ops_done / total_ops) * 100 if total_ops > 0 else 100
-                            )
-                            self.root.after(
-                                0, lambda p=progress: self.progress_var.set(p)
-                            )
-
-                            offset_info = (
-                                f"偏移({rx-p['x']},{ry-p['y']})"
-                                if offset_px > 0
-                                else ""
-                            )
-                            self.add_progress_text(
-                                f"循环{loop+1}/{loop_count} - 点位{idx+1}/{total_points} - 点击{c+1}/{click_count} {offset_info}"
-                            )
-                            log(f"点击: {p['name']} ({rx},{ry}) 按钮:{btn}")
-
-                            # 点击间隔延时
-                            click_interval = p.get("click_interval", 0.1)
-                            if rand_delay > 0:
-                                click_interval = click_interval + random.uniform(
-                                    -rand_delay, rand_delay
-                                )
-                                if click_interval < 0:
-                                    click_interval = 0
-                            if c < click_count - 1 and not self.stop_event.is_set():
-                                time.sleep(click_interval)
-
-                    # 清除目标点位记录
-                    self.current_target_point = None
-
-                    # 点位间延时
-                    if idx < total_points - 1 and not self.stop_event.is_set():
-                        time.sleep(p.get("delay", 1.0))
-
-                # 完成一次循环
-                self.stats["loops_completed"] += 1
-
-                # 循环间延时
-                if loop < loop_count - 1 and not self.stop_event.is_set():
-                    time.sleep(1.0)
-
-            # finished normally or stopped
-            if not self.stop_event.is_set():
-                self.add_progress_text("任务完成！")
-                log("任务完成")
+            return create_backend(name)
+        except Exception as e:
+            log(f"输入后端 {name} 不可用: {e}")
+            error = e
+        if name != "pyautogui":
+            try:
+                backend = create_backend("pyautogui")
+                self.add_progress_text(f"输入后端 {name} 不可用，改用 pyautogui")
+                return backend
+            except Exception as e:
+                error = e
+        messagebox.showerror("错误", f"无法初始化输入后端: {error}")
+        return None
+
+    def run_click_task(self, plan, backend, points, run_params):
+        self.engine = ClickEngine(
+            plan,
+            backend,
+            stop_event=self.stop_event,
+            pause_event=self.pause_event,
+            listener=TaskEngineListener(self, plan),
+            stats=self.stats,
+            spin_window=run_params["spin_window_ms"] / 1000.0,
+            step_mode=self.debug_mode_var.get,
+            loop_delay=run_params["loop_delay"],
+            geometry=lambda: self._target_client_rect(run_params["window_title"]),
+            matcher=self._get_template_matcher() if plan.targets else None,
+            waiter=self._get_region_waiter() if plan.waits else None,
+        )
+        self.add_progress_text(f"输入后端: {backend.label}")
+
+        started = False
+        try:
+            # 确保目标窗口激活；失败时同样经过 finally 停止安全监测并恢复界面状态
+            if not self.ensure_target_window_active():
+                self.add_progress_text("错误: 无法切换到目标窗口，任务停止")
+                log("任务停止: 无法切换到目标窗口")
+                self.stop_event.set()
+                return
+            started = True
+            if self.engine.run():
                 # post-action
                 if self.auto_action_var.get() == "sound":
                     play_beep()
-            else:
-                self.add_progress_text("任务中断。")
-                log("任务中断")
-        except Exception as e:
-            self.add_progress_text(f"任务异常终止: {e}")
-            log(f"任务异常: {e}")
         finally:
-            # 清理目标点位记录
-            self.current_target_point = None
-            self.stats["end_time"] = datetime.datetime.now().isoformat()
+            # 任务结束后停止安全监测采样
+            self.safety_monitor.deactivate()
             # finalize: update ui in main thread
             self.root.after(0, self._task_finished_cleanup)
-            # write click report
-            try:
-                self.write_click_report(silent=True)
-            except Exception as ex:
-                log(f"写入报告失败: {ex}")
+            # write click report（未开始执行时不写）
+            if started:
+                try:
+                    self.write_click_report(points, run_params, silent=True)
+                except Exception as ex:
+                    log_error(f"写入报告失败: {ex}")
 
     def highlight_point(self, index):
         try:
@@ -2383,7 +2901,12 @@ class AutoClickerApp:
         self.root.bind("<F2>", lambda e: self.local_capture())
         self.root.bind("<F3>", lambda e: self._hotkey_toggle_start_stop()())
         self.root.bind("<F4>", lambda e: self.toggle_pause())
+        self.root.bind("<F9>", lambda e: self.toggle_recording())
 
+        # 全局快捷键需要导入 keyboard 并安装钩子，推迟到窗口显示之后
+        self.root.after_idle(self.bind_global_hotkeys)
+
+    def bind_global_hotkeys(self):
         # global keyboard hooks via keyboard lib if available
         if HAVE_KEYBOARD:
             try:
@@ -2391,9 +2914,12 @@ class AutoClickerApp:
                 keyboard.add_hotkey("f2", self.global_capture_coord)
                 keyboard.add_hotkey("f3", lambda: self._hotkey_toggle_start_stop()())
                 keyboard.add_hotkey("f4", lambda: self.toggle_pause())
-                log("全局快捷键已设置 (F2 记录, F3 开始/停止, F4 暂停/继续)")
+                keyboard.add_hotkey(
+                    "f9", lambda: self.root.after(0, self.toggle_recording)
+                )
+                log("全局快捷键已设置 (F2 记录, F3 开始/停止, F4 暂停/继续, F9 录制宏)")
             except Exception as e:
-                log(f"设置全局快捷键失败: {e}")
+                log_error(f"设置全局快捷键失败: {e}")
                 self.add_progress_text("全局快捷键设置失败或权限不足")
         else:
             self.add_progress_text("未检测到 keyboard 库或权限，全局快捷键不可用。")
@@ -2416,7 +2942,7 @@ class AutoClickerApp:
             self.last_capture_time = current_time
 
             try:
-                x, y = pyautogui.position()
+                x, y = cursor_position()
                 # 使用默认设置添加点位
                 self.add_point(x, y)
                 self.coord_status.config(
@@ -2432,7 +2958,7 @@ class AutoClickerApp:
                     ),
                 )
             except Exception as e:
-                log(f"全局捕获失败: {e}")
+                log_error(f"全局捕获失败: {e}")
 
     def local_capture(self, event=None):
         if self.is_capturing:
@@ -2443,75 +2969,110 @@ class AutoClickerApp:
             self.last_capture_time = current_time
 
             try:
-                x, y = pyautogui.position()
+                x, y = cursor_position()
                 self.add_point(x, y)
                 self.coord_status.config(
                     text=f"已记录坐标: ({x}, {y})",
                     fg=ModernStyles.get_theme(self.theme_var.get())["success"],
                 )
             except Exception as e:
-                log(f"本地捕获失败: {e}")
+                log_error(f"本地捕获失败: {e}")
 
-    # ---------------- Safety: mouse movement detection ----------------
-    def check_mouse_movement(self):
-        try:
-            cur = pyautogui.position()
-            prev = self.last_mouse_pos
-            dx = cur[0] - prev[0]
-            dy = cur[1] - prev[1]
-            dist = math.hypot(dx, dy)
+    # ---------------- Macro recording ----------------
+    def toggle_recording(self, from_button=False):
+        if self.recorder is not None and self.recorder.recording:
+            self.stop_recording(discard_click=from_button)
+        else:
+            self.start_recording()
 
-            current_time = time.time()
+    def start_recording(self):
+        if self.is_running or (
+            self.multi_scheduler is not None and self.multi_scheduler.active
+        ):
+            messagebox.showinfo("提示", "任务运行中不能录制")
+            return
+        if self.recorder is None:
+            # 缓冲写满时在录制线程中回调，切回主线程结束录制
+            self.recorder = MacroRecorder(
+                on_full=lambda: self.root.after(0, self.stop_recording)
+            )
+        try:
+            self.mouse_sampler = MouseSampler(self.recorder)
+        except Exception as e:
+            messagebox.showerror("错误", f"无法录制鼠标操作: {e}")
+            return
+        if HAVE_KEYBOARD:
+            try:
+                self._record_hook = keyboard.hook(self.recorder.on_key_event)
+            except Exception as e:
+                log_error(f"安装录制键盘钩子失败: {e}")
+                self.add_progress_text("键盘钩子不可用，只录制鼠标操作")
+        self.recorder.start()
+        self.mouse_sampler.start()
+        self.record_btn.config(text="停止录制 (F9)")
+        self.coord_status.config(
+            text="正在录制鼠标和键盘操作 - 按 F9 停止",
+            fg=ModernStyles.get_theme(self.theme_var.get())["success"],
+        )
+        self.add_progress_text("开始录制宏，按 F9 停止")
+        log("开始录制宏")
 
-            # 使用UI中设置的动态阈值
-            threshold = self.safety_threshold_var.get()
+    def stop_recording(self, discard_click=False):
+        recorder = self.recorder
+        if recorder is None or not recorder.recording:
+            return
+        self.mouse_sampler.stop()
+        duration = recorder.stop()
+        if self._record_hook is not None:
+            try:
+                keyboard.unhook(self._record_hook)
+            except Exception:
+                pass
+            self._record_hook = None
+        if discard_click:
+            # 最后一次点击是界面上的"停止录制"按钮
+            recorder.discard_last_click()
+        self.record_btn.config(text="录制宏 (F9)")
+        self.coord_status.config(
+            text="录制已停止",
+            fg=ModernStyles.get_theme(self.theme_var.get())["danger"],
+        )
 
-            # 只有在任务运行中且未暂停时才检查安全
-            if (
-                self.enable_safety_check.get()
-                and self.is_running
-                and not self.pause_event.is_set()
-            ):
+        buffer = recorder.buffer
+        if recorder.full:
+            self.add_progress_text(
+                f"录制事件达到缓冲容量（{buffer.capacity} 个），已自动停止录制"
+            )
+        # 程序自身的快捷键不作为录制内容
+        points = recorder.to_points(ignore_keys=("f2", "f3", "f4", "f9"))
+        log(f"录制结束: {duration:.1f}s，{len(buffer)} 个事件，{len(points)} 个点位")
+        if not points:
+            self.add_progress_text("录制结束，没有录制到点击或按键")
+            return
+        self.click_points.extend(normalize_points(points))
+        self.update_points_list()
+        self.autosaver.mark_dirty()
+        self.add_progress_text(
+            f"录制结束: {duration:.1f} 秒，添加 {len(points)} 个点位（保留原始间隔）"
+        )
 
-                # 检查是否是任务移动
-                is_task_movement = False
-
-                # 方法1：检查是否在点击后的短时间内
-                if hasattr(self, "last_click_time"):
-                    time_since_last_click = current_time - self.last_click_time
-                    if time_since_last_click < 3.0:  # 点击后3秒内认为是任务移动
-                        is_task_movement = True
-
-                # 方法2：检查鼠标是否正在向目标点位移动
-                if (
-                    hasattr(self, "current_target_point")
-                    and self.current_target_point is not None
-                ):
-                    target_x, target_y = self.current_target_point
-                    # 计算到目标点的距离
-                    to_target_dist = math.hypot(cur[0] - target_x, cur[1] - target_y)
-                    # 如果鼠标正在接近目标点，认为是任务移动
-                    if to_target_dist < 100:  # 距离目标点100像素内
-                        is_task_movement = True
-
-                # 只有当不是任务移动且移动距离超过阈值时才触发安全暂停
-                if (
-                    dist > threshold
-                    and not is_task_movement
-                    and current_time - self.last_safety_trigger > 5
-                ):  # 5秒冷却
-
-                    self.pause_event.set()
-                    self.pause_btn.config(text="继续 (F4)")
-                    self.add_progress_text("安全机制：检测到异常鼠标移动，已暂停任务")
-                    self.add_progress_text("如果是正常操作，请按F4继续任务")
-                    log(f"安全暂停：鼠标移动距离 {dist:.1f}px (阈值: {threshold}px)")
-                    self.last_safety_trigger = current_time
-
-            self.last_mouse_pos = cur
-        except Exception:
+    # ---------------- Safety: mouse movement detection ----------------
+    def _sync_safety_settings(self):
+        monitor = self.safety_monitor
+        try:
+            monitor.enabled = bool(self.enable_safety_check.get())
+            monitor.threshold = int(self.safety_threshold_var.get())
+        except (tk.TclError, ValueError):
+            # 输入框编辑过程中可能是空字符串，保留上一次的有效值
             pass
 
+    def _on_safety_trigger(self, dist, threshold):
+        """SafetyMonitor 线程回调：引擎已通过 pause_event 暂停，这里只更新界面"""
+        log(f"安全暂停：鼠标移动距离 {dist:.1f}px (阈值: {threshold}px)")
+        self.add_progress_text("安全机制：检测到异常鼠标移动，已暂停任务")
+        self.add_progress_text("如果是正常操作，请按F4继续任务")
+        self.root.after(0, lambda: self.pause_btn.config(text="继续 (F4)"))
+
     # ---------------- Help / Logs / Reports ----------------
     def show_help(self):
         help_text = """
@@ -2837,6 +3398,7 @@ class AutoClickerApp:
         dialog.bind("<Escape>", lambda e: dialog.destroy())
 
     def open_log_file(self):
+        flush_log()
         if os.path.exists(LOG_FILE):
             try:
                 if os.name == "nt":
@@ -2858,23 +3420,51 @@ class AutoClickerApp:
             messagebox.showinfo("日志文件", "日志文件尚未生成")
 
     def add_progress_text(self, text):
-        now = time.strftime("%H:%M:%S")
-        line = f"{now} - {text}\n"
+        # 线程安全：只写入缓冲，由 _drain_progress 在界面线程中批量显示
+        self.progress_sink.push(text)
+
+    def _drain_progress(self):
+        """按固定帧率把缓冲中的消息批量插入文本框，并只保留最后 PROGRESS_MAX_LINES 行"""
         try:
-            self.progress_details.config(state=tk.NORMAL)
-            self.progress_details.insert(tk.END, line)
-            self.progress_details.see(tk.END)
-            self.progress_details.config(state=tk.DISABLED)
+            if not self.root.winfo_exists():
+                return
         except Exception:
-            pass
+            return
+        lines, dropped = self.progress_sink.drain()
+        if lines:
+            if dropped:
+                lines.insert(
+                    0,
+                    f"{time.strftime('%H:%M:%S')} - （消息过多，已省略 {dropped} 条）\n",
+                )
+            try:
+                text = self.progress_details
+                text.config(state=tk.NORMAL)
+                text.insert(tk.END, "".join(lines))
+                # 每行都以换行结尾，end-1c 落在最后一个换行之后的空行上
+                line_count = int(text.index("end-1c").split(".")[0]) - 1
+                excess = line_count - PROGRESS_MAX_LINES
+                if excess > 0:
+                    text.delete("1.0", f"{excess + 1}.0")
+                text.see(tk.END)
+                text.config(state=tk.DISABLED)
+            except Exception:
+                pass
+        if self.is_running:
+            # 统计快照只复制计数器，运行中按较低频率刷新
+            now = time.monotonic()
+            if now - self._last_stats_refresh >= STATS_REFRESH_MS / 1000.0:
+                self._last_stats_refresh = now
+                self.update_stats_display()
+        self.root.after(PROGRESS_FRAME_MS, self._drain_progress)
 
     # ---------------- Click report (statistics) ----------------
     def _stats_text(self):
-        s = self.stats
-        if not s or s["start_time"] is None:
+        s = self.stats.snapshot(histograms=False)
+        if s["start_time"] is None:
             return "统计：尚未开始任务"
-        start = s.get("start_time", "N/A")
-        end = s.get("end_time", "N/A")
+        start = s["start_time"]
+        end = s["end_time"] or "N/A"
         return (
             f"统计：尝试 {s['total_click_attempts']} 次，成功 {s['successful_clicks']}，失败 {s['failed_clicks']}，"
             f"循环完成 {s['loops_completed']}，开始 {start}，结束 {end}"
@@ -2883,62 +3473,86 @@ class AutoClickerApp:
     def update_stats_display(self):
         self.stats_label.config(text=self._stats_text())
 
-    def write_click_report(self, silent=False):
+    def write_click_report(self, points, run_params, silent=False):
+        """把本次任务追加为 REPORT_FILE 中的一行 JSON（任务线程中调用）
+
+        points 为编译计划时的点位快照，run_params 为启动时在界面线程读取的参数。
+        """
         try:
-            s = self.stats
-            now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            content = []
-            content.append(f"AutoClicker 执行报告 - {now}")
-            content.append(f"版本: {VERSION}")
-            content.append(f"点位数: {len(self.click_points)}")
-            content.append(
-                f"参数: base_delay={self.base_delay_var.get()}, loop={self.loop_var.get()}, random_offset={self.random_offset_var.get()}, random_delay={self.random_delay_var.get()}"
+            engine = self.engine
+            plan = engine.plan if engine is not None else None
+            params = {
+                "backend": getattr(engine.backend, "name", None) if engine else None,
+                "base_delay": run_params["base_delay"],
+                "loops": plan.loop_count if plan else None,
+                "random_offset": plan.offset_px if plan else None,
+                "random_delay": plan.rand_delay if plan else None,
+                "speed": plan.speed if plan else None,
+                "loop_delay": run_params["loop_delay"],
+                "spin_window_ms": run_params["spin_window_ms"],
+            }
+            record = build_run_report(
+                self.stats.snapshot(points=True),
+                points,
+                params=params,
+                version=VERSION,
+                completed=engine.completed if engine is not None else None,
             )
-            content.append("点位列表:")
-            for i, p in enumerate(self.click_points, 1):
-                content.append(
-                    f"  {i}. {p['name']} ({p['x']},{p['y']}) 按键:{p['button']} 延时:{p['delay']} 点击:{p['click_count']}次 间隔:{p['click_interval']}"
-                )
-            content.append("统计:")
-            content.append(f"  尝试: {s['total_click_attempts']}")
-            content.append(f"  成功: {s['successful_clicks']}")
-            content.append(f"  失败: {s['failed_clicks']}")
-            content.append(f"  循环完成: {s['loops_completed']}")
-            content.append(f"  开始时间: {s.get('start_time')}")
-            content.append(f"  结束时间: {s.get('end_time')}")
-            content.append("日志结束\n\n")
-            with open(CLICK_REPORT, "a", encoding="utf-8") as f:
-                f.write("\n".join(content) + "\n")
+            append_report(record)
+            s = record["stats"]
+            for line in format_histogram_lines(record["histograms"]):
+                log(f"统计 {line}")
             if not silent:
-                messagebox.showinfo("报告已生成", f"执行报告已追加到 {CLICK_REPORT}")
-            log(f"写入执行报告到 {CLICK_REPORT}")
+                messagebox.showinfo("报告已生成", f"执行报告已追加到 {REPORT_FILE}")
+            log(
+                f"写入执行报告到 {REPORT_FILE}（成功 {s['successful_clicks']}，"
+                f"失败 {s['failed_clicks']}）"
+            )
         except Exception as e:
-            log(f"写入报告失败: {e}")
+            log_error(f"写入报告失败: {e}")
 
     def export_click_report(self):
-        # save a copy
-        if not os.path.exists(CLICK_REPORT):
+        if not os.path.exists(REPORT_FILE):
             messagebox.showinfo("提示", "尚无报告文件，先运行一次任务以生成")
             return
         path = filedialog.asksaveasfilename(
-            defaultextension=".txt", filetypes=[("文本文件", "*.txt")]
+            title="导出执行报告",
+            defaultextension=".csv",
+            filetypes=[
+                ("CSV 文件", "*.csv"),
+                ("JSON 文件", "*.json"),
+                ("JSON Lines", "*.jsonl"),
+            ],
         )
         if not path:
             return
-        try:
-            with open(CLICK_REPORT, "r", encoding="utf-8") as src, open(
-                path, "w", encoding="utf-8"
-            ) as dst:
-                dst.write(src.read())
-            messagebox.showinfo("导出成功", f"已导出报告到 {path}")
-        except Exception as e:
-            messagebox.showerror("错误", f"导出失败: {e}")
+        self.add_progress_text(f"正在导出执行报告到 {os.path.basename(path)}")
 
-    # ---------------- Tray integration ----------------
-    def minimize_to_tray(self):
-        if not HAVE_PYSTRAY:
-            messagebox.showwarning(
-                "托盘支持不可用", "未检测到 pystray 或 Pillow，无法最小化到托盘。"
+        def worker():
+            # 报告文件可能很大，在后台线程中逐行流式导出
+            try:
+                count = export_reports(path)
+            except Exception as e:
+                error = str(e)
+                self.root.after(
+                    0, lambda: messagebox.showerror("错误", f"导出失败: {error}")
+                )
+                return
+            log(f"导出执行报告 {path}（{count} 条）")
+            self.root.after(
+                0,
+                lambda: messagebox.showinfo(
+                    "导出成功", f"已导出 {count} 条报告到 {path}"
+                ),
+            )
+
+        threading.Thread(target=worker, name="ReportExport", daemon=True).start()
+
+    # ---------------- Tray integration ----------------
+    def minimize_to_tray(self):
+        if not HAVE_PYSTRAY:
+            messagebox.showwarning(
+                "托盘支持不可用", "未检测到 pystray 或 Pillow，无法最小化到托盘。"
             )
             return
         # hide window and start tray in background thread
@@ -2973,15 +3587,19 @@ class AutoClickerApp:
                 d.text((18, 18), "AC", fill="black")
 
             # 创建托盘菜单
-            menu = Menu(
-                MenuItem("打开主窗口", lambda icon, item: self.show_from_tray()),
-                MenuItem("开始任务", lambda icon, item: self.start_task()),
-                MenuItem("暂停/继续", lambda icon, item: self.toggle_pause()),
-                MenuItem("停止任务", lambda icon, item: self.stop_task()),
-                MenuItem("退出", lambda icon, item: self.tray_exit()),
+            menu = pystray.Menu(
+                pystray.MenuItem(
+                    "打开主窗口", lambda icon, item: self.show_from_tray()
+                ),
+                pystray.MenuItem("开始任务", lambda icon, item: self.start_task()),
+                pystray.MenuItem("暂停/继续", lambda icon, item: self.toggle_pause()),
+                pystray.MenuItem("停止任务", lambda icon, item: self.stop_task()),
+                pystray.MenuItem("退出", lambda icon, item: self.tray_exit()),
             )
 
-            self.tray_icon = Icon("AutoClicker", img, f"AutoClicker {VERSION}", menu)
+            self.tray_icon = pystray.Icon(
+                "AutoClicker", img, f"AutoClicker {VERSION}", menu
+            )
 
             # 隐藏窗口
             self.root.withdraw()
@@ -2991,7 +3609,7 @@ class AutoClickerApp:
                 try:
                     self.tray_icon.run()
                 except Exception as e:
-                    log(f"托盘图标运行异常: {e}")
+                    log_error(f"托盘图标运行异常: {e}")
 
             self.tray_thread = threading.Thread(target=tray_run, daemon=True)
             self.tray_thread.start()
@@ -3015,7 +3633,7 @@ class AutoClickerApp:
             self.tray_running = False
             self.add_progress_text("从托盘恢复窗口")
         except Exception as e:
-            log(f"从托盘恢复失败: {e}")
+            log_error(f"从托盘恢复失败: {e}")
 
     def tray_exit(self):
         try:
@@ -3029,181 +3647,76 @@ class AutoClickerApp:
             self.tray_running = False
             self.root.quit()
             log("通过托盘退出程序")
+            flush_log()
         except Exception as e:
-            log(f"托盘退出异常: {e}")
+            log_error(f"托盘退出异常: {e}")
 
     # ---------------- Update check ----------------
     def check_update(self, auto_check=True):
-        """检查更新 - 支持多个备用源和重试机制
+        """检查更新：所有备用源并发请求，结果缓存 UPDATE_CACHE_TTL 秒
         auto_check: True表示自动检查（后台），False表示手动检查（显示对话框）
         """
-        if not HAVE_REQUESTS:
-            if not auto_check:  # 只有手动检查时才显示警告
-                self.root.after(
-                    0,
-                    lambda: messagebox.showwarning(
-                        "检查更新",
-                        "需要 requests 库才能检查更新。\n请运行: pip install requests",
-                    ),
-                )
-            return
-
         if not UPDATE_CHECK_URLS:
             return
 
         # 显示检查中的状态
-        self.status_bar.config(text="正在检查更新...")
+        self.root.after(0, lambda: self.status_bar.config(text="正在检查更新..."))
         if not auto_check:
-            self.add_progress_text("开始检查更新，使用多个备用源...")
+            self.add_progress_text("开始检查更新，同时请求所有备用源...")
 
         def check_with_feedback():
-            success = False
-            last_error = ""
-            update_available = False
-            update_info = {}
-
-            for url_index, url in enumerate(UPDATE_CHECK_URLS):
-                for attempt in range(2):  # 每个URL尝试2次
-                    try:
-                        # 显示当前尝试信息
-                        source_name = "GitHub" if "github" in url else "CDN"
-                        attempt_info = f"尝试从 {source_name} 检查更新"
-                        if attempt > 0:
-                            attempt_info += f" (重试 {attempt})"
-
-                        if not auto_check:
-                            self.add_progress_text(attempt_info)
-
-                        # 重试延迟
-                        if attempt > 0:
-                            time.sleep(2)  # 重试前等待2秒
-
-                        # 发送请求
-                        resp = requests.get(url, timeout=15)
-
-                        if resp.status_code == 200:
-                            data = resp.json()
-                            remote_version = data.get("version")
-                            download_url = data.get("download_url") or data.get("url")
-                            changelog = data.get("changelog", "")
-                            release_notes = data.get("release_notes", "")
-
-                            if remote_version and self.is_newer_version(
-                                remote_version, VERSION
-                            ):
-                                update_available = True
-                                update_info = {
-                                    "version": remote_version,
-                                    "download_url": download_url,
-                                    "changelog": changelog,
-                                    "release_notes": release_notes,
-                                }
-                                if not auto_check:
-
-                                    def notify():
-                                        update_msg = f"发现新版本 {remote_version}！\n\n当前版本: {VERSION}"
-
-                                        if changelog:
-                                            update_msg += f"\n\n更新内容:\n{changelog}"
-                                        if release_notes:
-                                            update_msg += (
-                                                f"\n\n发布说明:\n{release_notes}"
-                                            )
-
-                                        update_msg += "\n\n是否打开下载页面？"
-
-                                        if messagebox.askyesno(
-                                            "检测到新版本", update_msg
-                                        ):
-                                            self.open_download_page(
-                                                download_url
-                                                or "https://github.com/MGHYGitHub/AutoClicker/releases"
-                                            )
-
-                                    self.root.after(0, notify)
-                                if auto_check:
-                                    self.add_progress_text(
-                                        f"发现新版本: {remote_version}"
-                                    )
-                                else:
-                                    self.add_progress_text(
-                                        f"发现新版本: {remote_version}"
-                                    )
-                            else:
-                                if not auto_check:
-
-                                    def notify_up_to_date():
-                                        messagebox.showinfo(
-                                            "检查更新", f"当前已是最新版本 ({VERSION})"
-                                        )
-
-                                    self.root.after(0, notify_up_to_date)
-                                if auto_check:
-                                    self.add_progress_text("当前已是最新版本")
-                                else:
-                                    self.add_progress_text("当前已是最新版本")
-
-                            success = True
-                            if not auto_check:
-                                self.add_progress_text(
-                                    f"更新检查成功 (来源: {source_name})"
-                                )
-                            break  # 成功获取，跳出重试循环
-
-                        else:
-                            last_error = f"HTTP状态码: {resp.status_code}"
-                            log(f"更新检查失败 [{url}]，HTTP状态码: {resp.status_code}")
-
-                    except requests.exceptions.Timeout:
-                        last_error = "连接超时"
-                        log(f"更新检查超时 [{url}] (尝试 {attempt + 1})")
-
-                    except requests.exceptions.ConnectionError as e:
-                        last_error = f"连接错误: {str(e)}"
-                        log(f"更新检查连接错误 [{url}] (尝试 {attempt + 1}): {e}")
-
-                    except requests.exceptions.JSONDecodeError as e:
-                        last_error = "响应数据格式错误"
-                        log(f"更新检查JSON解析错误 [{url}]: {e}")
-
-                    except Exception as e:
-                        last_error = f"未知错误: {str(e)}"
-                        log(f"更新检查失败 [{url}] (尝试 {attempt + 1}): {e}")
-
-                if success:
-                    break  # 成功获取，跳出URL循环
+            # 手动检查忽略缓存有效期（仍带 ETag，未变化时服务器只返回 304）
+            result = fetch_update_info(UPDATE_CHECK_URLS, force=not auto_check)
 
             # 更新状态栏
             self.root.after(0, lambda: self.status_bar.config(text="就绪"))
 
-            # 自动检查时发现新版本，显示通知但不阻塞
-            if auto_check and update_available:
-
-                def show_update_notification():
-                    update_msg = (
-                        f"发现新版本 {update_info['version']}！\n\n当前版本: {VERSION}"
+            if result.data is None:
+                log_warning(f"更新检查失败: {result.error}")
+                if not auto_check:
+                    self.root.after(
+                        0, lambda: self.show_update_failed_message(result.error)
                     )
+                    self.add_progress_text(f"更新检查失败: {result.error}")
+                return
 
-                    if update_info["changelog"]:
-                        update_msg += f"\n\n更新内容:\n{update_info['changelog']}"
-                    if update_info["release_notes"]:
-                        update_msg += f"\n\n发布说明:\n{update_info['release_notes']}"
-
-                    update_msg += "\n\n是否打开下载页面？"
+            data = result.data
+            if not auto_check:
+                source_name = "GitHub" if "github" in (result.source or "") else "CDN"
+                note = "（内容未变化，使用缓存）" if result.cached else ""
+                self.add_progress_text(f"更新检查成功 (来源: {source_name}){note}")
 
-                    # 使用askyesno会阻塞，但我们希望用户能看到通知
-                    if messagebox.askyesno("检测到新版本", update_msg):
-                        self.open_download_page(
-                            update_info["download_url"]
-                            or "https://github.com/MGHYGitHub/AutoClicker/releases"
-                        )
+            remote_version = data.get("version")
+            if not is_newer_version(remote_version, VERSION):
+                self.add_progress_text("当前已是最新版本")
+                if not auto_check:
+                    self.root.after(
+                        0,
+                        lambda: messagebox.showinfo(
+                            "检查更新", f"当前已是最新版本 ({VERSION})"
+                        ),
+                    )
+                return
 
-                self.root.after(0, show_update_notification)
+            self.add_progress_text(f"发现新版本: {remote_version}")
+            download_url = data.get("download_url") or data.get("url")
+            changelog = data.get("changelog", "")
+            release_notes = data.get("release_notes", "")
+
+            def notify():
+                update_msg = f"发现新版本 {remote_version}！\n\n当前版本: {VERSION}"
+                if changelog:
+                    update_msg += f"\n\n更新内容:\n{changelog}"
+                if release_notes:
+                    update_msg += f"\n\n发布说明:\n{release_notes}"
+                update_msg += "\n\n是否打开下载页面？"
+                if messagebox.askyesno("检测到新版本", update_msg):
+                    self.open_download_page(
+                        download_url
+                        or "https://github.com/MGHYGitHub/AutoClicker/releases"
+                    )
 
-            # 所有尝试都失败
-            if not success and not auto_check:
-                self.root.after(0, lambda: self.show_update_failed_message(last_error))
-                self.add_progress_text(f"更新检查失败: {last_error}")
+            self.root.after(0, notify)
 
         # 在后台线程中执行检查
         threading.Thread(target=check_with_feedback, daemon=True).start()
@@ -3240,34 +3753,8 @@ class AutoClickerApp:
             )
 
     def is_newer_version(self, remote, current):
-        """增强版版本号比较"""
-        try:
-            # 处理版本号中的非数字字符（如 "v2.5.3" -> "2.5.3"）
-            remote = remote.lstrip("vV")
-            current = current.lstrip("vV")
-
-            # 分割版本号
-            remote_parts = list(map(int, remote.split(".")))
-            current_parts = list(map(int, current.split(".")))
-
-            # 确保长度一致
-            max_len = max(len(remote_parts), len(current_parts))
-            remote_parts.extend([0] * (max_len - len(remote_parts)))
-            current_parts.extend([0] * (max_len - len(current_parts)))
-
-            # 逐个比较
-            for r, c in zip(remote_parts, current_parts):
-                if r > c:
-                    return True
-                elif r < c:
-                    return False
-            return False  # 版本相同
-        except:
-            # 如果解析失败，使用简单的字符串比较
-            try:
-                return remote > current
-            except:
-                return False
+        """版本号比较（见 autoclicker.updates.is_newer_version）"""
+        return is_newer_version(remote, current)
 
     def open_download_page(self, url):
         """打开下载页面"""
@@ -3289,13 +3776,6 @@ class AutoClickerApp:
                 self.show_github_update_help()
             return
 
-        if not HAVE_REQUESTS:
-            messagebox.showwarning(
-                "缺少依赖",
-                "需要 requests 库才能检查更新。\n\n请运行以下命令安装:\npip install requests",
-            )
-            return
-
         # 提供选项让用户选择
         choice = messagebox.askyesnocancel(
             "检查更新",
@@ -3361,34 +3841,8 @@ class AutoClickerApp:
         messagebox.showinfo("GitHub 更新配置说明", help_text)
 
     def is_newer_version(self, remote, current):
-        """增强版版本号比较"""
-        try:
-            # 处理版本号中的非数字字符（如 "v2.5.3" -> "2.5.3"）
-            remote = remote.lstrip("vV")
-            current = current.lstrip("vV")
-
-            # 分割版本号
-            remote_parts = list(map(int, remote.split(".")))
-            current_parts = list(map(int, current.split(".")))
-
-            # 确保长度一致
-            max_len = max(len(remote_parts), len(current_parts))
-            remote_parts.extend([0] * (max_len - len(remote_parts)))
-            current_parts.extend([0] * (max_len - len(current_parts)))
-
-            # 逐个比较
-            for r, c in zip(remote_parts, current_parts):
-                if r > c:
-                    return True
-                elif r < c:
-                    return False
-            return False  # 版本相同
-        except:
-            # 如果解析失败，使用简单的字符串比较
-            try:
-                return remote > current
-            except:
-                return False
+        """版本号比较（见 autoclicker.updates.is_newer_version）"""
+        return is_newer_version(remote, current)
 
     def open_download_page(self, url):
         """打开下载页面"""
@@ -3410,13 +3864,6 @@ class AutoClickerApp:
                 self.show_github_update_help()
             return
 
-        if not HAVE_REQUESTS:
-            messagebox.showwarning(
-                "缺少依赖",
-                "需要 requests 库才能检查更新。\n\n请运行以下命令安装:\npip install requests",
-            )
-            return
-
         # 提供选项让用户选择
         choice = messagebox.askyesnocancel(
             "检查更新",
@@ -3455,13 +3902,20 @@ class AutoClickerApp:
                 return
         # set stop
         self.stop_event.set()
-        # save current points
+        if self.multi_scheduler is not None:
+            self.multi_scheduler.close()
+        if self.recorder is not None and self.recorder.recording:
+            self.mouse_sampler.stop()
+            self.recorder.stop()
+        self.safety_monitor.close()
+        self.save_app_settings()
+        # save current points（只有未保存的修改时才写盘）
         try:
-            with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.click_points, f, ensure_ascii=False, indent=2)
-        except Exception:
-            pass
+            self.autosaver.close()
+        except Exception as e:
+            log_error(f"退出时保存点位失败: {e}")
         log("程序退出")
+        flush_log()
         try:
             if self.tray_icon:
                 try:
@@ -3472,6 +3926,127 @@ class AutoClickerApp:
             pass
         self.root.destroy()
 
+    def apply_log_level(self):
+        level = set_log_level(self.log_level_var.get())
+        self.log_level_var.set(level)
+        log(f"日志级别切换为 {level}")
+        self.save_app_settings()
+
+    def save_app_settings(self):
+        """把界面上的程序设置写回 autoclicker_settings.json"""
+        self.app_settings["input_backend"] = self.input_backend_var.get()
+        self.app_settings["log_level"] = get_log_level()
+        try:
+            save_settings(self.app_settings)
+        except Exception as e:
+            log_error(f"保存程序设置失败: {e}")
+
+    # ---------------- Multi-profile ----------------
+    def show_multi_profile(self):
+        if self.multi_window is None:
+            self.multi_window = MultiProfileWindow(self.root, self)
+        self.multi_window.show()
+
+    def add_multi_profile(self, name, points, priority, loop_count):
+        """编译点位并加入并发调度；调度器和输入后端在第一次添加时创建"""
+        if self.is_running:
+            messagebox.showinfo("提示", "单任务正在运行，请先停止")
+            return None
+        if self.recorder is not None and self.recorder.recording:
+            messagebox.showinfo("提示", "正在录制宏，请先按 F9 停止录制")
+            return None
+        if any(p.get("action_type") in FLOW_ACTIONS for p in points):
+            messagebox.showwarning(
+                "提示", f"配置 {name} 含流程控制点位，不支持并发运行"
+            )
+            return None
+        if any(p.get("action_type") in SCREEN_ACTIONS for p in points):
+            messagebox.showwarning(
+                "提示", f"配置 {name} 含图像点位或等待条件，不支持并发运行"
+            )
+            return None
+        # 输入后端和忙等窗口在创建调度器时确定；设置变化后，调度器空闲时重建
+        settings = (
+            self.input_backend_var.get() or DEFAULT_BACKEND,
+            safe_float(self.spin_window_ms_var.get(), SPIN_WINDOW * 1000) / 1000.0,
+        )
+        scheduler = self.multi_scheduler
+        if scheduler is not None and settings != self._multi_settings:
+            if scheduler.active:
+                self.add_progress_text(
+                    "输入后端或忙等窗口已修改，将在当前所有配置结束后生效"
+                )
+            else:
+                scheduler.close()
+                self.multi_scheduler = None
+        if self.multi_scheduler is None:
+            backend = self._create_input_backend()
+            if backend is None:
+                return None
+            self.multi_scheduler = MultiProfileScheduler(
+                backend,
+                pause_event=self.pause_event,
+                spin_window=settings[1],
+                on_finished=self._on_multi_profile_finished,
+            )
+            self._multi_settings = settings
+            self.add_progress_text(f"多配置输入后端: {backend.label}")
+        plan = compile_plan(
+            points,
+            loop_count,
+            safe_int(self.random_offset_var.get(), 0),
+            safe_float(self.random_delay_var.get(), 0.0),
+            speed=safe_float(self.speed_var.get(), 1.0),
+        )
+        geometry = None
+        if plan.rel_index:
+            # 调度线程每轮循环重新换算；标题在界面线程中取好
+            if self._target_client_rect() is None:
+                messagebox.showwarning(
+                    "警告", f"配置 {name} 使用窗口相对坐标，请先选择目标窗口"
+                )
+                return None
+            title = self.window_title_var.get().strip()
+            geometry = lambda: self._target_client_rect(title)
+        profile = Profile(
+            name,
+            plan,
+            priority=priority,
+            listener=ProfileListener(self, name),
+            loop_delay=max(0.0, safe_float(self.loop_delay_var.get(), LOOP_DELAY)),
+            points=[dict(p) for p in points],
+            geometry=geometry,
+        )
+        if not self.multi_scheduler.active:
+            self.pause_event.clear()
+            self.safety_monitor.activate()
+        self.multi_scheduler.add(profile)
+        return profile
+
+    def _on_multi_profile_finished(self, profile):
+        """调度线程中调用：写入该配置的执行报告，全部结束后停止安全监测"""
+        try:
+            record = build_run_report(
+                profile.stats.snapshot(points=True),
+                profile.points,
+                params={
+                    "backend": profile.scheduler.backend.name,
+                    "profile": profile.name,
+                    "priority": profile.priority,
+                    "loops": profile.plan.loop_count,
+                    "random_offset": profile.plan.offset_px,
+                    "random_delay": profile.plan.rand_delay,
+                    "speed": profile.plan.speed,
+                },
+                version=VERSION,
+                completed=profile.state == STATE_DONE,
+            )
+            append_report(record)
+        except Exception as e:
+            log_error(f"写入报告失败: {e}")
+        if not self.multi_scheduler.active:
+            self.safety_monitor.deactivate()
+
     # ---------------- Keyboard safe wrapper for start/stop used by tray ----------------
     def start_task_wrapper(self):
         # used by tray menu (non-UI thread) - schedule on main thread
@@ -3707,13 +4282,12 @@ class AutoClickerApp:
             return
 
         try:
-            import win32gui
-            import win32con
+            provider = self._get_window_index().provider
 
             # 获取当前活动窗口
-            hwnd = win32gui.GetForegroundWindow()
+            hwnd = provider.foreground()
             if hwnd:
-                window_title = win32gui.GetWindowText(hwnd)
+                window_title = provider.title(hwnd)
                 if window_title:
                     self.window_title_var.set(window_title)
                     self.window_handle = hwnd
@@ -3733,7 +4307,7 @@ class AutoClickerApp:
 
         except Exception as e:
             messagebox.showerror("错误", f"获取窗口信息失败: {e}")
-            log(f"获取窗口失败: {e}")
+            log_error(f"获取窗口失败: {e}")
 
     def clear_target_window(self):
         """清除目标窗口设置"""
@@ -3759,62 +4333,101 @@ class AutoClickerApp:
         except Exception as e:
             messagebox.showerror("错误", f"窗口切换测试失败: {e}")
 
+    def _get_window_index(self):
+        """创建窗口索引（导入 pywin32）；不可用时返回 None"""
+        if self.window_index is None:
+            if not self.HAVE_WIN32:
+                return None
+            provider = create_window_provider()
+            if provider is None:
+                return None
+            self.window_index = WindowIndex(provider)
+        return self.window_index
+
+    def _capture_coord_mode(self):
+        label = self.coord_mode_var.get()
+        for mode, text in COORD_MODE_LABELS.items():
+            if text == label:
+                return mode
+        return "absolute"
+
+    @staticmethod
+    def _uses_window_coords(points):
+        return any(
+            p.get("coord_mode", "absolute") != "absolute"
+            and p.get("action_type", "click") != "keyboard"
+            for p in points
+        )
+
+    def _target_client_rect(self, title=None):
+        """目标窗口客户区 (left, top, width, height)；没有目标窗口时返回 None
+        （引擎线程每轮循环调用一次，窗口未移动时只读取一次窗口外框；
+        引擎线程调用时传入启动时取好的 title，不读取 Tk 变量）"""
+        if title is None:
+            title = self.window_title_var.get().strip()
+        try:
+            index = self._get_window_index()
+            if index is None:
+                return None
+            provider = index.provider
+            with self._window_lock:
+                hwnd = self.window_handle
+                if not (hwnd and provider.is_window(hwnd)):
+                    hwnd = index.find(title) if title else None
+                    if hwnd is None:
+                        return None
+                    self.window_handle = hwnd
+                geometry = self._window_geometry
+                if geometry is None or geometry.hwnd != hwnd:
+                    geometry = self._window_geometry = WindowGeometry(provider, hwnd)
+            rect = geometry.client_rect()
+            if rect is None:
+                index.invalidate(hwnd)
+            return rect
+        except Exception as e:
+            log_error(f"获取目标窗口位置失败: {e}")
+            return None
+
     def switch_to_target_window(self):
-        """切换到目标窗口"""
-        if not self.HAVE_WIN32:  # 添加这行检查
+        """切换到目标窗口，确认其成为前台窗口后返回 True"""
+        try:
+            index = self._get_window_index()
+        except Exception as e:
+            log_error(f"切换窗口失败: {e}")
+            return False
+        if index is None:
             log("pywin32 库未安装，无法切换窗口")
             return False
+        provider = index.provider
 
         try:
-            import win32gui
-            import win32con
-            import time
-
             target_title = self.window_title_var.get().strip()
             if not target_title and not self.window_handle:
                 log("未设置目标窗口")
                 return False
 
-            def window_enum_handler(hwnd, ctx):
-                if win32gui.IsWindowVisible(hwnd):
-                    title = win32gui.GetWindowText(hwnd)
-                    if target_title.lower() in title.lower():
-                        ctx.append(hwnd)
-
-            # 如果已有句柄，直接使用
-            if self.window_handle and win32gui.IsWindow(self.window_handle):
-                hwnd = self.window_handle
-            else:
-                # 通过标题查找窗口
-                windows = []
-                win32gui.EnumWindows(window_enum_handler, windows)
-
-                if not windows:
+            # 如果已有句柄且仍有效，直接使用；否则按标题查索引
+            hwnd = self.window_handle
+            if not (hwnd and provider.is_window(hwnd)):
+                hwnd = index.find(target_title) if target_title else None
+                if hwnd is None:
                     log(f"未找到包含 '{target_title}' 的窗口")
                     return False
-
-                hwnd = windows[0]
                 self.window_handle = hwnd
 
-            # 激活窗口
-            win32gui.ShowWindow(hwnd, win32con.SW_RESTORE)
-            win32gui.SetForegroundWindow(hwnd)
-
-            # 等待窗口激活
-            time.sleep(0.5)
+            # 激活窗口并等待其真正成为前台窗口
+            if not activate_window(provider, hwnd):
+                # 句柄可能已失效或激活被系统拒绝，下次重新查找
+                index.invalidate(hwnd)
+                self.window_handle = None
+                log_warning(f"切换窗口超时: {provider.title(hwnd)}")
+                return False
 
-            log(f"成功切换到窗口: {win32gui.GetWindowText(hwnd)}")
+            log(f"成功切换到窗口: {provider.title(hwnd)}")
             return True
 
         except Exception as e:
-            log(f"切换窗口失败: {e}")
-            return False
-
-        except ImportError:
-            log("pywin32 库未安装，无法切换窗口")
-            return False
-        except Exception as e:
-            log(f"切换窗口失败: {e}")
+            log_error(f"切换窗口失败: {e}")
             return False
 
     def ensure_target_window_active(self):
@@ -3978,20 +4591,12 @@ class AutoClickerApp:
             return
 
         try:
-            import win32gui
-
-            windows = []
-
-            def enum_windows_callback(hwnd, ctx):
-                if win32gui.IsWindowVisible(hwnd):
-                    title = win32gui.GetWindowText(hwnd)
-                    if title:  # 只显示有标题的窗口
-                        class_name = win32gui.GetClassName(hwnd)
-                        # 过滤掉一些系统窗口
-                        if class_name not in ["Progman", "WorkerW", "Shell_TrayWnd"]:
-                            windows.append((title, hwnd))
-
-            win32gui.EnumWindows(enum_windows_callback, None)
+            # 只显示有标题的窗口，并过滤掉一些系统窗口
+            windows = [
+                (info.title, info.hwnd)
+                for info in self._get_window_index().refresh()
+                if info.title and info.class_name not in SYSTEM_WINDOW_CLASSES
+            ]
 
             # 更新组合框
             window_titles = [f"{title} (句柄: {hwnd})" for title, hwnd in windows]
@@ -4006,7 +4611,7 @@ class AutoClickerApp:
 
         except Exception as e:
             messagebox.showerror("错误", f"刷新窗口列表失败: {e}")
-            log(f"刷新窗口列表失败: {e}")
+            log_error(f"刷新窗口列表失败: {e}")
 
     def show_all_windows(self):
         """显示所有窗口的详细信息"""
@@ -4015,26 +4620,16 @@ class AutoClickerApp:
             return
 
         try:
-            import win32gui
-
-            windows_info = []
-
-            def enum_windows_callback(hwnd, ctx):
-                if win32gui.IsWindowVisible(hwnd):
-                    title = win32gui.GetWindowText(hwnd)
-                    class_name = win32gui.GetClassName(hwnd)
-                    rect = win32gui.GetWindowRect(hwnd)
-                    windows_info.append(
-                        {
-                            "hwnd": hwnd,
-                            "title": title,
-                            "class": class_name,
-                            "rect": rect,
-                            "size": f"{rect[2]-rect[0]}x{rect[3]-rect[1]}",
-                        }
-                    )
-
-            win32gui.EnumWindows(enum_windows_callback, None)
+            windows_info = [
+                {
+                    "hwnd": info.hwnd,
+                    "title": info.title,
+                    "class": info.class_name,
+                    "rect": info.rect,
+                    "size": f"{info.rect[2]-info.rect[0]}x{info.rect[3]-info.rect[1]}",
+                }
+                for info in self._get_window_index().refresh()
+            ]
 
             # 创建窗口列表对话框
             self.show_window_list_dialog(windows_info)
@@ -4253,12 +4848,13 @@ class AutoClickerApp:
                 print(f"尝试加载图标: {icon_path}")
                 if os.path.exists(icon_path):
                     try:
-                        # 使用PIL加载图像
-                        from PIL import Image, ImageTk
+                        # Tk 8.6 可直接读取 PNG，避免启动时导入 PIL
+                        try:
+                            photo = tk.PhotoImage(file=icon_path)
+                        except tk.TclError:
+                            from PIL import Image, ImageTk
 
-                        img = Image.open(icon_path)
-                        # 转换为PhotoImage
-                        photo = ImageTk.PhotoImage(img)
+                            photo = ImageTk.PhotoImage(Image.open(icon_path))
                         # 设置窗口图标
                         self.root.iconphoto(True, photo)
                         # 保存引用防止垃圾回收
@@ -4714,10 +5310,14 @@ class EditPointDialog:
             fg=colors["text"],
         ).pack(side=tk.LEFT)
         self.action_type_var = tk.StringVar(value=action_type)
+        action_types = ["click", "keyboard"]
+        if action_type in SCREEN_ACTIONS:
+            # 模板和等待条件不在对话框中编辑，只有原本就是这两种类型时才可选
+            action_types.append(action_type)
         action_combo = ttk.Combobox(
             action_frame,
             textvariable=self.action_type_var,
-            values=["click", "keyboard"],
+            values=action_types,
             state="readonly",
             width=10,
             style="Modern.TCombobox",
@@ -4865,9 +5465,12 @@ class EditPointDialog:
         """操作类型改变时更新界面"""
         action_type = self.action_type_var.get()
 
-        if action_type == "click":
+        if action_type in ("click", "find_and_click"):
             self.click_frame.pack(fill=tk.X, pady=4)
             self.keyboard_frame.pack_forget()
+        elif action_type == "wait":
+            self.click_frame.pack_forget()
+            self.keyboard_frame.pack_forget()
         else:  # keyboard
             self.click_frame.pack_forget()
             self.keyboard_frame.pack(fill=tk.X, pady=4)
@@ -4895,7 +5498,7 @@ class EditPointDialog:
             messagebox.showerror("错误", "请输入有效点击间隔")
             return
 
-        if action_type == "click":
+        if action_type in ("click", "find_and_click"):
             nbutton = self.button_var.get()
             try:
                 nclick_count = int(self.click_count_entry.get())
@@ -4903,6 +5506,10 @@ class EditPointDialog:
                 messagebox.showerror("错误", "请输入有效点击次数")
                 return
             nkeys = ""
+        elif action_type == "wait":
+            nbutton = self.button_var.get()
+            nclick_count = 1
+            nkeys = ""
         else:  # keyboard
             nbutton = "keyboard"
             nclick_count = 1
@@ -4928,7 +5535,337 @@ class EditPointDialog:
         self.top.destroy()
 
 
+class FlowPointDialog:
+    """添加/编辑流程控制点位；result 为点位的流程字段 dict"""
+
+    def __init__(self, parent, labels=(), point=None, theme="light"):
+        self.top = tk.Toplevel(parent)
+        self.top.title("编辑流程控制" if point else "添加流程控制")
+        self.top.resizable(False, False)
+        self.top.transient(parent)
+        self.top.grab_set()
+        self.result = None
+        point = point or {}
+        colors = ModernStyles.get_theme(theme)
+        self.top.configure(bg=colors["bg"])
+        self.top.geometry(
+            "+%d+%d" % (parent.winfo_rootx() + 50, parent.winfo_rooty() + 50)
+        )
+
+        main_frame = GlassFrame(self.top)
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=12, pady=12)
+        main_frame.apply_glass_effect(theme)
+
+        def row(text):
+            frame = tk.Frame(main_frame, bg=colors["card_bg"])
+            tk.Label(
+                frame,
+                text=text,
+                width=10,
+                anchor="w",
+                bg=colors["card_bg"],
+                fg=colors["text"],
+            ).pack(side=tk.LEFT)
+            return frame
+
+        self.type_frame = row("类型:")
+        self.type_frame.pack(fill=tk.X, pady=4)
+        self.type_var = tk.StringVar(
+            value=FLOW_ACTION_LABELS[point.get("action_type", "label")]
+        )
+        type_combo = ttk.Combobox(
+            self.type_frame,
+            textvariable=self.type_var,
+            values=list(FLOW_ACTION_LABELS.values()),
+            state="readonly",
+            width=12,
+        )
+        type_combo.pack(side=tk.LEFT)
+        type_combo.bind("<<ComboboxSelected>>", self.on_type_change)
+
+        # 标签名（label）或跳转目标（其他类型），目标可从已有标签中选择
+        self.ref_frame = row("标签:")
+        self.ref_label = self.ref_frame.winfo_children()[0]
+        self.ref_var = tk.StringVar(
+            value=point.get("label") or point.get("target") or ""
+        )
+        ttk.Combobox(
+            self.ref_frame, textvariable=self.ref_var, values=list(labels), width=16
+        ).pack(side=tk.LEFT)
+
+        self.count_frame = row("执行次数:")
+        self.count_var = tk.IntVar(value=point.get("count", 2))
+        tk.Spinbox(
+            self.count_frame, from_=1, to=999999, textvariable=self.count_var, width=8
+        ).pack(side=tk.LEFT)
+
+        self.when_frame = row("跳转条件:")
+        self.when_var = tk.StringVar(
+            value=BRANCH_CONDITION_LABELS[point.get("when", "fail")]
+        )
+        ttk.Combobox(
+            self.when_frame,
+            textvariable=self.when_var,
+            values=list(BRANCH_CONDITION_LABELS.values()),
+            state="readonly",
+            width=18,
+        ).pack(side=tk.LEFT)
+
+        self.btn_frame = tk.Frame(main_frame, bg=colors["card_bg"])
+        self.btn_frame.pack(fill=tk.X, pady=(8, 0), side=tk.BOTTOM)
+        ok_btn = ModernButton(
+            self.btn_frame,
+            text="确定",
+            command=self.on_ok,
+            button_type="primary",
+            width=8,
+        )
+        ok_btn.pack(side=tk.RIGHT, padx=(6, 0))
+        ok_btn.apply_theme(theme)
+        cancel_btn = ModernButton(
+            self.btn_frame,
+            text="取消",
+            command=self.top.destroy,
+            button_type="secondary",
+            width=8,
+        )
+        cancel_btn.pack(side=tk.RIGHT)
+        cancel_btn.apply_theme(theme)
+
+        self.on_type_change()
+
+    def _action_type(self):
+        text = self.type_var.get()
+        for action_type, label in FLOW_ACTION_LABELS.items():
+            if label == text:
+                return action_type
+        return "label"
+
+    def on_type_change(self, event=None):
+        action_type = self._action_type()
+        for frame in (self.ref_frame, self.count_frame, self.when_frame):
+            frame.pack_forget()
+        if action_type not in ("return", "end"):
+            self.ref_label.config(
+                text="标签:" if action_type == "label" else "目标标签:"
+            )
+            self.ref_frame.pack(fill=tk.X, pady=4)
+        if action_type == "loop":
+            self.count_frame.pack(fill=tk.X, pady=4)
+        elif action_type == "branch":
+            self.when_frame.pack(fill=tk.X, pady=4)
+
+    def on_ok(self):
+        action_type = self._action_type()
+        fields = {"action_type": action_type}
+        ref = self.ref_var.get().strip()
+        if action_type not in ("return", "end"):
+            if not ref:
+                messagebox.showerror("错误", "请输入标签名", parent=self.top)
+                return
+            fields["label" if action_type == "label" else "target"] = ref
+        if action_type == "loop":
+            try:
+                count = int(self.count_var.get())
+                if count < 1:
+                    raise ValueError
+            except (tk.TclError, ValueError):
+                messagebox.showerror("错误", "执行次数应为正整数", parent=self.top)
+                return
+            fields["count"] = count
+        elif action_type == "branch":
+            fields["when"] = next(
+                k
+                for k, v in BRANCH_CONDITION_LABELS.items()
+                if v == self.when_var.get()
+            )
+        self.result = fields
+        self.top.destroy()
+
+
 # ------------- Task Settings Window -------------
+class MultiProfileWindow:
+    """多配置并发运行：每个配置有自己的优先级、暂停/停止和统计"""
+
+    REFRESH_MS = 500
+    COLUMNS = (
+        ("name", "配置", 160),
+        ("priority", "优先级", 60),
+        ("state", "状态", 70),
+        ("progress", "进度", 90),
+        ("ok", "成功", 60),
+        ("failed", "失败", 60),
+        ("lateness", "迟到 p99", 80),
+    )
+
+    def __init__(self, parent, main_app):
+        self.parent = parent
+        self.main_app = main_app
+        self.window = None
+        self.tree = None
+        self.profiles = {}  # tree item -> Profile
+        self.priority_var = tk.IntVar(value=DEFAULT_PRIORITY)
+        self.loop_var = tk.IntVar(value=1)
+
+    def show(self):
+        if self.window and self.window.winfo_exists():
+            self.window.lift()
+            return
+
+        theme = self.main_app.theme_var.get()
+        colors = ModernStyles.get_theme(theme)
+        self.window = tk.Toplevel(self.parent)
+        self.window.title("多配置并发运行")
+        self.window.geometry("720x460")
+        self.window.configure(bg=colors["bg"])
+        self.window.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        main_frame = GlassFrame(self.window)
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        main_frame.apply_glass_effect(theme)
+
+        # 新配置的参数
+        option_frame = tk.Frame(main_frame, bg=colors["card_bg"])
+        option_frame.pack(fill=tk.X, pady=(0, 8))
+        tk.Label(
+            option_frame,
+            text="优先级(1 最高):",
+            bg=colors["card_bg"],
+            fg=colors["text"],
+        ).pack(side=tk.LEFT)
+        tk.Spinbox(
+            option_frame, from_=1, to=9, textvariable=self.priority_var, width=4
+        ).pack(side=tk.LEFT, padx=5)
+        tk.Label(
+            option_frame, text="循环次数:", bg=colors["card_bg"], fg=colors["text"]
+        ).pack(side=tk.LEFT, padx=(10, 0))
+        tk.Spinbox(
+            option_frame, from_=1, to=99999, textvariable=self.loop_var, width=8
+        ).pack(side=tk.LEFT, padx=5)
+
+        # 配置列表
+        tree_frame = tk.Frame(main_frame, bg=colors["card_bg"])
+        tree_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 8))
+        self.tree = ttk.Treeview(
+            tree_frame,
+            columns=[c[0] for c in self.COLUMNS],
+            show="headings",
+            height=10,
+        )
+        for key, title, width in self.COLUMNS:
+            self.tree.heading(key, text=title)
+            self.tree.column(key, width=width)
+        scrollbar = ttk.Scrollbar(
+            tree_frame, orient=tk.VERTICAL, command=self.tree.yview
+        )
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.profiles = {}
+        scheduler = self.main_app.multi_scheduler
+        if scheduler is not None:
+            for profile in scheduler.profiles:
+                self._insert(profile)
+
+        btn_frame = tk.Frame(main_frame, bg=colors["card_bg"])
+        btn_frame.pack(fill=tk.X)
+        buttons = (
+            ("添加配置文件...", self.add_from_file, "primary"),
+            ("添加当前点位", self.add_current, "secondary"),
+            ("暂停/继续", self.toggle_pause, "secondary"),
+            ("停止", self.stop_selected, "secondary"),
+            ("全部停止", self.stop_all, "secondary"),
+        )
+        for text, command, button_type in buttons:
+            btn = ModernButton(
+                btn_frame, text=text, command=command, button_type=button_type
+            )
+            btn.pack(side=tk.LEFT, padx=(0, 8))
+            btn.apply_theme(theme)
+
+        self.refresh()
+
+    def on_close(self):
+        # 关闭窗口不影响正在运行的配置
+        if self.window:
+            self.window.destroy()
+            self.window = None
+
+    def _insert(self, profile):
+        item = self.tree.insert("", tk.END, values=self._row(profile))
+        self.profiles[item] = profile
+
+    def _row(self, profile):
+        s = profile.stats.snapshot()
+        lateness = s["histograms"]["lateness"]
+        p99 = f"{lateness['p99_ms']:.2f} ms" if lateness.get("count") else "-"
+        return (
+            profile.name,
+            profile.priority,
+            STATE_LABELS.get(profile.state, profile.state),
+            f"{profile.done_ops}/{profile.plan.total_ops}",
+            s["successful_clicks"],
+            s["failed_clicks"],
+            p99,
+        )
+
+    def refresh(self):
+        if not (self.window and self.window.winfo_exists()):
+            return
+        for item, profile in self.profiles.items():
+            self.tree.item(item, values=self._row(profile))
+        self.window.after(self.REFRESH_MS, self.refresh)
+
+    def _add(self, name, points):
+        if not points:
+            messagebox.showwarning("警告", "配置中没有点位", parent=self.window)
+            return
+        profile = self.main_app.add_multi_profile(
+            name,
+            points,
+            priority=safe_int(self.priority_var.get(), DEFAULT_PRIORITY),
+            loop_count=safe_int(self.loop_var.get(), 1),
+        )
+        if profile is not None:
+            self._insert(profile)
+
+    def add_from_file(self):
+        path = filedialog.askopenfilename(
+            title="选择点位配置",
+            filetypes=[("JSON 文件", "*.json"), ("所有文件", "*.*")],
+            parent=self.window,
+        )
+        if not path:
+            return
+        try:
+            points = load_points_file(path, self.main_app._point_defaults())
+        except Exception as e:
+            messagebox.showerror("错误", f"读取配置失败: {e}", parent=self.window)
+            return
+        self._add(os.path.splitext(os.path.basename(path))[0], points)
+
+    def add_current(self):
+        self._add("当前点位", [dict(p) for p in self.main_app.click_points])
+
+    def _selected(self):
+        return [self.profiles[i] for i in self.tree.selection() if i in self.profiles]
+
+    def toggle_pause(self):
+        for profile in self._selected():
+            if profile.state == STATE_RUNNING:
+                profile.pause()
+            elif profile.state == STATE_PAUSED:
+                profile.resume()
+
+    def stop_selected(self):
+        for profile in self._selected():
+            profile.stop()
+
+    def stop_all(self):
+        if self.main_app.multi_scheduler is not None:
+            self.main_app.multi_scheduler.stop_all()
+
+
 class TaskSettingsWindow:
     def __init__(self, parent, main_app):
         self.parent = parent
@@ -5080,6 +6017,94 @@ class TaskSettingsWindow:
             loop_frame, from_=1, to=99999, textvariable=self.main_app.loop_var, width=8
         ).pack(side=tk.LEFT, padx=5)
 
+        # 回放倍率
+        speed_frame = tk.Frame(basic_frame, bg=colors["card_bg"])
+        speed_frame.pack(fill=tk.X, pady=5)
+        tk.Label(
+            speed_frame, text="回放倍率:", bg=colors["card_bg"], fg=colors["text"]
+        ).pack(side=tk.LEFT)
+        tk.Spinbox(
+            speed_frame,
+            values=SPEED_PRESETS,
+            textvariable=self.main_app.speed_var,
+            width=8,
+        ).pack(side=tk.LEFT, padx=5)
+        tk.Label(
+            speed_frame,
+            text=f"{SPEED_MIN:g}x ~ {SPEED_MAX:g}x，作用于所有点位的延时和点击间隔",
+            font=("Segoe UI", 8),
+            bg=colors["card_bg"],
+            fg=colors["text_light"],
+        ).pack(side=tk.LEFT)
+
+        # 循环间隔
+        loop_delay_frame = tk.Frame(basic_frame, bg=colors["card_bg"])
+        loop_delay_frame.pack(fill=tk.X, pady=5)
+        tk.Label(
+            loop_delay_frame,
+            text="循环间隔(秒):",
+            bg=colors["card_bg"],
+            fg=colors["text"],
+        ).pack(side=tk.LEFT)
+        tk.Spinbox(
+            loop_delay_frame,
+            from_=0.0,
+            to=3600.0,
+            increment=0.1,
+            textvariable=self.main_app.loop_delay_var,
+            width=8,
+        ).pack(side=tk.LEFT, padx=5)
+
+        # 输入后端
+        backend_frame = tk.Frame(basic_frame, bg=colors["card_bg"])
+        backend_frame.pack(fill=tk.X, pady=5)
+        tk.Label(
+            backend_frame, text="输入后端:", bg=colors["card_bg"], fg=colors["text"]
+        ).pack(side=tk.LEFT)
+        backend_combo = ttk.Combobox(
+            backend_frame,
+            textvariable=self.main_app.input_backend_var,
+            values=list(BACKENDS),
+            state="readonly",
+            width=10,
+        )
+        backend_combo.pack(side=tk.LEFT, padx=5)
+        backend_combo.bind(
+            "<<ComboboxSelected>>", lambda e: self.main_app.save_app_settings()
+        )
+        tk.Label(
+            backend_frame,
+            text="pyautogui: 默认，兼容; direct: 低开销; record: 仅记录不点击",
+            font=("Segoe UI", 8),
+            bg=colors["card_bg"],
+            fg=colors["text_light"],
+        ).pack(side=tk.LEFT)
+
+        # 日志级别（立即生效）
+        log_level_frame = tk.Frame(basic_frame, bg=colors["card_bg"])
+        log_level_frame.pack(fill=tk.X, pady=5)
+        tk.Label(
+            log_level_frame, text="日志级别:", bg=colors["card_bg"], fg=colors["text"]
+        ).pack(side=tk.LEFT)
+        log_level_combo = ttk.Combobox(
+            log_level_frame,
+            textvariable=self.main_app.log_level_var,
+            values=list(LOG_LEVELS),
+            state="readonly",
+            width=10,
+        )
+        log_level_combo.pack(side=tk.LEFT, padx=5)
+        log_level_combo.bind(
+            "<<ComboboxSelected>>", lambda e: self.main_app.apply_log_level()
+        )
+        tk.Label(
+            log_level_frame,
+            text="DEBUG 记录每次点击; INFO 只记录任务事件",
+            font=("Segoe UI", 8),
+            bg=colors["card_bg"],
+            fg=colors["text_light"],
+        ).pack(side=tk.LEFT)
+
         # 随机设置区域
         random_frame = GlassFrame(parent)
         random_frame.pack(fill=tk.X, padx=10, pady=10)
@@ -5227,6 +6252,28 @@ class TaskSettingsWindow:
             width=5,
         ).pack(side=tk.LEFT)
 
+        # 调度精度
+        spin_frame = tk.Frame(options_frame, bg=colors["card_bg"])
+        spin_frame.pack(fill=tk.X, pady=2)
+        tk.Label(
+            spin_frame, text="忙等窗口(ms):", bg=colors["card_bg"], fg=colors["text"]
+        ).pack(side=tk.LEFT)
+        tk.Spinbox(
+            spin_frame,
+            from_=0.0,
+            to=20.0,
+            increment=0.5,
+            textvariable=self.main_app.spin_window_ms_var,
+            width=5,
+        ).pack(side=tk.LEFT, padx=5)
+        tk.Label(
+            spin_frame,
+            text="越大越准但更占 CPU",
+            font=("Segoe UI", 8),
+            bg=colors["card_bg"],
+            fg=colors["text_light"],
+        ).pack(side=tk.LEFT)
+
         # 窗口管理区域
         window_frame = GlassFrame(parent)
         window_frame.pack(fill=tk.X, padx=10, pady=10)
@@ -5306,6 +6353,29 @@ class TaskSettingsWindow:
             fg=colors["text"],
         ).pack(side=tk.LEFT)
 
+        # 新捕获点位的坐标模式
+        coord_mode_frame = tk.Frame(window_frame, bg=colors["card_bg"])
+        coord_mode_frame.pack(fill=tk.X, pady=5)
+        tk.Label(
+            coord_mode_frame,
+            text="捕获坐标:",
+            bg=colors["card_bg"],
+            fg=colors["text"],
+        ).pack(side=tk.LEFT)
+        ttk.Combobox(
+            coord_mode_frame,
+            textvariable=self.main_app.coord_mode_var,
+            values=list(COORD_MODE_LABELS.values()),
+            state="readonly",
+            width=12,
+        ).pack(side=tk.LEFT, padx=5)
+        tk.Label(
+            coord_mode_frame,
+            text="窗口坐标在窗口移动或缩放后仍点击相同位置",
+            bg=colors["card_bg"],
+            fg=colors["text_light"],
+        ).pack(side=tk.LEFT, padx=10)
+
         # 窗口状态显示
         self.main_app.window_status = tk.Label(
             window_frame,
@@ -5325,7 +6395,9 @@ class TaskSettingsWindow:
 
 # ---------------- Main run ----------------
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = AutoClickerApp(root)
+    enable_dpi_awareness()
+    with startup_profiler.phase("tk.Tk"):
+        root = tk.Tk()
+    app = AutoClickerApp(root, profiler=startup_profiler)
     root.protocol("WM_DELETE_WINDOW", app.on_exit)
     root.mainloop()
@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('ICON', 'ICON')],
-    hiddenimports=['pystray._win32', 'PIL._imaging', 'PIL._imagingtk', 'PIL._webp', 'win32timezone', 'win32api'],
+    hiddenimports=['pystray._win32', 'PIL._imaging', 'PIL._imagingtk', 'PIL._webp', 'win32timezone', 'win32api', 'pyautogui', 'keyboard', 'requests', 'pystray', 'PIL.Image', 'PIL.ImageDraw', 'numpy', 'win32gui', 'win32con'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""
+AutoClicker 核心组件（不依赖 tkinter）
+- logwriter: 异步批量、分级、按大小和时间轮换的日志写入
+- progress: 线程安全的进度消息环形缓冲
+- timing: 基于绝对截止时间的高精度调度
+- plan: 把点位列表编译为数组化的执行计划
+- backends: 可切换的输入后端（pyautogui / direct / record），默认 pyautogui
+- settings: 程序设置的读写
+- engine: 执行计划的点击引擎
+- multirun: 多配置共用输入设备的并发调度
+- stats: 运行计数器与延迟直方图
+- reports: JSONL 执行报告的写入、轮换与导出
+- config: 点位配置的读取与规范化
+- lazy: 可选依赖的探测与延迟导入
+- startup: 冷启动耗时测量
+- safety: 独立线程的防误触安全监测
+- windows: 窗口查找索引与前台激活（含用于测试的模拟实现）
+- autosave: 原子写入与防抖的自动保存
+- recorder: 预分配环形缓冲的宏录制与到点位的转换
+- updates: 并发镜像竞速与带缓存的条件请求更新检查
+- vision: 向量化模板匹配与按搜索区域缓存的图像定位
+- waits: 下采样哈希与自适应轮询的屏幕区域条件等待
+- bench: 无界面基准测试（python -m autoclicker.bench）
+- cli: 命令行运行器（python -m autoclicker run ...）
+"""
+
+VERSION = "2.5.3"  # 更新版本号
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+原子写入与自动保存
+- atomic_write_json(): 先写同目录下的临时文件并 fsync，再 os.replace 覆盖目标文件，
+  写到一半崩溃也不会损坏原文件；可保留 N 份轮换备份（path.1 为最新）
+- AutoSaver: 编辑时只标记脏（O(1)），停止编辑 AUTOSAVE_DELAY_MS 后在后台线程写盘；
+  连续的多次保存请求只写最后一次
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+AUTOSAVE_DELAY_MS = 2000  # 最后一次编辑后多久保存
+AUTOSAVE_BACKUPS = 3  # 保留的备份份数
+
+
+def _rotate_backups(path, backups):
+    """path.(n-1) -> path.n ... path -> path.1（path 本身保持不动）"""
+    for i in range(backups - 1, 0, -1):
+        src = f"{path}.{i}"
+        if os.path.exists(src):
+            os.replace(src, f"{path}.{i + 1}")
+    if os.path.exists(path):
+        backup = f"{path}.1"
+        try:
+            # 硬链接不复制数据；不支持时退回复制
+            if os.path.exists(backup):
+                os.remove(backup)
+            os.link(path, backup)
+        except OSError:
+            shutil.copy2(path, backup)
+
+
+def atomic_write_json(path, data, backups=0, compact=True):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            if compact:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            else:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        if backups > 0:
+            _rotate_backups(path, backups)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class AutoSaver:
+    """脏标记 + 防抖的后台保存
+
+    snapshot() 在调用线程（界面线程）中取数据快照，write(data) 在后台线程中执行；
+    after / after_cancel 为 root.after 风格的定时器接口。
+    """
+
+    def __init__(
+        self,
+        snapshot,
+        write,
+        after,
+        after_cancel,
+        delay_ms=AUTOSAVE_DELAY_MS,
+        on_error=None,
+    ):
+        self.snapshot = snapshot
+        self.write = write
+        self.after = after
+        self.after_cancel = after_cancel
+        self.delay_ms = delay_ms
+        self.on_error = on_error
+
+        self._generation = 0  # 每次编辑加一
+        self._saved_generation = 0  # 已写盘的版本
+        self._last_change = 0.0
+        self._timer = None
+
+        self._cond = threading.Condition()
+        self._pending = None  # (generation, data)，后台线程只写最新的一份
+        self._writing = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="AutoSaver", daemon=True)
+        self._thread.start()
+
+    @property
+    def dirty(self):
+        return self._generation != self._saved_generation
+
+    def mark_dirty(self):
+        self._generation += 1
+        self._last_change = time.monotonic()
+        if self._timer is None:
+            self._timer = self.after(self.delay_ms, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        # 定时器不随每次编辑重置，到期时若仍在编辑则顺延剩余时间
+        idle_ms = (time.monotonic() - self._last_change) * 1000.0
+        if idle_ms < self.delay_ms:
+            self._timer = self.after(
+                max(1, int(self.delay_ms - idle_ms)), self._on_timer
+            )
+            return
+        self.flush()
+
+    def flush(self):
+        """把当前数据交给后台线程写盘（不等待完成）"""
+        if not self.dirty:
+            return
+        data = self.snapshot()
+        with self._cond:
+            self._pending = (self._generation, data)
+            self._cond.notify()
+
+    def save_now(self):
+        """同步写盘（显式保存、退出时调用）；失败时抛出异常"""
+        if self._timer is not None:
+            self.after_cancel(self._timer)
+            self._timer = None
+        generation = self._generation
+        data = self.snapshot()
+        with self._cond:
+            # 丢弃尚未开始的后台写入，并等待正在进行的写入结束
+            self._pending = None
+            while self._writing:
+                self._cond.wait()
+            self.write(data)
+        self._saved_generation = max(self._saved_generation, generation)
+
+    def close(self):
+        """退出前调用：有未保存的修改时同步写盘，然后停止后台线程"""
+        try:
+            if self.dirty:
+                self.save_now()
+        finally:
+            with self._cond:
+                self._closed = True
+                self._cond.notify()
+            self._thread.join(timeout=2.0)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                generation, data = self._pending
+                self._pending = None
+                self._writing = True
+            try:
+                self.write(data)
+                self._saved_generation = max(self._saved_generation, generation)
+            except Exception as e:
+                if self.on_error is not None:
+                    self.on_error(e)
+            finally:
+                with self._cond:
+                    self._writing = False
+                    self._cond.notify_all()
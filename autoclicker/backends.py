@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+输入后端
+run_click_task 通过统一接口发送点击/按键，具体实现可在任务设置中切换：
+- pyautogui: 原有实现（默认），每次调用后有 pyautogui.PAUSE（默认 0.1 秒）停顿，并先移动再点击
+- direct:    低开销实现，Windows 下直接调用 user32（SetCursorPos + mouse_event），
+             光标已在目标位置时不再移动，且没有 PAUSE 停顿；其他平台使用 pyautogui 并跳过 PAUSE。
+             保留 pyautogui 的 FAILSAFE：光标被移到主屏幕四角时抛出 FailSafeError 中止任务
+- record:    只记录调用、不产生真实输入，用于无界面测试和基准测试
+"""
+
+import sys
+import time
+from array import array
+
+DEFAULT_BACKEND = "pyautogui"
+
+# 与 plan.BUTTONS 顺序一致
+_BUTTON_CODES = {"left": 0, "right": 1, "middle": 2}
+
+
+class FailSafeError(RuntimeError):
+    """光标位于屏幕角落（与 pyautogui.FailSafeException 含义相同）"""
+
+
+def enable_dpi_awareness():
+    """Windows 下按物理像素解释坐标（与 pyautogui 导入时的行为一致），应在创建窗口前调用"""
+    if sys.platform != "win32":
+        return
+    try:
+        import ctypes
+
+        ctypes.windll.user32.SetProcessDPIAware()
+    except Exception:
+        pass
+
+
+def cursor_position():
+    """读取当前光标位置；Windows 下直接调用 user32，不需要导入 pyautogui"""
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        point = wintypes.POINT()
+        ctypes.windll.user32.GetCursorPos(ctypes.byref(point))
+        return (point.x, point.y)
+    import pyautogui
+
+    pos = pyautogui.position()
+    return (pos[0], pos[1])
+
+
+def _load_keyboard():
+    try:
+        import keyboard
+
+        return keyboard
+    except Exception:
+        return None
+
+
+class InputBackend:
+    name = "base"
+    label = ""
+
+    def __init__(self):
+        self._keyboard = _load_keyboard()
+        self.can_send_keys = self._keyboard is not None
+
+    def click(self, x, y, button="left"):
+        raise NotImplementedError
+
+    def send_keys(self, keys):
+        if self._keyboard is None:
+            raise RuntimeError("未安装 keyboard 库，无法发送按键")
+        self._keyboard.send(keys)
+
+    def position(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class PyAutoGUIBackend(InputBackend):
+    name = "pyautogui"
+    label = "pyautogui（兼容）"
+
+    def __init__(self):
+        super().__init__()
+        import pyautogui
+
+        self._pg = pyautogui
+
+    def click(self, x, y, button="left"):
+        self._pg.click(x, y, button=button)
+
+    def position(self):
+        pos = self._pg.position()
+        return (pos[0], pos[1])
+
+
+class DirectBackend(InputBackend):
+    name = "direct"
+    label = "直接输入（低开销）"
+    failsafe = True  # 与 pyautogui.FAILSAFE 对应
+
+    # mouse_event 标志位
+    _MOUSE_FLAGS = {
+        "left": (0x0002, 0x0004),
+        "right": (0x0008, 0x0010),
+        "middle": (0x0020, 0x0040),
+    }
+
+    def __init__(self):
+        super().__init__()
+        self._user32 = None
+        self._pg = None
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+
+            self._user32 = ctypes.windll.user32
+            enable_dpi_awareness()
+            self._point = wintypes.POINT()
+            self._point_ref = ctypes.byref(self._point)
+        else:
+            import pyautogui
+
+            self._pg = pyautogui
+
+    def click(self, x, y, button="left"):
+        user32 = self._user32
+        if user32 is None:
+            self._pg.click(x, y, button=button, _pause=False)
+            return
+        down, up = self._MOUSE_FLAGS.get(button, self._MOUSE_FLAGS["left"])
+        user32.GetCursorPos(self._point_ref)
+        if self.failsafe and self._at_corner(self._point.x, self._point.y):
+            raise FailSafeError("光标位于屏幕角落，已触发安全中止（FAILSAFE）")
+        if self._point.x != x or self._point.y != y:
+            user32.SetCursorPos(x, y)
+        user32.mouse_event(down, 0, 0, 0, 0)
+        user32.mouse_event(up, 0, 0, 0, 0)
+
+    def _at_corner(self, x, y):
+        """主屏幕四角之一；先比较 0，大多数点击不需要查询屏幕尺寸"""
+        user32 = self._user32
+        return (x == 0 or x == user32.GetSystemMetrics(0) - 1) and (
+            y == 0 or y == user32.GetSystemMetrics(1) - 1
+        )
+
+    def position(self):
+        if self._user32 is None:
+            pos = self._pg.position()
+            return (pos[0], pos[1])
+        self._user32.GetCursorPos(self._point_ref)
+        return (self._point.x, self._point.y)
+
+
+class RecordingBackend(InputBackend):
+    """不产生真实输入，只把每次调用追加到数组中（时间戳为 perf_counter）"""
+
+    name = "record"
+    label = "记录（测试用，不产生输入）"
+
+    KIND_CLICK = 0
+    KIND_KEYS = 1
+
+    def __init__(self, latency=0.0):
+        super().__init__()
+        self.can_send_keys = True
+        self.latency = latency  # 模拟每次输入调用的耗时（秒，忙等）
+        self.times = array("d")
+        self.kinds = array("B")
+        self.xs = array("i")
+        self.ys = array("i")
+        self.buttons = array("B")
+        self.keys = []
+        self._pos = (0, 0)
+
+    def _simulate_latency(self):
+        if self.latency > 0:
+            end = time.perf_counter() + self.latency
+            while time.perf_counter() < end:
+                pass
+
+    def click(self, x, y, button="left"):
+        self._simulate_latency()
+        self.times.append(time.perf_counter())
+        self.kinds.append(self.KIND_CLICK)
+        self.xs.append(x)
+        self.ys.append(y)
+        self.buttons.append(_BUTTON_CODES.get(button, 0))
+        self._pos = (x, y)
+
+    def send_keys(self, keys):
+        self._simulate_latency()
+        self.times.append(time.perf_counter())
+        self.kinds.append(self.KIND_KEYS)
+        self.xs.append(self._pos[0])
+        self.ys.append(self._pos[1])
+        self.buttons.append(0)
+        self.keys.append(keys)
+
+    def position(self):
+        return self._pos
+
+    def __len__(self):
+        return len(self.times)
+
+    def clear(self):
+        for arr in (self.times, self.kinds, self.xs, self.ys, self.buttons):
+            del arr[:]
+        self.keys.clear()
+
+
+BACKENDS = {
+    PyAutoGUIBackend.name: PyAutoGUIBackend,
+    DirectBackend.name: DirectBackend,
+    RecordingBackend.name: RecordingBackend,
+}
+
+
+def backend_names():
+    return list(BACKENDS)
+
+
+def create_backend(name=DEFAULT_BACKEND, **kwargs):
+    """按名称创建输入后端；名称未知时抛出 ValueError，依赖缺失时抛出 ImportError"""
+    try:
+        cls = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"未知的输入后端: {name}")
+    return cls(**kwargs)
@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+"""
+无界面基准测试
+使用 record 输入后端驱动 ClickEngine（不产生真实输入，普通 Linux 机器即可运行），报告：
+- 每秒动作数
+- 实际间隔相对计划间隔的抖动 p50 / p99 / max
+- 每个动作的引擎开销（总耗时减去在调度器等待中度过的时间）
+- 内存增长（tracemalloc）
+- 点位配置的解析与校验耗时（autoclicker.config）
+
+用法：
+    python -m autoclicker.bench --json bench.json
+    python -m autoclicker.bench --sizes 1,1000 --compare old_bench.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+from autoclicker import VERSION
+from autoclicker.backends import RecordingBackend
+from autoclicker.config import normalize_points, points_document
+from autoclicker.engine import ClickEngine
+from autoclicker.logwriter import get_log_writer
+from autoclicker.plan import compile_plan
+
+DEFAULT_SIZES = (1, 1000, 100000)
+DEFAULT_INTERVAL = 0.001  # seconds
+DEFAULT_CONFIG_SIZES = (1000, 100000)
+DEFAULT_SAMPLES = 2000  # 单点位用例的点击次数
+MAX_WAIT_PER_CASE = 5.0  # seconds，单个用例的计划等待总时长上限
+
+
+def build_points(size, interval, samples=DEFAULT_SAMPLES):
+    """生成 size 个点位；单点位时用 click_count 产生足够的样本"""
+    if size == 1:
+        return [
+            {
+                "x": 100,
+                "y": 100,
+                "name": "bench",
+                "button": "left",
+                "delay": interval,
+                "click_count": samples,
+                "click_interval": interval,
+            }
+        ]
+    return [
+        {
+            "x": i % 1920,
+            "y": (i // 1920) % 1080,
+            "name": f"bench{i}",
+            "button": "left",
+            "delay": interval,
+            "click_count": 1,
+            "click_interval": interval,
+        }
+        for i in range(size)
+    ]
+
+
+def expected_gaps(plan, loop_delay):
+    """按引擎的执行顺序计算相邻两个动作之间的计划间隔"""
+    gaps = []
+    last = len(plan) - 1
+    for loop in range(plan.loop_count):
+        if loop > 0:
+            gaps.append(loop_delay)
+        for idx in range(len(plan)):
+            count = plan.counts[idx]
+            if count == 0:
+                continue
+            gaps.extend([plan.intervals[idx]] * (count - 1))
+            if idx < last:
+                gaps.append(plan.delays[idx])
+    # 最后一个点位之后没有动作
+    if gaps and len(plan) and plan.counts[last]:
+        gaps.pop()
+    return gaps
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+def _time_waits(scheduler):
+    """包装 scheduler.wait，累计在等待中度过的秒数；其余时间即引擎自身的开销"""
+    waited = [0.0]
+    inner = scheduler.wait
+
+    def wait(interval):
+        t0 = time.perf_counter()
+        try:
+            return inner(interval)
+        finally:
+            waited[0] += time.perf_counter() - t0
+
+    scheduler.wait = wait
+    return waited
+
+
+def _run_engine(points, loop_count, loop_delay, latency):
+    t0 = time.perf_counter()
+    plan = compile_plan(points, loop_count)
+    compile_s = time.perf_counter() - t0
+    backend = RecordingBackend(latency=latency)
+    engine = ClickEngine(plan, backend, loop_delay=loop_delay)
+    waited = _time_waits(engine.scheduler)
+    t0 = time.perf_counter()
+    engine.run()
+    elapsed = time.perf_counter() - t0
+    return plan, backend, engine, compile_s, elapsed, waited[0]
+
+
+def run_case(size, interval, samples, loop_delay=0.0, latency=0.0, memory=True):
+    # 计划等待总时长不超过 MAX_WAIT_PER_CASE，大配置退化为吞吐量测试
+    actions = samples if size == 1 else size
+    interval = min(interval, MAX_WAIT_PER_CASE / max(1, actions))
+    points = build_points(size, interval, samples)
+
+    plan, backend, engine, compile_s, elapsed, waited = _run_engine(
+        points, 1, loop_delay, latency
+    )
+    times = backend.times
+    gaps = expected_gaps(plan, loop_delay)
+    actual = [times[i + 1] - times[i] for i in range(len(times) - 1)]
+    jitter = sorted(abs(a - e) for a, e in zip(actual, gaps))
+    n = len(times)
+
+    result = {
+        "name": f"{size}-points",
+        "points": size,
+        "actions": n,
+        "interval_s": interval,
+        "elapsed_s": elapsed,
+        "compile_ms": compile_s * 1000.0,
+        "actions_per_s": n / elapsed if elapsed > 0 else 0.0,
+        "waited_s": waited,
+        # 直接测量：不在等待中的时间（点击、日志、统计、循环本身）平均到每个动作
+        "overhead_us": (elapsed - waited) / n * 1e6 if n else 0.0,
+        "jitter_p50_ms": percentile(jitter, 0.50) * 1000.0,
+        "jitter_p99_ms": percentile(jitter, 0.99) * 1000.0,
+        "jitter_max_ms": (jitter[-1] if jitter else 0.0) * 1000.0,
+        "lateness": engine.stats.timing,
+        "histograms": engine.stats.snapshot()["histograms"],
+    }
+
+    if memory:
+        # 单独跑一遍测内存，tracemalloc 会显著拖慢计时
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        _run_engine(points, 1, loop_delay, latency)
+        after, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["mem_growth_kb"] = (after - before) / 1024.0
+        result["mem_peak_kb"] = (peak - before) / 1024.0
+    return result
+
+
+def run_config_case(size):
+    """测量点位配置的 JSON 解析和校验耗时"""
+    text = json.dumps(points_document(build_points(size, 0.1)), ensure_ascii=False)
+    t0 = time.perf_counter()
+    data = json.loads(text)
+    t1 = time.perf_counter()
+    points = normalize_points(data)
+    t2 = time.perf_counter()
+    return {
+        "name": f"config-{size}",
+        "points": len(points),
+        "file_kb": len(text.encode("utf-8")) / 1024.0,
+        "parse_ms": (t1 - t0) * 1000.0,
+        "normalize_ms": (t2 - t1) * 1000.0,
+        "points_per_s": size / (t2 - t1) if t2 > t1 else 0.0,
+    }
+
+
+def run_suite(sizes, interval, samples, latency=0.0, memory=True, config_sizes=()):
+    return {
+        "version": VERSION,
+        "timestamp": datetime.datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cases": [
+            run_case(size, interval, samples, latency=latency, memory=memory)
+            for size in sizes
+        ],
+        "config": [run_config_case(size) for size in config_sizes],
+    }
+
+
+def print_report(report, out=sys.stdout):
+    out.write(
+        f"AutoClicker {report['version']} 基准测试 ({report['python']}, {report['platform']})\n"
+    )
+    header = f"{'用例':<14}{'动作数':>9}{'动作/秒':>11}{'开销us':>9}{'p50ms':>8}{'p99ms':>8}{'maxms':>8}{'内存KB':>10}\n"
+    out.write(header)
+    for c in report["cases"]:
+        mem = c.get("mem_growth_kb")
+        mem_text = f"{mem:.1f}" if mem is not None else "-"
+        out.write(
+            f"{c['name']:<14}{c['actions']:>9}{c['actions_per_s']:>11.0f}{c['overhead_us']:>9.1f}"
+            f"{c['jitter_p50_ms']:>8.3f}{c['jitter_p99_ms']:>8.3f}{c['jitter_max_ms']:>8.3f}"
+            f"{mem_text:>10}\n"
+        )
+
+
+def print_config_report(report, out=sys.stdout):
+    if not report.get("config"):
+        return
+    out.write(
+        f"\n{'配置':<14}{'点位':>9}{'大小KB':>10}{'解析ms':>10}{'校验ms':>10}{'点位/秒':>12}\n"
+    )
+    for c in report["config"]:
+        out.write(
+            f"{c['name']:<14}{c['points']:>9}{c['file_kb']:>10.0f}{c['parse_ms']:>10.1f}"
+            f"{c['normalize_ms']:>10.1f}{c['points_per_s']:>12.0f}\n"
+        )
+
+
+def print_comparison(report, baseline, out=sys.stdout):
+    """与旧版本的结果逐项对比（比值 > 1 表示变好）"""
+    old_cases = {c["name"]: c for c in baseline.get("cases", [])}
+    out.write(f"\n对比 {baseline.get('version')} -> {report['version']}\n")
+    for c in report["cases"]:
+        old = old_cases.get(c["name"])
+        if not old:
+            continue
+        speed = c["actions_per_s"] / old["actions_per_s"] if old["actions_per_s"] else 0
+        out.write(
+            f"{c['name']:<14}吞吐 x{speed:.2f}  "
+            f"p99 抖动 {old['jitter_p99_ms']:.3f} -> {c['jitter_p99_ms']:.3f} ms  "
+            f"开销 {old['overhead_us']:.1f} -> {c['overhead_us']:.1f} us\n"
+        )
+    old_config = {c["name"]: c for c in baseline.get("config", [])}
+    for c in report.get("config", []):
+        old = old_config.get(c["name"])
+        if old:
+            out.write(
+                f"{c['name']:<14}校验 {old['normalize_ms']:.1f} -> {c['normalize_ms']:.1f} ms\n"
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m autoclicker.bench", description="AutoClicker 点击引擎基准测试"
+    )
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(s) for s in DEFAULT_SIZES),
+        help="点位数量列表，逗号分隔（默认 1,1000,100000）",
+    )
+    parser.add_argument(
+        "--config-sizes",
+        default=",".join(str(s) for s in DEFAULT_CONFIG_SIZES),
+        help="配置加载测试的点位数量，逗号分隔（留空跳过）",
+    )
+    parser.add_argument(
+        "--interval", type=float, default=DEFAULT_INTERVAL, help="计划间隔（秒）"
+    )
+    parser.add_argument(
+        "--samples", type=int, default=DEFAULT_SAMPLES, help="单点位用例的点击次数"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="模拟每次输入调用的耗时（秒）"
+    )
+    parser.add_argument("--no-memory", action="store_true", help="跳过内存测量")
+    parser.add_argument("--json", metavar="PATH", help="把结果写入 JSON 文件")
+    parser.add_argument("--compare", metavar="PATH", help="与旧的 JSON 结果对比")
+    parser.add_argument(
+        "--keep-log", action="store_true", help="保留引擎日志（默认丢弃到空设备）"
+    )
+    args = parser.parse_args(argv)
+
+    if not args.keep_log:
+        writer = get_log_writer()
+        writer.path = os.devnull
+        writer.echo = False
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    config_sizes = [int(s) for s in args.config_sizes.split(",") if s.strip()]
+    report = run_suite(
+        sizes,
+        args.interval,
+        args.samples,
+        latency=args.latency,
+        memory=not args.no_memory,
+        config_sizes=config_sizes,
+    )
+    print_report(report)
+    print_config_report(report)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            print_comparison(report, json.load(f))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+命令行运行器（不导入 tkinter）
+    python -m autoclicker run click_points.json --loops 10 --offset 3 --rand-delay 0.05
+
+退出码：
+    0   任务完成
+    1   任务失败（点击异常或引擎异常）
+    2   参数错误（argparse）
+    3   配置文件无法读取
+    4   输入后端不可用
+    130 被 Ctrl+C 中断
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+from autoclicker import VERSION
+from autoclicker.backends import DEFAULT_BACKEND, backend_names, create_backend
+from autoclicker.config import CONFIG_FILE, load_points_file
+from autoclicker.engine import LOOP_DELAY, ClickEngine, EngineListener
+from autoclicker.logwriter import LOG_LEVELS, flush_log, get_log_writer, set_log_level
+from autoclicker.plan import SPEED_MAX, SPEED_MIN, compile_plan
+from autoclicker.reports import append_report, build_run_report
+from autoclicker.stats import format_histogram_lines
+from autoclicker.timing import SPIN_WINDOW
+from autoclicker.vision import TemplateMatcher, vision_available
+from autoclicker.waits import RegionWaiter
+from autoclicker.windows import WindowGeometry, WindowIndex, create_window_provider
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_CONFIG = 3
+EXIT_BACKEND = 4
+EXIT_INTERRUPTED = 130
+
+STATS_INTERVAL = 1.0  # seconds，实时统计的刷新间隔
+
+
+class ConsoleListener(EngineListener):
+    """把引擎回调转换为控制台输出；verbose 时打印每条消息"""
+
+    def __init__(self, out=sys.stdout, verbose=False):
+        self.out = out
+        self.verbose = verbose
+        self.done = 0
+        self.total = 0
+        self.last_message = ""
+
+    def on_message(self, text):
+        self.last_message = text
+        if self.verbose:
+            self.out.write(text + "\n")
+
+    def on_progress(self, done, total):
+        self.done = done
+        self.total = total
+
+    def on_paused(self):
+        self.out.write("已暂停\n")
+
+
+def _format_stats(listener, snap, elapsed):
+    rate = listener.done / elapsed if elapsed > 0 else 0.0
+    return (
+        f"进度 {listener.done}/{listener.total or '?'}  "
+        f"成功 {snap['successful_clicks']}  失败 {snap['failed_clicks']}  "
+        f"循环 {snap['loops_completed']}  {rate:.1f} 次/秒  {elapsed:.1f}s"
+    )
+
+
+def _window_geometry(title, out):
+    """配置含窗口相对坐标时按 --window 查找目标窗口，返回客户区查询函数"""
+    if not title:
+        out.write("配置使用窗口相对坐标，请用 --window 指定目标窗口标题\n")
+        return None
+    provider = create_window_provider()
+    if provider is None:
+        out.write("窗口相对坐标需要 Windows 和 pywin32\n")
+        return None
+    hwnd = WindowIndex(provider).find(title)
+    if hwnd is None:
+        out.write(f"未找到包含 '{title}' 的窗口\n")
+        return None
+    return WindowGeometry(provider, hwnd).client_rect
+
+
+def cmd_run(args, out=sys.stdout):
+    try:
+        points = load_points_file(args.config)
+    except Exception as e:
+        out.write(f"读取配置失败: {e}\n")
+        return EXIT_CONFIG
+    if not points:
+        out.write(f"配置中没有点位: {args.config}\n")
+        return EXIT_CONFIG
+
+    try:
+        backend = create_backend(args.backend)
+    except Exception as e:
+        out.write(f"输入后端 {args.backend} 不可用: {e}\n")
+        return EXIT_BACKEND
+
+    plan = compile_plan(
+        points, args.loops, args.offset, args.rand_delay, speed=args.speed
+    )
+    geometry = None
+    if plan.rel_index:
+        geometry = _window_geometry(args.window, out)
+        if geometry is None:
+            return EXIT_CONFIG
+    if (plan.targets or plan.waits) and not vision_available():
+        out.write("配置含图像点位或等待条件，需要安装 numpy 和 Pillow\n")
+        return EXIT_CONFIG
+    matcher = TemplateMatcher() if plan.targets else None
+    waiter = RegionWaiter() if plan.waits else None
+    listener = ConsoleListener(out, verbose=args.verbose)
+    engine = ClickEngine(
+        plan,
+        backend,
+        listener=listener,
+        spin_window=args.spin_window / 1000.0,
+        loop_delay=args.loop_delay,
+        geometry=geometry,
+        matcher=matcher,
+        waiter=waiter,
+    )
+    out.write(
+        f"AutoClicker {VERSION}: {len(plan)} 个点位 × {plan.loop_count} 次循环，"
+        f"共 {plan.total_ops or '?'} 次操作（后端 {args.backend}，{plan.speed:g}x）\n"
+    )
+
+    result = {}
+    worker = threading.Thread(
+        target=lambda: result.setdefault("completed", engine.run()), daemon=True
+    )
+    live = out.isatty() and not args.verbose
+    interrupted = False
+    t0 = time.perf_counter()
+    worker.start()
+    try:
+        while worker.is_alive():
+            worker.join(timeout=args.stats_interval)
+            if not args.quiet and worker.is_alive():
+                snap = engine.stats.snapshot(histograms=False)
+                line = _format_stats(listener, snap, time.perf_counter() - t0)
+                out.write(("\r" + line) if live else (line + "\n"))
+                out.flush()
+    except KeyboardInterrupt:
+        interrupted = True
+        engine.stop_event.set()
+        worker.join()
+    finally:
+        backend.close()
+
+    elapsed = time.perf_counter() - t0
+    if live and not args.quiet:
+        out.write("\n")
+    snap = engine.stats.snapshot()
+    out.write(_format_stats(listener, snap, elapsed) + "\n")
+    timing = snap["timing"] or {}
+    if timing.get("actions"):
+        out.write(
+            f"调度迟到: 平均 {timing['mean_ms']:.2f} ms，最大 {timing['max_ms']:.2f} ms\n"
+        )
+    for line in format_histogram_lines(snap["histograms"]):
+        out.write(line + "\n")
+    if args.report:
+        try:
+            record = build_run_report(
+                engine.stats.snapshot(points=True),
+                points,
+                params={
+                    "backend": args.backend,
+                    "loops": plan.loop_count,
+                    "random_offset": plan.offset_px,
+                    "random_delay": plan.rand_delay,
+                    "speed": plan.speed,
+                    "spin_window_ms": args.spin_window,
+                    "config": args.config,
+                },
+                version=VERSION,
+                completed=bool(result.get("completed")) and not interrupted,
+            )
+            append_report(record, args.report)
+        except Exception as e:
+            out.write(f"写入执行报告失败: {e}\n")
+
+    if interrupted:
+        out.write("任务中断。\n")
+        return EXIT_INTERRUPTED
+    if result.get("completed") and not snap["failed_clicks"]:
+        out.write("任务完成！\n")
+        return EXIT_OK
+    out.write(f"任务失败: {listener.last_message}\n")
+    return EXIT_FAILED
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m autoclicker", description=f"AutoClicker {VERSION} 命令行"
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="按配置文件执行点击任务")
+    run.add_argument(
+        "config", nargs="?", default=CONFIG_FILE, help=f"点位配置（默认 {CONFIG_FILE}）"
+    )
+    run.add_argument("--loops", type=int, default=1, help="循环次数")
+    run.add_argument("--offset", type=int, default=0, help="随机偏移(px ±)")
+    run.add_argument("--rand-delay", type=float, default=0.0, help="随机延时(s ±)")
+    run.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help=f"回放倍率（{SPEED_MIN:g} ~ {SPEED_MAX:g}），作用于所有延时和间隔",
+    )
+    run.add_argument(
+        "--backend", choices=backend_names(), default=DEFAULT_BACKEND, help="输入后端"
+    )
+    run.add_argument(
+        "--loop-delay", type=float, default=LOOP_DELAY, help="循环间延时（秒）"
+    )
+    run.add_argument(
+        "--spin-window",
+        type=float,
+        default=SPIN_WINDOW * 1000.0,
+        help="忙等窗口（毫秒）",
+    )
+    run.add_argument(
+        "--stats-interval",
+        type=float,
+        default=STATS_INTERVAL,
+        help="实时统计刷新间隔（秒）",
+    )
+    run.add_argument("--report", metavar="PATH", help="把本次执行报告追加到 JSONL 文件")
+    run.add_argument(
+        "--window",
+        metavar="TITLE",
+        help="目标窗口标题（点位使用窗口相对坐标时必需）",
+    )
+    run.add_argument(
+        "--log-level",
+        choices=list(LOG_LEVELS),
+        default=None,
+        help="日志文件级别（DEBUG 记录每次点击，默认 INFO）",
+    )
+    run.add_argument("-q", "--quiet", action="store_true", help="不输出实时统计")
+    run.add_argument("-v", "--verbose", action="store_true", help="输出每条任务消息")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # 日志仍写入日志文件，但不回显到控制台（由 ConsoleListener 负责输出）
+    get_log_writer().echo = False
+    if getattr(args, "log_level", None):
+        set_log_level(args.log_level)
+    try:
+        if args.command == "run":
+            return cmd_run(args)
+        return EXIT_USAGE
+    finally:
+        flush_log()
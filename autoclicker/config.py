@@ -0,0 +1,393 @@
+# -*- coding: utf-8 -*-
+"""
+点位配置读写
+界面（加载/导入）和命令行共用同一个加载器：
+- 文件格式带版本号：{"schema_version": 2, "points": [...]}；
+  旧版本直接保存为列表（视为版本 1），其中还可能有 [x, y, name] 形式的点位
+- 版本 3 增加 coord_mode（窗口相对坐标）以及 find_and_click、wait 和流程控制点位；
+  只有用到这些新功能时才写为版本 3，旧程序读取时会提示版本过高，
+  而不是把相对坐标当作屏幕坐标点击、或把新类型的点位当作普通点击
+- find_and_click 点位另有 template（模板图片路径）、threshold（匹配阈值）
+  和 roi（搜索区域 [left, top, width, height]，null 表示整个屏幕）
+- wait 点位另有 wait_mode（color / change）、roi（观察区域，null 表示点位坐标处的一个像素）、
+  color（color 模式的目标颜色 [r, g, b]，也可写 "#rrggbb"）、tolerance 和 timeout（秒）
+- 流程控制点位（FLOW_ACTIONS）：label 定义标签；jump / call 跳转或调用到 target 标签；
+  loop 跳回 target 直到本段共执行 count 次；branch 在最近一次 wait / find_and_click
+  的结果为 when（ok / fail）时跳转；return 从 call 返回；end 结束本轮循环。
+  标签重复或 target 指向不存在的标签时报错
+- normalize_points() 一次遍历完成类型转换和校验，缺失字段用默认值补齐，
+  有错误时在遍历结束后抛出 ConfigError，列出出错点位的序号和字段
+"""
+
+import json
+import os
+
+from autoclicker.autosave import atomic_write_json
+
+CONFIG_FILE = "click_points.json"
+CONFIG_SCHEMA_VERSION = 3
+BASE_SCHEMA_VERSION = 2  # 只用到版本 2 的功能时写入的版本
+
+# 与界面上各输入框的初始值一致
+DEFAULT_POINT_VALUES = {
+    "button": "left",
+    "delay": 1.0,
+    "click_count": 1,
+    "click_interval": 1.0,
+}
+
+VALID_BUTTONS = frozenset(("left", "right", "middle"))
+FLOW_ACTIONS = frozenset(("label", "jump", "loop", "branch", "call", "return", "end"))
+VALID_ACTIONS = (
+    frozenset(("click", "keyboard", "find_and_click", "wait")) | FLOW_ACTIONS
+)
+BASE_ACTIONS = frozenset(("click", "keyboard"))  # 版本 2 已有的点位类型
+VALID_BRANCH_CONDITIONS = frozenset(("ok", "fail"))
+DEFAULT_MATCH_THRESHOLD = 0.85
+VALID_WAIT_MODES = frozenset(("color", "change"))
+DEFAULT_WAIT_TIMEOUT = 10.0
+DEFAULT_COLOR_TOLERANCE = 24
+VALID_COORD_MODES = frozenset(("absolute", "client", "ratio"))
+MAX_REPORTED_ERRORS = 20  # 错误信息中最多列出的条数
+
+
+class ConfigError(ValueError):
+    """配置格式或内容错误；errors 为 [(点位下标, 字段, 说明)]"""
+
+    def __init__(self, message, errors=None):
+        self.errors = errors or []
+        if self.errors:
+            lines = [
+                f"第 {index + 1} 个点位 {field}: {reason}"
+                for index, field, reason in self.errors[:MAX_REPORTED_ERRORS]
+            ]
+            if len(self.errors) > MAX_REPORTED_ERRORS:
+                lines.append(f"……共 {len(self.errors)} 处错误")
+            message = message + "\n" + "\n".join(lines)
+        super().__init__(message)
+
+
+def _int(value):
+    if isinstance(value, bool):
+        raise ValueError
+    if isinstance(value, float):
+        if not -_INF < value < _INF:
+            raise ValueError
+        return int(value)
+    return int(str(value).strip())
+
+
+def _float(value):
+    if isinstance(value, bool):
+        raise ValueError
+    return float(value)
+
+
+_INF = float("inf")
+
+
+def _template_fields(get):
+    """find_and_click 点位的附加字段；返回 (字段 dict, None) 或 (None, (字段, 说明))"""
+    template = get("template", "")
+    if type(template) is not str or not template.strip():
+        return None, ("template", "应为模板图片路径")
+    threshold = get("threshold", DEFAULT_MATCH_THRESHOLD)
+    try:
+        threshold = _float(threshold)
+    except (TypeError, ValueError):
+        return None, ("threshold", f"无效的值 {threshold!r}")
+    if not 0.0 < threshold <= 1.0:
+        return None, ("threshold", f"应在 0 ~ 1 之间 {threshold!r}")
+    roi, error = _roi(get("roi"))
+    if error is not None:
+        return None, error
+    return {"template": template, "threshold": threshold, "roi": roi}, None
+
+
+def _roi(roi):
+    """[left, top, width, height] 或 None；返回 (roi, None) 或 (None, (字段, 说明))"""
+    if roi is None:
+        return None, None
+    try:
+        if len(roi) != 4:
+            raise ValueError
+        roi = [_int(v) for v in roi]
+    except (TypeError, ValueError):
+        return None, ("roi", f"应为 [left, top, width, height] {roi!r}")
+    if roi[2] <= 0 or roi[3] <= 0:
+        return None, ("roi", f"宽高应为正数 {roi!r}")
+    return roi, None
+
+
+def _color(color):
+    """[r, g, b] 或 "#rrggbb" -> [r, g, b]；无效时抛出 ValueError"""
+    if isinstance(color, str):
+        text = color.strip().lstrip("#")
+        if len(text) != 6:
+            raise ValueError
+        return [int(text[i : i + 2], 16) for i in (0, 2, 4)]
+    if len(color) != 3:
+        raise ValueError
+    rgb = [_int(v) for v in color]
+    if not all(0 <= v <= 255 for v in rgb):
+        raise ValueError
+    return rgb
+
+
+def _wait_fields(get):
+    """wait 点位的附加字段；返回值同 _template_fields"""
+    wait_mode = get("wait_mode", "change")
+    if wait_mode not in VALID_WAIT_MODES:
+        return None, ("wait_mode", f"未知的等待条件 {wait_mode!r}")
+    roi, error = _roi(get("roi"))
+    if error is not None:
+        return None, error
+    color = get("color")
+    if wait_mode == "color" or color is not None:
+        try:
+            color = _color(color)
+        except (TypeError, ValueError):
+            return None, ("color", f'应为 [r, g, b] 或 "#rrggbb" {color!r}')
+    tolerance = get("tolerance", DEFAULT_COLOR_TOLERANCE)
+    try:
+        tolerance = _int(tolerance)
+        if not 0 <= tolerance <= 255:
+            raise ValueError
+    except (TypeError, ValueError):
+        return None, ("tolerance", f"应为 0 ~ 255 的整数 {tolerance!r}")
+    timeout = get("timeout", DEFAULT_WAIT_TIMEOUT)
+    try:
+        timeout = _float(timeout)
+    except (TypeError, ValueError):
+        timeout = None
+    if timeout is None or not 0.0 < timeout < _INF:
+        return None, ("timeout", f"应为正数 {get('timeout')!r}")
+    return {
+        "wait_mode": wait_mode,
+        "roi": roi,
+        "color": color,
+        "tolerance": tolerance,
+        "timeout": timeout,
+    }, None
+
+
+def _flow_fields(get):
+    """流程控制点位的附加字段；返回值同 _template_fields"""
+    action_type = get("action_type")
+    if action_type == "label":
+        label = get("label")
+        if type(label) is not str or not label.strip():
+            return None, ("label", "应为非空的标签名")
+        return {"label": label.strip()}, None
+    if action_type in ("return", "end"):
+        return {}, None
+    target = get("target")
+    if type(target) is not str or not target.strip():
+        return None, ("target", "应为要跳转到的标签名")
+    fields = {"target": target.strip()}
+    if action_type == "loop":
+        count = get("count", 1)
+        try:
+            count = _int(count)
+            if count < 1:
+                raise ValueError
+        except (TypeError, ValueError):
+            return None, ("count", f"应为正整数 {count!r}")
+        fields["count"] = count
+    elif action_type == "branch":
+        when = get("when", "fail")
+        if when not in VALID_BRANCH_CONDITIONS:
+            return None, ("when", f"应为 ok 或 fail {when!r}")
+        fields["when"] = when
+    return fields, None
+
+
+def _check_labels(points, errors):
+    """标签不能重复，跳转目标必须存在"""
+    labels = {}
+    for index, p in enumerate(points):
+        if p["action_type"] == "label":
+            if p["label"] in labels:
+                errors.append((index, "label", f"标签重复 {p['label']!r}"))
+            labels.setdefault(p["label"], index)
+    for index, p in enumerate(points):
+        target = p.get("target")
+        if target is not None and p["action_type"] in FLOW_ACTIONS:
+            if target not in labels:
+                errors.append((index, "target", f"标签不存在 {target!r}"))
+
+
+# 操作类型 -> 附加字段的校验函数
+_EXTRA_FIELDS = {"find_and_click": _template_fields, "wait": _wait_fields}
+_EXTRA_FIELDS.update(dict.fromkeys(FLOW_ACTIONS, _flow_fields))
+
+
+def normalize_points(data, defaults=None):
+    """把版本 1 的列表或版本 2 的文档转换为完整的点位 dict 列表"""
+    points = points_from_document(data)
+    d = DEFAULT_POINT_VALUES if defaults is None else defaults
+    default_button = d["button"]
+    default_delay = _float(d["delay"])
+    default_count = _int(d["click_count"])
+    default_interval = _float(d["click_interval"])
+
+    result = []
+    errors = []
+    has_flow = False
+    append = result.append
+    # 热循环：常见类型（JSON 中的 int/float）走 type() 快速路径，其余才调用转换函数
+    for index, item in enumerate(points):
+        if type(item) is dict:
+            get = item.get
+            field = "x"
+            try:
+                x = get("x", 0)
+                if type(x) is not int:
+                    x = _int(x)
+                field = "y"
+                y = get("y", 0)
+                if type(y) is not int:
+                    y = _int(y)
+                field = "delay"
+                delay = get("delay", default_delay)
+                if type(delay) is not float:
+                    delay = _float(delay)
+                field = "click_count"
+                click_count = get("click_count", default_count)
+                if type(click_count) is not int:
+                    click_count = _int(click_count)
+                field = "click_interval"
+                click_interval = get("click_interval", default_interval)
+                if type(click_interval) is not float:
+                    click_interval = _float(click_interval)
+            except (TypeError, ValueError):
+                errors.append((index, field, f"无效的值 {get(field)!r}"))
+                continue
+            # 同时排除负数、NaN 和无穷大
+            if not 0.0 <= delay < _INF:
+                errors.append((index, "delay", f"应为非负数 {delay!r}"))
+                continue
+            if not 0.0 <= click_interval < _INF:
+                errors.append(
+                    (index, "click_interval", f"应为非负数 {click_interval!r}")
+                )
+                continue
+            if click_count < 0:
+                errors.append((index, "click_count", f"应为非负数 {click_count!r}"))
+                continue
+            button = get("button", default_button)
+            if button not in VALID_BUTTONS:
+                errors.append((index, "button", f"未知的鼠标键 {button!r}"))
+                continue
+            action_type = get("action_type", "click")
+            if action_type not in VALID_ACTIONS:
+                errors.append((index, "action_type", f"未知的操作类型 {action_type!r}"))
+                continue
+            keys = get("keys", "")
+            if type(keys) is not str:
+                errors.append((index, "keys", "应为字符串"))
+                continue
+            coord_mode = get("coord_mode", "absolute")
+            if coord_mode not in VALID_COORD_MODES:
+                errors.append((index, "coord_mode", f"未知的坐标模式 {coord_mode!r}"))
+                continue
+            name = get("name")
+            point = {
+                "x": x,
+                "y": y,
+                "name": f"点位({x},{y})" if name is None else str(name),
+                "button": button,
+                "delay": delay,
+                "click_count": click_count,
+                "click_interval": click_interval,
+                "keys": keys,
+                "action_type": action_type,
+                "coord_mode": coord_mode,
+            }
+            extra = _EXTRA_FIELDS.get(action_type)
+            if extra is not None:
+                fields, error = extra(get)
+                if error is not None:
+                    errors.append((index,) + error)
+                    continue
+                point.update(fields)
+                if action_type in FLOW_ACTIONS:
+                    has_flow = True
+                    if name is None:
+                        ref = fields.get("label") or fields.get("target") or ""
+                        point["name"] = f"{action_type} {ref}".rstrip()
+            append(point)
+        elif isinstance(item, list) and len(item) >= 3:
+            # 版本 1 的 [x, y, name]
+            try:
+                x = _int(item[0]) if type(item[0]) is not int else item[0]
+                y = _int(item[1]) if type(item[1]) is not int else item[1]
+            except (TypeError, ValueError):
+                errors.append((index, "x/y", f"无效的坐标 {item[:2]!r}"))
+                continue
+            append(
+                {
+                    "x": x,
+                    "y": y,
+                    "name": str(item[2]),
+                    "button": default_button,
+                    "delay": default_delay,
+                    "click_count": default_count,
+                    "click_interval": default_interval,
+                    "keys": "",
+                    "action_type": "click",
+                    "coord_mode": "absolute",
+                }
+            )
+        else:
+            errors.append((index, "-", "应为对象或 [x, y, 名称]"))
+
+    if has_flow and not errors:
+        # 每个输入都对应一个结果时下标才一致，所以只在没有其他错误时检查
+        _check_labels(result, errors)
+    if errors:
+        raise ConfigError(f"配置中有 {len(errors)} 个点位无效", errors)
+    return result
+
+
+def points_from_document(data):
+    """取出文档中的点位列表并检查版本号"""
+    if isinstance(data, list):
+        return data  # 版本 1
+    if not isinstance(data, dict):
+        raise ConfigError("不支持的配置格式")
+    version = data.get("schema_version")
+    if not isinstance(version, int):
+        raise ConfigError("配置缺少 schema_version")
+    if version > CONFIG_SCHEMA_VERSION:
+        raise ConfigError(
+            f"配置版本 {version} 高于当前支持的版本 {CONFIG_SCHEMA_VERSION}，请更新程序"
+        )
+    points = data.get("points")
+    if not isinstance(points, list):
+        raise ConfigError("配置中的 points 应为列表")
+    return points
+
+
+def points_document(points):
+    newer = any(
+        p.get("coord_mode", "absolute") != "absolute"
+        or p.get("action_type", "click") not in BASE_ACTIONS
+        for p in points
+    )
+    version = CONFIG_SCHEMA_VERSION if newer else BASE_SCHEMA_VERSION
+    return {"schema_version": version, "points": points}
+
+
+def load_points_file(path=CONFIG_FILE, defaults=None):
+    """读取并校验点位配置；文件不存在时抛出 FileNotFoundError"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"配置文件不存在: {path}")
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return normalize_points(data, defaults)
+
+
+def save_points_file(points, path=CONFIG_FILE, backups=0, compact=True):
+    """按当前版本格式原子写入点位配置（compact=False 时缩进，便于阅读）"""
+    atomic_write_json(path, points_document(points), backups=backups, compact=compact)
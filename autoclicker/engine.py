@@ -0,0 +1,497 @@
+# -*- coding: utf-8 -*-
+"""
+点击引擎
+执行编译好的 ActionPlan：按计划数组依次点击/按键，使用 DeadlineScheduler 控制节奏，
+通过 EngineListener 回调把进度通知给界面（或命令行/基准测试），本身不依赖 tkinter。
+每轮循环按程序计数器（pc）执行；流程控制指令只改变 pc，不回调、不等待。
+"""
+
+import datetime
+import random
+import threading
+import time
+
+from autoclicker.logwriter import log, log_debug, log_error, log_warning
+from autoclicker.plan import (
+    MAX_CALL_DEPTH,
+    OP_BRANCH_FAIL,
+    OP_BRANCH_OK,
+    OP_CALL,
+    OP_END,
+    OP_FIND,
+    OP_JUMP,
+    OP_KEY,
+    OP_LABEL,
+    OP_LOOP,
+    OP_RET,
+    OP_WAIT,
+)
+from autoclicker.stats import RunStats
+from autoclicker.timing import DeadlineScheduler, SPIN_WINDOW
+
+LOOP_DELAY = 1.0  # seconds，两次循环之间的固定延时（按回放倍率缩放）
+# 实际每轮耗时超过计划的该倍数时提示输入后端跟不上请求的回放速度
+SPEED_TOLERANCE = 1.2
+SPEED_SLACK = 0.05  # seconds，超出计划不足该值时不提示（计时抖动）
+PAUSE_POLL_INTERVAL = 0.1  # seconds
+# 连续执行这么多条流程控制指令而没有任何操作时视为死循环
+FLOW_STEP_LIMIT = 100_000
+
+
+def new_run_stats():
+    return RunStats()
+
+
+class EngineListener:
+    """引擎回调，均在工作线程中调用，默认全部为空操作"""
+
+    def on_message(self, text):
+        pass
+
+    def on_point(self, loop, index, x, y):
+        pass
+
+    def on_point_done(self, index):
+        pass
+
+    def on_click(self, x, y):
+        pass
+
+    def on_progress(self, done, total):
+        pass
+
+    def on_paused(self):
+        pass
+
+    def on_debug_step(self, index):
+        pass
+
+
+class ClickEngine:
+    def __init__(
+        self,
+        plan,
+        backend,
+        stop_event=None,
+        pause_event=None,
+        listener=None,
+        stats=None,
+        spin_window=SPIN_WINDOW,
+        loop_delay=LOOP_DELAY,
+        step_mode=None,
+        geometry=None,
+        matcher=None,
+        waiter=None,
+    ):
+        self.plan = plan
+        self.backend = backend
+        self.stop_event = stop_event if stop_event is not None else threading.Event()
+        self.pause_event = pause_event if pause_event is not None else threading.Event()
+        self.listener = listener if listener is not None else EngineListener()
+        self.stats = stats if stats is not None else new_run_stats()
+        self.scheduler = DeadlineScheduler(
+            spin_window,
+            stop_event=self.stop_event,
+            histogram=self.stats.histograms["lateness"],
+        )
+        self.loop_delay = loop_delay
+        # 调试模式：返回 True 时每个点位执行前暂停，等待继续
+        self.step_mode = step_mode
+        # 计划含窗口相对坐标时，每轮循环开始调用一次，返回目标窗口客户区或 None
+        self.geometry = geometry
+        # vision.TemplateMatcher，计划含 find_and_click 点位时使用
+        self.matcher = matcher
+        # waits.RegionWaiter，计划含 wait 点位时使用
+        self.waiter = waiter
+        self.waited = 0.0  # 条件等待累计秒数，不参与速度检查
+        self.completed = False
+        self.pauses = 0  # 暂停/单步次数，暂停过的循环不参与速度检查
+        self.speed_warned = False
+
+    def run(self):
+        """执行整个计划；正常完成返回 True，被停止或异常返回 False"""
+        listener = self.listener
+        stats = self.stats
+        if stats.start_time is None:
+            stats.start_time = datetime.datetime.now().isoformat()
+        stats.reset_points(len(self.plan))
+        self.scheduler.start()
+        try:
+            self._run_loops()
+            if not self.stop_event.is_set():
+                self.completed = True
+                listener.on_message("任务完成！")
+                log("任务完成")
+            else:
+                listener.on_message("任务中断。")
+                log("任务中断")
+        except Exception as e:
+            listener.on_message(f"任务异常终止: {e}")
+            log_error("任务异常: %s", e)
+        finally:
+            stats.end_time = datetime.datetime.now().isoformat()
+            timing = self.scheduler.lateness_summary()
+            stats.timing = timing
+            if timing["actions"]:
+                timing_msg = (
+                    f"调度迟到: 平均 {timing['mean_ms']:.2f} ms，"
+                    f"最大 {timing['max_ms']:.2f} ms（{timing['actions']} 次等待）"
+                )
+                if timing["merged"]:
+                    timing_msg += f"，合并 {timing['merged']} 次极短等待"
+                listener.on_message(timing_msg)
+                log(timing_msg)
+        return self.completed
+
+    def _locate(self, idx):
+        """在屏幕上定位点位的模板，返回点击坐标或 None"""
+        template, threshold, roi = self.plan.targets[idx]
+        if self.matcher is None:
+            self.listener.on_message("图像识别不可用（需要 numpy 和 Pillow）")
+            return None
+        try:
+            hit = self.matcher.locate(template, threshold, roi)
+        except Exception as e:
+            self.listener.on_message(f"图像识别失败: {e}")
+            log_error("模板定位异常 %s: %s", template, e)
+            return None
+        if hit is None:
+            self.listener.on_message(f"未找到模板: {self.plan.names[idx]}")
+            log_warning("未找到模板 %s（阈值 %.2f）", template, threshold)
+            return None
+        x, y, score = hit
+        log_debug("模板命中 %s: (%d, %d) 得分 %.3f", template, x, y, score)
+        return x, y
+
+    def _wait_condition(self, idx, x, y):
+        """等待点位的屏幕条件满足；超时、不可用或异常时返回 False"""
+        mode, roi, color, tolerance, timeout = self.plan.waits[idx]
+        if self.waiter is None:
+            self.listener.on_message("条件等待不可用（需要 numpy 和 Pillow）")
+            return False
+        region = roi if roi is not None else (x, y, 1, 1)
+        try:
+            result = self.waiter.wait(
+                region, mode, color, tolerance, timeout, self.stop_event
+            )
+        except Exception as e:
+            self.listener.on_message(f"条件等待失败: {e}")
+            log_error("条件等待异常 %s: %s", region, e)
+            return False
+        self.waited += result.elapsed
+        self.stats.histograms["wait"].record(result.elapsed)
+        if result.met:
+            log_debug(
+                "条件满足 %s %s: %.3fs（%d 次采样）",
+                mode,
+                region,
+                result.elapsed,
+                result.polls,
+            )
+        elif not self.stop_event.is_set():
+            self.listener.on_message(
+                f"等待超时: {self.plan.names[idx]}（{timeout:g}s）"
+            )
+            log_warning("等待超时 %s %s（%.1fs）", mode, region, timeout)
+        return result.met
+
+    def _flow_error(self, message):
+        self.listener.on_message(f"{message}，任务停止")
+        log_error(message)
+        self.stop_event.set()
+
+    def _check_speed(self, elapsed):
+        """本轮实际耗时明显超过计划时，提示输入后端跟不上请求的回放倍率（只提示一次）"""
+        plan = self.plan
+        planned = plan.loop_duration
+        if elapsed <= planned * SPEED_TOLERANCE or elapsed - planned <= SPEED_SLACK:
+            return
+        self.speed_warned = True
+        achieved = plan.speed * planned / elapsed if planned > 0 else 0.0
+        h = self.stats.histograms["input"]
+        input_ms = h.total_us / h.count / 1000.0 if h.count else 0.0
+        msg = (
+            f"回放倍率 {plan.speed:g}x 超出输入后端能力：每轮计划 {planned:.3f}s，"
+            f"实际 {elapsed:.3f}s（输入调用平均 {input_ms:.2f} ms），实际约 {achieved:.2f}x"
+        )
+        self.listener.on_message(msg)
+        log_warning(msg)
+
+    def _wait_if_paused(self):
+        pause_event = self.pause_event
+        stop_event = self.stop_event
+        if not pause_event.is_set():
+            return
+        self.pauses += 1
+        self.listener.on_paused()
+        while pause_event.is_set() and not stop_event.is_set():
+            time.sleep(PAUSE_POLL_INTERVAL)
+        self.scheduler.rebase()
+
+    def _run_loops(self):
+        plan = self.plan
+        backend = self.backend
+        listener = self.listener
+        stats = self.stats
+        sched = self.scheduler
+        stop_event = self.stop_event
+        pause_event = self.pause_event
+        step_mode = self.step_mode
+        input_hist = stats.histograms["input"]
+        interval_hist = stats.histograms["click_interval"]
+        point_ok, point_failed = stats.point_successes, stats.point_failures
+        perf_counter = time.perf_counter
+        last_click = None  # 上一次输入调用完成的时间，用于点击间隔直方图
+
+        loop_count = plan.loop_count
+        offset_px = plan.offset_px
+        rand_delay = plan.rand_delay
+        total_points = len(plan)
+        total_ops = plan.total_ops
+        ops_done = 0
+
+        # 热循环中只按下标读取计划数组
+        ops, xs, ys = plan.ops, plan.xs, plan.ys
+        counts, intervals, delays = plan.counts, plan.intervals, plan.delays
+        names, plan_keys = plan.names, plan.keys
+        jumps, repeats = plan.jumps, plan.repeats
+        loop_delay = self.loop_delay / plan.speed
+
+        for loop in range(loop_count):
+            if stop_event.is_set():
+                break
+            listener.on_message(f"开始第 {loop+1}/{loop_count} 次循环")
+
+            if plan.rel_index:
+                # 相对坐标每轮换算一次，热循环中仍只读 xs/ys
+                rect = self.geometry() if self.geometry is not None else None
+                if rect is None:
+                    listener.on_message(
+                        "目标窗口不可用，无法换算窗口相对坐标，任务停止"
+                    )
+                    log_error("目标窗口不可用，任务停止")
+                    stop_event.set()
+                    break
+                if plan.apply_geometry(rect):
+                    log("目标窗口客户区: %s", rect)
+
+            loop_start = perf_counter()
+            loop_waited = self.waited
+            pauses = self.pauses
+            # 流程控制状态每轮重置
+            pc = 0
+            last_ok = True  # 最近一次 wait / find_and_click 的结果
+            counters = [0] * total_points if plan.has_flow else None
+            stack = []
+            flow_steps = 0
+
+            while pc < total_points:
+                if stop_event.is_set():
+                    break
+
+                op = ops[pc]
+                if op >= OP_LABEL:
+                    flow_steps += 1
+                    if flow_steps > FLOW_STEP_LIMIT:
+                        self._flow_error(
+                            f"连续 {FLOW_STEP_LIMIT} 条流程控制指令没有执行任何操作（死循环）"
+                        )
+                        break
+                    if op == OP_JUMP:
+                        pc = jumps[pc]
+                    elif op == OP_LOOP:
+                        counters[pc] += 1
+                        if counters[pc] < repeats[pc]:
+                            pc = jumps[pc]
+                        else:
+                            counters[pc] = 0
+                            pc += 1
+                    elif op == OP_BRANCH_OK or op == OP_BRANCH_FAIL:
+                        pc = jumps[pc] if last_ok == (op == OP_BRANCH_OK) else pc + 1
+                    elif op == OP_CALL:
+                        if len(stack) >= MAX_CALL_DEPTH:
+                            self._flow_error(f"调用层数超过 {MAX_CALL_DEPTH}")
+                            break
+                        stack.append(pc + 1)
+                        pc = jumps[pc]
+                    elif op == OP_RET:
+                        if not stack:
+                            break  # 顶层的 return 与 end 相同
+                        pc = stack.pop()
+                    elif op == OP_END:
+                        break
+                    else:  # OP_LABEL
+                        pc += 1
+                    continue
+
+                flow_steps = 0
+                idx = pc
+                pc += 1
+
+                # 等待暂停
+                self._wait_if_paused()
+                if stop_event.is_set():
+                    break
+
+                px = xs[idx]
+                py = ys[idx]
+                name = names[idx]
+                listener.on_point(loop, idx, px, py)
+
+                # 调试模式处理
+                if step_mode is not None and step_mode():
+                    listener.on_debug_step(idx)
+                    self.pauses += 1
+                    pause_event.set()
+                    while pause_event.is_set() and not stop_event.is_set():
+                        time.sleep(PAUSE_POLL_INTERVAL)
+                    if stop_event.is_set():
+                        break
+                    sched.rebase()
+
+                click_count = counts[idx]
+
+                if ops[idx] == OP_KEY:
+                    # 键盘操作
+                    keys = plan_keys[idx]
+                    for c in range(click_count):
+                        if stop_event.is_set():
+                            break
+                        if keys and backend.can_send_keys:
+                            try:
+                                t0 = perf_counter()
+                                backend.send_keys(keys)
+                                t1 = perf_counter()
+                                input_hist.record(t1 - t0)
+                                if last_click is not None:
+                                    interval_hist.record(t1 - last_click)
+                                last_click = t1
+                                stats.successful_clicks += 1
+                                point_ok[idx] += 1
+                                listener.on_message(f"执行键盘操作: {keys}")
+                                log_debug("键盘操作: %s", keys)
+                            except Exception as e:
+                                stats.failed_clicks += 1
+                                point_failed[idx] += 1
+                                listener.on_message(f"键盘操作失败: {e}")
+                                log_error("键盘操作异常: %s", e)
+                        ops_done += 1
+                        listener.on_progress(ops_done, total_ops)
+                elif ops[idx] == OP_WAIT:
+                    # 等待时长不可预知，之后从当前时间重新计时，不计为调度迟到
+                    last_ok = self._wait_condition(idx, px, py)
+                    if last_ok:
+                        stats.successful_clicks += 1
+                        point_ok[idx] += 1
+                    elif not stop_event.is_set():
+                        # 超时计为失败，任务继续
+                        stats.failed_clicks += 1
+                        point_failed[idx] += 1
+                    sched.rebase()
+                    ops_done += 1
+                    listener.on_progress(ops_done, total_ops)
+                else:
+                    if ops[idx] == OP_FIND:
+                        hit = self._locate(idx)
+                        last_ok = hit is not None
+                        if hit is None:
+                            # 未找到模板：计为失败并跳过本点位，任务继续
+                            stats.failed_clicks += click_count
+                            stats.total_click_attempts += click_count
+                            point_failed[idx] += click_count
+                            ops_done += click_count
+                            listener.on_progress(ops_done, total_ops)
+                            click_count = 0
+                        else:
+                            px, py = hit
+                            listener.on_point(loop, idx, px, py)
+                    btn = plan.button_name(idx)
+                    base_interval = intervals[idx]
+                    for c in range(click_count):
+                        if stop_event.is_set():
+                            break
+
+                        # 鼠标点击操作 - 应用随机偏移
+                        rx = px
+                        ry = py
+                        if offset_px > 0:
+                            rx = px + random.randint(-offset_px, offset_px)
+                            ry = py + random.randint(-offset_px, offset_px)
+
+                        # 执行点击
+                        try:
+                            # 调试信息：打印实际点击的坐标
+                            listener.on_message(
+                                f"准备点击: ({rx}, {ry}) - 原始坐标: ({px}, {py})"
+                            )
+                            log_debug(
+                                "准备点击: (%d, %d) - 原始坐标: (%d, %d)",
+                                rx,
+                                ry,
+                                px,
+                                py,
+                            )
+
+                            t0 = perf_counter()
+                            backend.click(rx, ry, btn)
+                            t1 = perf_counter()
+                            input_hist.record(t1 - t0)
+                            if last_click is not None:
+                                interval_hist.record(t1 - last_click)
+                            last_click = t1
+                            stats.successful_clicks += 1
+                            point_ok[idx] += 1
+                        except Exception as e:
+                            stats.failed_clicks += 1
+                            point_failed[idx] += 1
+                            listener.on_message(f"点击失败: {e}，任务停止")
+                            log_error("点击异常: %s", e)
+                            stop_event.set()
+                            break
+                        finally:
+                            stats.total_click_attempts += 1
+
+                        listener.on_click(rx, ry)
+                        ops_done += 1
+                        listener.on_progress(ops_done, total_ops)
+
+                        offset_info = f"偏移({rx-px},{ry-py})" if offset_px > 0 else ""
+                        listener.on_message(
+                            f"循环{loop+1}/{loop_count} - 点位{idx+1}/{total_points} - 点击{c+1}/{click_count} {offset_info}"
+                        )
+                        log_debug("点击: %s (%d,%d) 按钮:%s", name, rx, ry, btn)
+
+                        # 点击间隔延时
+                        if c < click_count - 1 and not stop_event.is_set():
+                            click_interval = base_interval
+                            if rand_delay > 0:
+                                click_interval = max(
+                                    0.0,
+                                    click_interval
+                                    + random.uniform(-rand_delay, rand_delay),
+                                )
+                            if sched.wait(click_interval) is None:
+                                break
+
+                listener.on_point_done(idx)
+
+                # 点位间延时
+                if idx < total_points - 1 and not stop_event.is_set():
+                    sched.wait(delays[idx])
+
+            # 完成一次循环
+            stats.loops_completed += 1
+            if (
+                plan.speed > 1.0
+                and not plan.has_flow
+                and not self.speed_warned
+                and pauses == self.pauses
+                and not stop_event.is_set()
+            ):
+                self._check_speed(
+                    perf_counter() - loop_start - (self.waited - loop_waited)
+                )
+
+            # 循环间延时
+            if loop < loop_count - 1 and not stop_event.is_set():
+                sched.wait(loop_delay)
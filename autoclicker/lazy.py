@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+延迟导入
+可选依赖（pyautogui、requests、pystray、PIL、keyboard、win32gui）不在启动时导入：
+- has_module(name): 用 importlib.util.find_spec 探测是否已安装，不执行模块代码
+- lazy_import(name): 返回模块代理，首次访问属性时才真正导入
+"""
+
+import importlib
+import importlib.util
+
+_probe_cache = {}
+
+
+def has_module(name):
+    """探测模块是否可导入（结果缓存）；已安装但导入时报错的情况需在使用处处理"""
+    try:
+        return _probe_cache[name]
+    except KeyError:
+        pass
+    try:
+        found = importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        found = False
+    _probe_cache[name] = found
+    return found
+
+
+class LazyModule:
+    """模块代理：首次访问属性时导入，之后直接转发"""
+
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            module = importlib.import_module(self.__dict__["_name"])
+            self.__dict__["_module"] = module
+        return module
+
+    @property
+    def loaded(self):
+        return self.__dict__["_module"] is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "已导入" if self.loaded else "未导入"
+        return f"<LazyModule {self.__dict__['_name']} ({state})>"
+
+
+def lazy_import(name):
+    return LazyModule(name)
@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+"""
+异步日志写入
+log() 只把消息放入有界队列（O(1)，不做文件 IO），后台线程按批次写入日志文件并输出到 stdout。
+- 批量刷新：队列达到 LOG_BATCH_SIZE 条或每隔 LOG_FLUSH_INTERVAL 秒写一次
+- 过载策略：队列满时丢弃新消息并计数，下一次刷新时写入丢弃条数
+- 合并策略：连续重复的同一条消息只保留一条，并记录重复次数
+- flush_log() 立即写出队列内容（退出前调用），进程退出时 atexit 自动关闭
+- 日志级别：低于当前级别的消息在入队前直接返回；log(msg, *args) 按 % 格式化，
+  格式化推迟到写线程中进行，被过滤的消息不产生任何格式化开销
+- 轮换：文件超过 LOG_MAX_BYTES 或首行时间早于 LOG_MAX_AGE 时轮换为 .1 ~ .LOG_BACKUPS
+"""
+
+import atexit
+import collections
+import datetime
+import os
+import sys
+import threading
+import time
+
+LOG_FILE = "autoclicker_log.txt"
+LOG_QUEUE_SIZE = 10000  # 队列最多缓存的消息条数
+LOG_BATCH_SIZE = 256  # 达到该条数立即唤醒写线程
+LOG_FLUSH_INTERVAL = 0.5  # seconds
+LOG_MAX_BYTES = 2 * 1024 * 1024  # 超过该大小时轮换
+LOG_MAX_AGE = 7 * 24 * 3600  # seconds，文件首行早于该时间时轮换
+LOG_BACKUPS = 3  # 保留的轮换文件数
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LOG_LEVELS = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "ERROR": ERROR}
+LEVEL_NAMES = {value: name for name, value in LOG_LEVELS.items()}
+DEFAULT_LOG_LEVEL = "INFO"
+
+_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def parse_level(level, default=INFO):
+    """接受级别名（不区分大小写）或数值"""
+    if isinstance(level, int):
+        return level
+    if isinstance(level, str):
+        return LOG_LEVELS.get(level.strip().upper(), default)
+    return default
+
+
+def _format_line(ts, level, msg, args=()):
+    now = datetime.datetime.fromtimestamp(ts).strftime(_TIME_FORMAT)
+    if args:
+        try:
+            msg = msg % args
+        except Exception:
+            msg = f"{msg} {args!r}"
+    return f"[{now}] [{LEVEL_NAMES.get(level, level)}] {msg}\n"
+
+
+def rotate_file(path, backups):
+    """path.(n-1) -> path.n ... path -> path.1；backups 为 0 时直接删除 path"""
+    if backups <= 0:
+        os.remove(path)
+        return
+    for i in range(backups - 1, 0, -1):
+        src = f"{path}.{i}"
+        if os.path.exists(src):
+            os.replace(src, f"{path}.{i + 1}")
+    os.replace(path, f"{path}.1")
+
+
+def _file_start_time(path, default):
+    """取日志首行的时间戳作为文件的开始时间"""
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            first = f.readline(64)
+        stamp = datetime.datetime.strptime(first[1:20], _TIME_FORMAT)
+        return stamp.timestamp()
+    except (OSError, ValueError):
+        return default
+
+
+class AsyncLogWriter:
+    def __init__(
+        self,
+        path=LOG_FILE,
+        max_queue=LOG_QUEUE_SIZE,
+        batch_size=LOG_BATCH_SIZE,
+        flush_interval=LOG_FLUSH_INTERVAL,
+        echo=True,
+        level=DEFAULT_LOG_LEVEL,
+        max_bytes=LOG_MAX_BYTES,
+        max_age=LOG_MAX_AGE,
+        backups=LOG_BACKUPS,
+    ):
+        self.path = path
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.echo = echo  # also print to stdout for debugging
+        self.level = parse_level(level)  # 可在运行时直接修改
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.backups = backups
+        self._size = None  # 当前文件大小，首次写入时读取
+        self._sized_path = None
+        self._started = 0.0  # 当前文件的开始时间
+
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()  # 保证批次按顺序写出
+        self._thread = None
+        self._closed = False
+
+        # 过载/合并状态
+        self._dropped = 0
+        self._last_msg = None
+        self._repeat = 0
+        self._repeat_ts = 0.0
+
+    # ---------------- producer side ----------------
+    def write(self, msg, args=(), level=INFO):
+        """写入一条消息（任意线程调用，不阻塞于文件 IO）；args 在写线程中格式化"""
+        if level < self.level:
+            return
+        ts = time.time()
+        with self._cond:
+            if self._closed:
+                # 关闭后的零星消息直接同步写出
+                self._write_lines([_format_line(ts, level, msg, args)])
+                return
+
+            key = (level, msg, args)
+            if key == self._last_msg:
+                self._repeat += 1
+                self._repeat_ts = ts
+                return
+            self._take_repeat_locked()
+            self._last_msg = key
+
+            if len(self._queue) >= self.max_queue:
+                self._dropped += 1
+                return
+            self._queue.append((ts, level, msg, args))
+
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="AsyncLogWriter", daemon=True
+                )
+                self._thread.start()
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify()
+
+    def _take_repeat_locked(self):
+        if self._repeat:
+            if len(self._queue) < self.max_queue:
+                self._queue.append(
+                    (self._repeat_ts, INFO, f"(上一条消息重复 {self._repeat} 次)", ())
+                )
+            else:
+                self._dropped += 1
+            self._repeat = 0
+
+    # ---------------- consumer side ----------------
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._closed:
+                    return
+                if len(self._queue) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """立即写出当前排队的全部消息"""
+        with self._io_lock:
+            with self._cond:
+                self._take_repeat_locked()
+                # 下一条消息即使相同也重新开始计数，避免重复提示跨批次漂移
+                self._last_msg = None
+                if not self._queue and not self._dropped:
+                    return
+                entries = self._queue
+                self._queue = collections.deque()
+                dropped = self._dropped
+                self._dropped = 0
+
+            lines = [_format_line(*entry) for entry in entries]
+            if dropped:
+                lines.append(
+                    _format_line(
+                        time.time(), WARNING, f"日志队列已满，丢弃 {dropped} 条消息"
+                    )
+                )
+            self._write_lines(lines)
+
+    def _write_lines(self, lines):
+        data = "".join(lines)
+        try:
+            encoded = data.encode("utf-8")
+            self._rotate_if_needed(len(encoded))
+            with open(self.path, "ab") as f:
+                f.write(encoded)
+            self._size += len(encoded)
+        except Exception:
+            pass
+        if self.echo and sys.stdout is not None:
+            try:
+                sys.stdout.write(data)
+                sys.stdout.flush()
+            except Exception:
+                pass
+
+    def _rotate_if_needed(self, incoming):
+        now = time.time()
+        if self._size is None or self._sized_path != self.path:
+            self._sized_path = self.path
+            try:
+                self._size = os.path.getsize(self.path)
+                self._started = _file_start_time(self.path, now)
+            except OSError:
+                self._size = 0
+                self._started = now
+        if not self._size:
+            self._started = now
+            return
+        if self._size + incoming > self.max_bytes or now - self._started > self.max_age:
+            if not os.path.isfile(self.path):
+                # 例如基准测试把日志指向 os.devnull
+                self._size = 0
+                return
+            rotate_file(self.path, self.backups)
+            self._size = 0
+            self._started = now
+
+    def close(self):
+        """写出剩余消息并停止后台线程"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2.0)
+        # _closed 后的 write 走同步路径，这里只需写出关闭前排队的内容
+        self.flush()
+
+
+# ------------- module level helpers -------------
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_log_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = AsyncLogWriter()
+    return _writer
+
+
+def log(msg, *args, level=INFO):
+    """log("点击 %s", name)；有 args 时才按 % 格式化，且在写线程中进行"""
+    writer = _writer if _writer is not None else get_log_writer()
+    if level >= writer.level:
+        writer.write(msg, args, level)
+
+
+def log_debug(msg, *args):
+    writer = _writer if _writer is not None else get_log_writer()
+    if writer.level <= DEBUG:
+        writer.write(msg, args, DEBUG)
+
+
+def log_warning(msg, *args):
+    log(msg, *args, level=WARNING)
+
+
+def log_error(msg, *args):
+    log(msg, *args, level=ERROR)
+
+
+def set_log_level(level):
+    """运行时切换日志级别，返回生效的级别名"""
+    writer = get_log_writer()
+    writer.level = parse_level(level, writer.level)
+    return LEVEL_NAMES.get(writer.level, str(writer.level))
+
+
+def get_log_level():
+    return LEVEL_NAMES.get(get_log_writer().level, DEFAULT_LOG_LEVEL)
+
+
+def flush_log():
+    if _writer is not None:
+        _writer.flush()
+
+
+def shutdown_log():
+    if _writer is not None:
+        _writer.close()
+
+
+atexit.register(shutdown_log)
@@ -0,0 +1,464 @@
+# -*- coding: utf-8 -*-
+"""
+多配置并发执行
+多个点位配置（Profile）共用一个输入设备：每个配置按时间展开成动作序列，
+调度线程用最小堆按截止时间取出下一个动作，在唯一的输入后端上依次执行。
+- 仲裁：多个动作同时到期（例如上一次输入调用耗时较长）时，优先级数值小的先执行，
+  被推迟的时间计入该配置的调度迟到直方图
+- 每个配置有自己的暂停/停止状态和 RunStats；暂停的配置移出堆，继续时从当前时间重新计时
+- 全局 pause_event（防误触安全监测）暂停所有配置
+- 含窗口相对坐标的配置在每轮循环的第一个动作前调用 geometry() 重新换算（与 ClickEngine 相同），
+  目标窗口不可用时该配置失败
+"""
+
+import datetime
+import heapq
+import itertools
+import random
+import threading
+import time
+
+from autoclicker.engine import LOOP_DELAY, PAUSE_POLL_INTERVAL, EngineListener
+from autoclicker.logwriter import log, log_debug, log_error
+from autoclicker.plan import OP_KEY
+from autoclicker.stats import RunStats
+from autoclicker.timing import MAX_CATCHUP, SPIN_WINDOW, STOP_POLL_INTERVAL
+
+DEFAULT_PRIORITY = 5  # 数值越小越优先
+
+# 配置状态
+STATE_READY = "ready"
+STATE_RUNNING = "running"
+STATE_PAUSED = "paused"
+STATE_STOPPED = "stopped"
+STATE_DONE = "done"
+STATE_FAILED = "failed"
+
+STATE_LABELS = {
+    STATE_READY: "就绪",
+    STATE_RUNNING: "运行中",
+    STATE_PAUSED: "已暂停",
+    STATE_STOPPED: "已停止",
+    STATE_DONE: "已完成",
+    STATE_FAILED: "失败",
+}
+FINISHED_STATES = frozenset((STATE_STOPPED, STATE_DONE, STATE_FAILED))
+
+
+def plan_steps(plan, loop_delay=LOOP_DELAY):
+    """按执行顺序展开计划，产出 (距上一动作的间隔秒数, 循环, 点位下标, 第几次)
+
+    间隔的含义与 ClickEngine 一致：同一点位的多次点击之间为点击间隔（可加随机延时），
+    键盘操作的重复按键之间没有间隔，点位之间为该点位的延时，
+    循环之间为 loop_delay（按回放倍率缩放）。
+    """
+    n = len(plan)
+    ops, counts = plan.ops, plan.counts
+    intervals, delays = plan.intervals, plan.delays
+    rand_delay = plan.rand_delay
+    loop_delay = loop_delay / plan.speed
+    gap = 0.0
+    for loop in range(plan.loop_count):
+        for idx in range(n):
+            is_key = ops[idx] == OP_KEY
+            interval = intervals[idx]
+            for c in range(counts[idx]):
+                if c and not is_key:
+                    gap = interval
+                    if rand_delay > 0:
+                        gap = max(0.0, gap + random.uniform(-rand_delay, rand_delay))
+                yield gap, loop, idx, c
+                gap = 0.0
+            if idx < n - 1:
+                gap += delays[idx]
+        if loop < plan.loop_count - 1:
+            gap += loop_delay
+
+
+class Profile:
+    """一个参与并发执行的配置；暂停/停止可在任意线程调用"""
+
+    def __init__(
+        self,
+        name,
+        plan,
+        priority=DEFAULT_PRIORITY,
+        listener=None,
+        loop_delay=LOOP_DELAY,
+        points=None,
+        geometry=None,
+    ):
+        self.name = name
+        self.plan = plan
+        # 返回目标窗口客户区或 None，计划含窗口相对坐标时每轮循环调用一次（在调度线程中）
+        self.geometry = geometry
+        self.points = points if points is not None else []  # 原始点位，写报告用
+        self.priority = priority
+        self.listener = listener if listener is not None else EngineListener()
+        self.loop_delay = loop_delay
+        self.stats = RunStats()
+        self.state = STATE_READY
+        self.done_ops = 0
+        self.scheduler = None
+
+        self._steps = None
+        self._step = None  # 下一个动作 (loop, idx, c)
+        self._deadline = 0.0
+        self._seq = 0  # 堆中有效条目的序号，过期条目出堆时丢弃
+        self._last_click = None
+        self._resyncs = 0
+        self._geometry_loop = -1  # 已换算窗口坐标的循环序号
+
+    @property
+    def finished(self):
+        return self.state in FINISHED_STATES
+
+    def pause(self):
+        if self.scheduler is not None:
+            self.scheduler.pause(self)
+
+    def resume(self):
+        if self.scheduler is not None:
+            self.scheduler.resume(self)
+
+    def stop(self):
+        if self.scheduler is not None:
+            self.scheduler.stop(self)
+
+
+class MultiProfileScheduler:
+    def __init__(
+        self,
+        backend,
+        pause_event=None,
+        spin_window=SPIN_WINDOW,
+        on_finished=None,
+    ):
+        self.backend = backend
+        self.pause_event = pause_event  # 全局暂停（所有配置）
+        self.spin_window = max(0.0, spin_window)
+        # on_finished(profile)，在调度线程中调用
+        self.on_finished = on_finished
+        self.profiles = []
+
+        self._heap = []  # (截止时间, 优先级, 序号, profile)
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._globally_paused = False
+        self._thread = None
+
+    # ---------------- control ----------------
+    def add(self, profile):
+        """加入配置并立即开始执行"""
+        if profile.plan.has_flow:
+            # 调度按顺序展开计划（plan_steps），不执行跳转
+            raise ValueError("并发运行不支持流程控制点位")
+        if profile.plan.targets or profile.plan.waits:
+            # 模板定位和条件等待耗时不可预测，会阻塞其他配置的截止时间
+            raise ValueError(
+                "并发运行不支持图像识别（find_and_click）和条件等待（wait）点位"
+            )
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("调度器已关闭")
+            profile.scheduler = self
+            profile._steps = plan_steps(profile.plan, profile.loop_delay)
+            profile.stats.start_time = datetime.datetime.now().isoformat()
+            profile.stats.reset_points(len(profile.plan))
+            self.profiles.append(profile)
+            profile.state = STATE_RUNNING
+            queued = self._advance_locked(profile, time.perf_counter())
+            if queued:
+                self._cond.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="MultiProfileScheduler", daemon=True
+                )
+                self._thread.start()
+        profile.listener.on_message(
+            f"配置 {profile.name} 开始（优先级 {profile.priority}）"
+        )
+        log(f"多配置: {profile.name} 开始，共 {profile.plan.total_ops} 次操作")
+        if not queued:
+            self._notify_finished(profile)
+
+    def pause(self, profile):
+        with self._cond:
+            if profile.state == STATE_RUNNING:
+                # 堆中的条目随之失效
+                profile.state = STATE_PAUSED
+                profile._seq = -1
+                self._cond.notify()
+        profile.listener.on_paused()
+
+    def resume(self, profile):
+        with self._cond:
+            if profile.state != STATE_PAUSED:
+                return
+            profile.state = STATE_RUNNING
+            # 从当前时间重新计时，避免恢复后连续补点击
+            self._push_locked(profile, time.perf_counter())
+            self._cond.notify()
+
+    def stop(self, profile):
+        with self._cond:
+            if profile.finished:
+                return
+            self._finish_locked(profile, STATE_STOPPED)
+            self._cond.notify()
+        self._notify_finished(profile)
+
+    def stop_all(self):
+        for profile in list(self.profiles):
+            self.stop(profile)
+
+    def close(self):
+        self.stop_all()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2.0)
+        try:
+            self.backend.close()
+        except Exception:
+            pass
+
+    @property
+    def active(self):
+        return any(not p.finished for p in self.profiles)
+
+    # ---------------- heap ----------------
+    def _push_locked(self, profile, deadline):
+        seq = next(self._counter)
+        profile._seq = seq
+        profile._deadline = deadline
+        heapq.heappush(self._heap, (deadline, profile.priority, seq, profile))
+
+    def _advance_locked(self, profile, base, push=True):
+        """取出下一个动作并入堆（push=False 时只取出，恢复时由 resume() 入堆）；
+        没有动作时标记完成，返回是否还有动作"""
+        step = next(profile._steps, None)
+        if step is None:
+            profile.stats.loops_completed = profile.plan.loop_count
+            self._finish_locked(profile, STATE_DONE)
+            return False
+        gap, loop, idx, c = step
+        if profile._step is not None and loop > profile._step[0]:
+            profile.stats.loops_completed = loop
+        profile._step = (loop, idx, c)
+        deadline = base + gap
+        now = time.perf_counter()
+        if now - deadline > MAX_CATCHUP:
+            # 落后太多时放弃追赶
+            deadline = now
+            profile._resyncs += 1
+        if push:
+            self._push_locked(profile, deadline)
+        return True
+
+    def _finish_locked(self, profile, state):
+        profile.state = state
+        profile._seq = -1
+        stats = profile.stats
+        stats.end_time = datetime.datetime.now().isoformat()
+        lateness = stats.histograms["lateness"]
+        stats.timing = {
+            "actions": lateness.count,
+            "mean_ms": (
+                lateness.total_us / lateness.count / 1000.0 if lateness.count else 0.0
+            ),
+            "max_ms": lateness.max_us / 1000.0,
+            "resyncs": profile._resyncs,
+        }
+
+    def _notify_finished(self, profile):
+        label = STATE_LABELS.get(profile.state, profile.state)
+        profile.listener.on_message(f"配置 {profile.name} {label}")
+        log(
+            f"多配置: {profile.name} {label}（成功 {profile.stats.successful_clicks}，"
+            f"失败 {profile.stats.failed_clicks}）"
+        )
+        if self.on_finished is not None:
+            try:
+                self.on_finished(profile)
+            except Exception as e:
+                log_error(f"多配置完成回调异常: {e}")
+
+    def _next_due_locked(self):
+        """等待并返回下一个要执行的堆条目；关闭时返回 None"""
+        heap = self._heap
+        pause_event = self.pause_event
+        while True:
+            if self._closed:
+                return None
+            if pause_event is not None and pause_event.is_set():
+                if not self._globally_paused:
+                    self._globally_paused = True
+                    for p in self.profiles:
+                        if p.state == STATE_RUNNING:
+                            p.listener.on_paused()
+                self._cond.wait(PAUSE_POLL_INTERVAL)
+                continue
+            if self._globally_paused:
+                # 全局暂停结束：所有配置从当前时间重新计时
+                self._globally_paused = False
+                now = time.perf_counter()
+                entries = [e for e in heap if e[3]._seq == e[2]]
+                heap[:] = []
+                for _, _, _, p in entries:
+                    self._push_locked(p, now)
+
+            # 丢弃已暂停/停止的配置留下的过期条目
+            while heap and heap[0][3]._seq != heap[0][2]:
+                heapq.heappop(heap)
+            if not heap:
+                self._cond.wait()
+                continue
+
+            now = time.perf_counter()
+            remaining = heap[0][0] - now
+            if remaining > self.spin_window:
+                self._cond.wait(min(remaining - self.spin_window, STOP_POLL_INTERVAL))
+                continue
+
+            # 仲裁：截止时间不晚于当前时间（或堆顶）的条目中，优先级最高的先执行
+            limit = max(now, heap[0][0])
+            due = []
+            while heap and heap[0][0] <= limit:
+                entry = heapq.heappop(heap)
+                if entry[3]._seq == entry[2]:
+                    due.append(entry)
+            if not due:
+                continue
+            best = min(due, key=lambda e: (e[1], e[0], e[2]))
+            for entry in due:
+                if entry is not best:
+                    heapq.heappush(heap, entry)
+            return best
+
+    # ---------------- worker ----------------
+    def _run(self):
+        perf_counter = time.perf_counter
+        while True:
+            with self._cond:
+                entry = self._next_due_locked()
+            if entry is None:
+                return
+            deadline, _, seq, profile = entry
+            # 最后的 spin_window 忙等（不持有锁，其他线程仍可暂停/停止）
+            while perf_counter() < deadline:
+                pass
+            loop = profile._step[0]
+            if profile.plan.rel_index and profile._geometry_loop != loop:
+                ok = self._apply_geometry(profile)
+                profile._geometry_loop = loop
+            else:
+                ok = True
+            if ok:
+                ok = self._execute(profile, deadline)
+            finished = False
+            with self._cond:
+                if profile.finished:
+                    continue  # 执行期间被停止
+                if not ok:
+                    self._finish_locked(profile, STATE_FAILED)
+                    finished = True
+                else:
+                    # 动作已经执行：即使执行期间被暂停也要前进到下一步，
+                    # 否则 resume() 会把刚执行过的动作再入堆一次
+                    running = profile.state == STATE_RUNNING
+                    # 执行期间暂停后又恢复时 resume() 已重新入堆，从当前时间计时
+                    base = deadline if profile._seq == seq else perf_counter()
+                    if not self._advance_locked(profile, base, push=running):
+                        finished = True
+            if finished:
+                self._notify_finished(profile)
+
+    def _apply_geometry(self, profile):
+        """换算窗口相对坐标；目标窗口不可用时返回 False（该配置停止）"""
+        try:
+            rect = profile.geometry() if profile.geometry is not None else None
+        except Exception as e:
+            log_error("多配置 %s 获取目标窗口失败: %s", profile.name, e)
+            rect = None
+        if rect is None:
+            profile.listener.on_message(
+                f"[{profile.name}] 目标窗口不可用，无法换算窗口相对坐标，该配置停止"
+            )
+            return False
+        if profile.plan.apply_geometry(rect):
+            log("多配置 %s 目标窗口客户区: %s", profile.name, rect)
+        return True
+
+    def _execute(self, profile, deadline):
+        """执行一个动作；点击失败返回 False（该配置停止）"""
+        backend = self.backend
+        plan = profile.plan
+        stats = profile.stats
+        listener = profile.listener
+        loop, idx, c = profile._step
+        perf_counter = time.perf_counter
+
+        stats.histograms["lateness"].record(max(0.0, perf_counter() - deadline))
+        px = plan.xs[idx]
+        py = plan.ys[idx]
+        if c == 0:
+            listener.on_point(loop, idx, px, py)
+
+        ok = True
+        if plan.ops[idx] == OP_KEY:
+            keys = plan.keys[idx]
+            if keys and backend.can_send_keys:
+                try:
+                    t0 = perf_counter()
+                    backend.send_keys(keys)
+                    self._record_input(profile, t0, perf_counter())
+                    stats.successful_clicks += 1
+                    stats.point_successes[idx] += 1
+                    log_debug("多配置 %s 键盘操作: %s", profile.name, keys)
+                except Exception as e:
+                    stats.failed_clicks += 1
+                    stats.point_failures[idx] += 1
+                    listener.on_message(f"[{profile.name}] 键盘操作失败: {e}")
+                    log_error("多配置 %s 键盘操作异常: %s", profile.name, e)
+        else:
+            rx = px
+            ry = py
+            offset_px = plan.offset_px
+            if offset_px > 0:
+                rx = px + random.randint(-offset_px, offset_px)
+                ry = py + random.randint(-offset_px, offset_px)
+            try:
+                t0 = perf_counter()
+                backend.click(rx, ry, plan.button_name(idx))
+                self._record_input(profile, t0, perf_counter())
+                stats.successful_clicks += 1
+                stats.point_successes[idx] += 1
+                log_debug("多配置 %s 点击: (%d,%d)", profile.name, rx, ry)
+            except Exception as e:
+                stats.failed_clicks += 1
+                stats.point_failures[idx] += 1
+                listener.on_message(f"[{profile.name}] 点击失败: {e}，该配置停止")
+                log_error("多配置 %s 点击异常: %s", profile.name, e)
+                ok = False
+            finally:
+                stats.total_click_attempts += 1
+            if ok:
+                listener.on_click(rx, ry)
+
+        profile.done_ops += 1
+        listener.on_progress(profile.done_ops, plan.total_ops)
+        if c == plan.counts[idx] - 1:
+            listener.on_point_done(idx)
+        return ok
+
+    @staticmethod
+    def _record_input(profile, t0, t1):
+        histograms = profile.stats.histograms
+        histograms["input"].record(t1 - t0)
+        if profile._last_click is not None:
+            histograms["click_interval"].record(t1 - profile._last_click)
+        profile._last_click = t1
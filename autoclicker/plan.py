@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+执行计划编译
+启动任务前把 click_points（dict 列表）和运行参数编译成紧凑的数组结构：
+每个点位一条记录（操作码、坐标、按键、次数、间隔、延时），执行循环只需按下标读取数组，
+不再在每次点击时 p.get(...)、拼接字符串、判断 action_type。
+计划是启动时的快照，运行中在界面上编辑点位不会影响正在执行的任务。
+窗口相对坐标（client / ratio）的点位保存原始值，apply_geometry() 按目标窗口客户区
+一次性换算到 xs/ys；引擎每轮循环调用一次，窗口未移动时直接返回。
+回放速度（speed）在编译时作用于所有间隔和延时，修改速度不需要逐个编辑点位。
+流程控制点位（标签、跳转、计数循环、条件分支、调用/返回）与普通点位编译在同一组数组中，
+跳转目标在编译时解析为下标（jumps），引擎按程序计数器执行，不再查找标签。
+"""
+
+from array import array
+
+# 操作码
+OP_CLICK = 0
+OP_KEY = 1
+OP_FIND = 2  # 先在屏幕上定位模板图片，再点击匹配位置
+OP_WAIT = 3  # 等到屏幕区域满足条件（不点击）
+# 流程控制指令（操作码都不小于 OP_LABEL，引擎用一次比较区分）
+OP_LABEL = 8
+OP_JUMP = 9
+OP_LOOP = 10  # 计数器未到 repeats 时跳回 jumps
+OP_BRANCH_OK = 11  # 最近一次 wait / find_and_click 成功时跳转
+OP_BRANCH_FAIL = 12
+OP_CALL = 13
+OP_RET = 14  # 调用栈为空时结束本轮循环
+OP_END = 15
+
+ACTION_OPCODES = {
+    "click": OP_CLICK,
+    "keyboard": OP_KEY,
+    "find_and_click": OP_FIND,
+    "wait": OP_WAIT,
+    "label": OP_LABEL,
+    "jump": OP_JUMP,
+    "loop": OP_LOOP,
+    "call": OP_CALL,
+    "return": OP_RET,
+    "end": OP_END,
+}
+MAX_CALL_DEPTH = 64
+ESTIMATE_STEPS = 1_000_000  # 估算操作数时最多模拟的指令数
+
+# 坐标模式：absolute 屏幕坐标；client 相对目标窗口客户区左上角的像素；
+# ratio 相对客户区宽高的万分比（整数，与其他模式一样按整数保存和编辑）
+COORD_ABSOLUTE = 0
+COORD_CLIENT = 1
+COORD_RATIO = 2
+COORD_MODES = {"absolute": COORD_ABSOLUTE, "client": COORD_CLIENT, "ratio": COORD_RATIO}
+RATIO_SCALE = 10000
+
+# 回放速度倍率范围：间隔和延时在编译时除以倍率
+SPEED_MIN = 0.25
+SPEED_MAX = 20.0
+
+# 鼠标键编码
+BUTTONS = ("left", "right", "middle")
+_BUTTON_CODES = {name: i for i, name in enumerate(BUTTONS)}
+
+
+class ActionPlan:
+    __slots__ = (
+        "ops",
+        "xs",
+        "ys",
+        "buttons",
+        "counts",
+        "intervals",
+        "delays",
+        "names",
+        "keys",
+        "targets",
+        "waits",
+        "jumps",
+        "repeats",
+        "has_flow",
+        "loop_count",
+        "offset_px",
+        "rand_delay",
+        "total_ops",
+        "speed",
+        "loop_duration",
+        "rel_index",
+        "raw_xs",
+        "raw_ys",
+        "rel_modes",
+        "geometry",
+    )
+
+    def __init__(self, loop_count=1, offset_px=0, rand_delay=0.0, speed=1.0):
+        self.ops = array("B")
+        self.xs = array("i")
+        self.ys = array("i")
+        self.buttons = array("B")
+        self.counts = array("I")
+        self.intervals = array("d")
+        self.delays = array("d")
+        self.names = ()
+        self.keys = ()
+        self.targets = {}  # OP_FIND 点位下标 -> (模板路径, 阈值, roi)
+        # OP_WAIT 点位下标 -> (等待条件, roi, 颜色, 容差, 超时)；roi 为 None 时观察 xs/ys 处的像素
+        self.waits = {}
+        self.jumps = array("i")  # 流程控制指令的目标下标，其他为 -1
+        self.repeats = array("I")  # OP_LOOP 的执行次数
+        self.has_flow = False
+        self.loop_count = loop_count
+        self.offset_px = offset_px
+        self.rand_delay = rand_delay
+        self.total_ops = 0
+        self.speed = speed
+        self.loop_duration = 0.0  # 每轮循环计划的等待总时长（秒，已按倍率缩放）
+        # 窗口相对坐标的点位：下标、原始坐标和模式（与 xs/ys 分开保存）
+        self.rel_index = array("I")
+        self.raw_xs = array("i")
+        self.raw_ys = array("i")
+        self.rel_modes = array("B")
+        self.geometry = None  # 上次换算使用的客户区 (left, top, width, height)
+
+    def __len__(self):
+        return len(self.ops)
+
+    def button_name(self, index):
+        return BUTTONS[self.buttons[index]]
+
+    def apply_geometry(self, rect):
+        """按客户区 (left, top, width, height) 换算相对坐标；几何未变化时返回 False"""
+        if rect == self.geometry:
+            return False
+        left, top, width, height = rect
+        xs, ys = self.xs, self.ys
+        raw_xs, raw_ys, modes = self.raw_xs, self.raw_ys, self.rel_modes
+        half = RATIO_SCALE // 2
+        for k, i in enumerate(self.rel_index):
+            if modes[k] == COORD_RATIO:
+                xs[i] = left + (raw_xs[k] * width + half) // RATIO_SCALE
+                ys[i] = top + (raw_ys[k] * height + half) // RATIO_SCALE
+            else:
+                xs[i] = left + raw_xs[k]
+                ys[i] = top + raw_ys[k]
+        self.geometry = rect
+        return True
+
+
+def screen_to_relative(mode, x, y, rect):
+    """把屏幕坐标换算为指定模式下保存的坐标（捕获点位时使用）"""
+    code = COORD_MODES.get(mode, COORD_ABSOLUTE)
+    if code == COORD_ABSOLUTE:
+        return x, y
+    left, top, width, height = rect
+    if code == COORD_CLIENT:
+        return x - left, y - top
+    return (
+        round((x - left) * RATIO_SCALE / max(1, width)),
+        round((y - top) * RATIO_SCALE / max(1, height)),
+    )
+
+
+def clamp_speed(speed):
+    try:
+        speed = float(speed)
+    except (TypeError, ValueError):
+        return 1.0
+    return min(SPEED_MAX, max(SPEED_MIN, speed))
+
+
+def compile_plan(points, loop_count=1, offset_px=0, rand_delay=0.0, speed=1.0):
+    """把点位列表编译为 ActionPlan（点位缺失的字段使用与界面一致的默认值）
+
+    speed 为回放速度倍率（SPEED_MIN ~ SPEED_MAX），点击间隔、点位延时和随机延时都除以倍率。
+    """
+    speed = clamp_speed(speed)
+    scale = 1.0 / speed
+    plan = ActionPlan(
+        loop_count=max(0, int(loop_count)),
+        offset_px=max(0, int(offset_px)),
+        rand_delay=max(0.0, float(rand_delay)) * scale,
+        speed=speed,
+    )
+    names = []
+    keys = []
+    labels = {
+        p.get("label"): i
+        for i, p in enumerate(points)
+        if p.get("action_type") == "label"
+    }
+    for i, p in enumerate(points):
+        action_type = p.get("action_type", "click")
+        op = ACTION_OPCODES.get(action_type, OP_CLICK)
+        if action_type == "branch":
+            op = OP_BRANCH_OK if p.get("when") == "ok" else OP_BRANCH_FAIL
+        target = -1
+        if op >= OP_LABEL:
+            plan.has_flow = True
+            if op not in (OP_LABEL, OP_RET, OP_END):
+                if p.get("target") not in labels:
+                    raise ValueError(
+                        f"第 {i + 1} 个点位: 标签不存在 {p.get('target')!r}"
+                    )
+                target = labels[p.get("target")]
+        plan.jumps.append(target)
+        plan.repeats.append(max(1, int(p.get("count", 1))) if op == OP_LOOP else 0)
+        x = int(p.get("x", 0))
+        y = int(p.get("y", 0))
+        mode = COORD_MODES.get(p.get("coord_mode", "absolute"), COORD_ABSOLUTE)
+        if op == OP_FIND:
+            # 点击位置由模板匹配决定，x/y 只作显示用
+            mode = COORD_ABSOLUTE
+            roi = p.get("roi")
+            plan.targets[i] = (
+                p.get("template", ""),
+                float(p.get("threshold", 0.85)),
+                tuple(roi) if roi else None,
+            )
+        elif op == OP_WAIT:
+            roi = p.get("roi")
+            color = p.get("color")
+            # 超时是实际等待的上限，不随回放倍率缩放
+            plan.waits[i] = (
+                p.get("wait_mode", "change"),
+                tuple(roi) if roi else None,
+                tuple(color) if color else None,
+                int(p.get("tolerance", 24)),
+                float(p.get("timeout", 10.0)),
+            )
+        if mode != COORD_ABSOLUTE and op != OP_KEY and op < OP_LABEL:
+            plan.rel_index.append(i)
+            plan.raw_xs.append(x)
+            plan.raw_ys.append(y)
+            plan.rel_modes.append(mode)
+        plan.ops.append(op)
+        plan.xs.append(x)
+        plan.ys.append(y)
+        plan.buttons.append(_BUTTON_CODES.get(p.get("button", "left"), 0))
+        if op >= OP_LABEL:
+            # 流程控制指令不计入操作数，也没有延时
+            plan.counts.append(0)
+            plan.intervals.append(0.0)
+            plan.delays.append(0.0)
+        else:
+            plan.counts.append(
+                1 if op == OP_WAIT else max(0, int(p.get("click_count", 1)))
+            )
+            plan.intervals.append(max(0.0, float(p.get("click_interval", 0.1))) * scale)
+            plan.delays.append(max(0.0, float(p.get("delay", 1.0))) * scale)
+        names.append(str(p.get("name", f"点位{i+1}")))
+        keys.append(p.get("keys", "") if op == OP_KEY else "")
+
+    plan.names = tuple(names)
+    plan.keys = tuple(keys)
+    if plan.has_flow:
+        plan.total_ops = estimate_ops(plan) * plan.loop_count
+    else:
+        plan.total_ops = sum(plan.counts) * plan.loop_count
+    # 与引擎的等待方式一致：同一点位的多次点击之间为间隔，最后一个点位之后没有延时
+    # （条件等待的时长不可预知，不计入）
+    duration = sum(plan.delays[:-1])
+    for count, interval in zip(plan.counts, plan.intervals):
+        if count > 1:
+            duration += (count - 1) * interval
+    plan.loop_duration = duration
+    return plan
+
+
+def estimate_ops(plan):
+    """模拟执行一轮（假设等待和匹配都成功），返回操作数；无法结束时返回 0（未知）"""
+    ops, jumps, repeats, counts = plan.ops, plan.jumps, plan.repeats, plan.counts
+    n = len(ops)
+    counters = [0] * n
+    stack = []
+    total = 0
+    pc = 0
+    for _ in range(ESTIMATE_STEPS):
+        if pc >= n:
+            return total
+        op = ops[pc]
+        if op < OP_LABEL:
+            total += counts[pc]
+            pc += 1
+        elif op == OP_JUMP or op == OP_BRANCH_OK:
+            pc = jumps[pc]
+        elif op == OP_LOOP:
+            counters[pc] += 1
+            if counters[pc] < repeats[pc]:
+                pc = jumps[pc]
+            else:
+                counters[pc] = 0
+                pc += 1
+        elif op == OP_CALL:
+            if len(stack) >= MAX_CALL_DEPTH:
+                return 0
+            stack.append(pc + 1)
+            pc = jumps[pc]
+        elif op == OP_RET:
+            if not stack:
+                return total
+            pc = stack.pop()
+        elif op == OP_END:
+            return total
+        else:  # OP_LABEL / OP_BRANCH_FAIL
+            pc += 1
+    return 0
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+进度消息缓冲
+工作线程只调用 push()（加锁追加到环形缓冲），界面线程按固定帧率 drain() 后批量插入文本框。
+缓冲满时最旧的消息被覆盖，drain() 返回自上次以来被丢弃的条数。
+"""
+
+import collections
+import threading
+import time
+
+PROGRESS_BUFFER_SIZE = 2000  # 两次 drain 之间最多保留的消息条数
+
+
+class ProgressSink:
+    def __init__(self, capacity=PROGRESS_BUFFER_SIZE):
+        self._lines = collections.deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._dropped = 0
+        self.total_dropped = 0
+
+    def push(self, text):
+        """追加一条消息（任意线程调用）"""
+        line = f"{time.strftime('%H:%M:%S')} - {text}\n"
+        with self._lock:
+            if len(self._lines) == self._lines.maxlen:
+                self._dropped += 1
+            self._lines.append(line)
+
+    def drain(self):
+        """取出全部待显示消息，返回 (lines, dropped)"""
+        with self._lock:
+            if not self._lines and not self._dropped:
+                return [], 0
+            lines = list(self._lines)
+            self._lines.clear()
+            dropped = self._dropped
+            self._dropped = 0
+        self.total_dropped += dropped
+        return lines, dropped
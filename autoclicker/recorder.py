@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+"""
+宏录制
+录制鼠标点击和按键，停止后转换为带原始时间间隔的点位列表。
+- EventBuffer: 预分配的数组缓冲（时间、类型、坐标、代码各一个 array），
+  写入一次只是几次下标赋值，不为每个事件创建对象；写满后拒绝写入，从不覆盖已录制的事件
+- MacroRecorder: 录制状态与事件写入（鼠标采样线程和键盘钩子线程都可调用）；
+  缓冲写满时停止接收事件并调用 on_full，由界面结束录制。
+  按住按键时的自动重复只记录第一次按下
+- MouseSampler: Windows 下轮询 GetAsyncKeyState 产生鼠标按下/抬起事件（坐标取自按键变化时的光标位置），
+  不需要额外的钩子库；位置和按键状态的读取函数可替换，便于在其他平台测试。
+  输入后端没有移动操作，鼠标移动不会被回放，因此不写入缓冲
+- events_to_points(): 按下/抬起合并为点击，同一位置的连续点击合并为多次点击，
+  点位之间的间隔写入 delay
+"""
+
+import sys
+import threading
+import time
+from array import array
+
+EV_DOWN = 1
+EV_UP = 2
+EV_KEY_DOWN = 3
+EV_KEY_UP = 4
+
+RECORD_CAPACITY = 1 << 18  # 点击/按键事件数，约 5 MB
+RECORD_POLL_INTERVAL = 0.004  # seconds，鼠标采样间隔
+MULTI_CLICK_TIME = 0.5  # seconds，该时间内同一位置的点击合并为多次点击
+MULTI_CLICK_RADIUS = 4  # px
+
+# 与 plan.BUTTONS 顺序一致
+RECORD_BUTTONS = ("left", "right", "middle")
+MODIFIER_KEYS = frozenset(
+    (
+        "ctrl",
+        "left ctrl",
+        "right ctrl",
+        "shift",
+        "left shift",
+        "right shift",
+        "alt",
+        "left alt",
+        "right alt",
+        "alt gr",
+        "windows",
+        "left windows",
+        "right windows",
+    )
+)
+
+
+class EventBuffer:
+    __slots__ = ("capacity", "times", "kinds", "xs", "ys", "codes", "written")
+
+    def __init__(self, capacity=RECORD_CAPACITY):
+        capacity = max(1, int(capacity))
+        self.capacity = capacity
+        self.times = array("d", bytes(8 * capacity))
+        self.kinds = array("B", bytes(capacity))
+        self.xs = array("i", bytes(4 * capacity))
+        self.ys = array("i", bytes(4 * capacity))
+        self.codes = array("H", bytes(2 * capacity))
+        self.written = 0  # 已写入数，也是下一个写入位置
+
+    def push(self, t, kind, x, y, code):
+        """写入一个事件；缓冲已满时返回 False"""
+        i = self.written
+        if i >= self.capacity:
+            return False
+        self.times[i] = t
+        self.kinds[i] = kind
+        self.xs[i] = x
+        self.ys[i] = y
+        self.codes[i] = code
+        self.written = i + 1
+        return True
+
+    def __len__(self):
+        return self.written
+
+    @property
+    def full(self):
+        return self.written >= self.capacity
+
+    def clear(self):
+        self.written = 0
+
+    def events(self):
+        """按写入顺序产出 (t, kind, x, y, code)"""
+        for i in range(self.written):
+            yield self.times[i], self.kinds[i], self.xs[i], self.ys[i], self.codes[i]
+
+
+class MacroRecorder:
+    def __init__(self, capacity=RECORD_CAPACITY, clock=time.perf_counter, on_full=None):
+        self.buffer = EventBuffer(capacity)
+        self.clock = clock
+        self.on_full = on_full  # 缓冲写满时调用一次（在写入事件的线程中）
+        self.recording = False
+        self.full = False
+        self.started_at = 0.0
+        self.stopped_at = 0.0
+        self.key_names = []  # 按键代码 -> 按键名（新按键第一次出现时登记）
+        self._key_codes = {}
+        self._keys_down = set()  # 已按下未抬起的按键代码，用于去掉自动重复
+        self._lock = threading.Lock()  # 鼠标线程与键盘钩子线程都会写入
+
+    def start(self):
+        with self._lock:
+            self.buffer.clear()
+            self._keys_down.clear()
+            self.full = False
+            self.started_at = self.clock()
+            self.recording = True
+
+    def stop(self):
+        """停止录制，返回录制时长（秒）"""
+        with self._lock:
+            self.recording = False
+            self.stopped_at = self.clock()
+        return self.stopped_at - self.started_at
+
+    def record(self, kind, x=0, y=0, code=0, t=None):
+        if not self.recording or self.full:
+            return
+        if t is None:
+            t = self.clock()
+        with self._lock:
+            if self.buffer.push(t - self.started_at, kind, x, y, code):
+                return
+            # 已录制的事件一个都不丢：写满后不再接收，由界面结束录制
+            self.full = True
+        if self.on_full is not None:
+            self.on_full()
+
+    def key_code(self, name):
+        code = self._key_codes.get(name)
+        if code is None:
+            with self._lock:
+                code = self._key_codes.setdefault(name, len(self.key_names))
+                if code == len(self.key_names):
+                    self.key_names.append(name)
+        return code
+
+    def on_key_event(self, event):
+        """keyboard.hook 回调"""
+        if not self.recording or not event.name:
+            return
+        code = self.key_code(event.name.lower())
+        if event.event_type == "down":
+            if code in self._keys_down:
+                return  # 按住不放时的自动重复
+            self._keys_down.add(code)
+            self.record(EV_KEY_DOWN, code=code)
+        else:
+            self._keys_down.discard(code)
+            self.record(EV_KEY_UP, code=code)
+
+    def discard_last_click(self):
+        """丢弃最后一次鼠标按下及其后的事件（用界面按钮停止录制时，去掉那次点击）"""
+        buffer = self.buffer
+        with self._lock:
+            for n in range(buffer.written - 1, -1, -1):
+                if buffer.kinds[n] == EV_DOWN:
+                    buffer.written = n
+                    return True
+        return False
+
+    def to_points(self, ignore_keys=(), name_prefix="录制"):
+        return events_to_points(
+            self.buffer.events(),
+            self.key_names,
+            ignore_keys=ignore_keys,
+            name_prefix=name_prefix,
+        )
+
+
+def events_to_points(events, key_names, ignore_keys=(), name_prefix="录制"):
+    """把事件序列转换为点位列表（与 config.normalize_points 的字段一致）"""
+    ignore = frozenset(k.lower() for k in ignore_keys)
+    actions = []  # [开始时间, 结束时间, 点位 dict]
+    held = []  # 按住的修饰键（按下顺序）
+    pressed = set()  # 按住的其他按键，重复的按下事件视为自动重复
+    combo_used = False  # 修饰键按住期间是否已产生组合键
+    for t, kind, x, y, code in events:
+        if kind == EV_DOWN:
+            button = RECORD_BUTTONS[code] if code < len(RECORD_BUTTONS) else "left"
+            last = actions[-1] if actions else None
+            if (
+                last is not None
+                and last[2]["action_type"] == "click"
+                and last[2]["button"] == button
+                and t - last[1] <= MULTI_CLICK_TIME
+                and abs(last[2]["x"] - x) <= MULTI_CLICK_RADIUS
+                and abs(last[2]["y"] - y) <= MULTI_CLICK_RADIUS
+            ):
+                p = last[2]
+                if p["click_count"] == 1:
+                    p["click_interval"] = round(t - last[1], 3)
+                p["click_count"] += 1
+                last[1] = t
+                continue
+            point = {
+                "x": x,
+                "y": y,
+                "button": button,
+                "click_count": 1,
+                "click_interval": 0.0,
+                "keys": "",
+                "action_type": "click",
+            }
+            actions.append([t, t, point])
+        elif kind in (EV_KEY_DOWN, EV_KEY_UP):
+            name = key_names[code]
+            if name in ignore:
+                continue
+            if name in MODIFIER_KEYS:
+                if kind == EV_KEY_DOWN:
+                    if name not in held:
+                        held.append(name)
+                        combo_used = False
+                elif name in held:
+                    if not combo_used:
+                        keys = "+".join(held)
+                        actions.append([t, t, _key_point(keys)])
+                        combo_used = True
+                    held.remove(name)
+                continue
+            if kind == EV_KEY_UP:
+                pressed.discard(name)
+            elif name not in pressed:
+                pressed.add(name)
+                keys = "+".join(held + [name])
+                combo_used = True
+                actions.append([t, t, _key_point(keys)])
+
+    points = []
+    for i, (start, end, point) in enumerate(actions):
+        # 点位的 delay 是执行完本点位后到下一个点位开始的等待时间
+        if i + 1 < len(actions):
+            point["delay"] = round(max(0.0, actions[i + 1][0] - end), 3)
+        else:
+            point["delay"] = 0.0
+        point["name"] = f"{name_prefix}{i + 1}"
+        points.append(point)
+    return points
+
+
+def _key_point(keys):
+    return {
+        "x": 0,
+        "y": 0,
+        "button": "left",
+        "click_count": 1,
+        "click_interval": 0.0,
+        "keys": keys,
+        "action_type": "keyboard",
+    }
+
+
+def _win32_mouse_state():
+    """返回 (读取位置, 读取按键状态) 两个函数；非 Windows 时抛出 RuntimeError"""
+    if sys.platform != "win32":
+        raise RuntimeError("录制鼠标操作需要 Windows")
+    import ctypes
+    from ctypes import wintypes
+
+    user32 = ctypes.windll.user32
+    point = wintypes.POINT()
+    point_ref = ctypes.byref(point)
+    get_key = user32.GetAsyncKeyState
+    vkeys = (0x01, 0x02, 0x04)  # VK_LBUTTON, VK_RBUTTON, VK_MBUTTON
+
+    def position():
+        user32.GetCursorPos(point_ref)
+        return point.x, point.y
+
+    def buttons():
+        # 最高位表示当前按下，最低位表示上次查询后按下过（捕获采样间隔内的快速点击）
+        state = 0
+        for bit, vk in enumerate(vkeys):
+            s = get_key(vk)
+            if s & 0x8000:
+                state |= 1 << bit
+            elif s & 1:
+                state |= 1 << (bit + 3)
+        return state
+
+    return position, buttons
+
+
+class MouseSampler:
+    """后台线程按 interval 采样鼠标键，变化时连同光标位置写入 recorder"""
+
+    def __init__(
+        self, recorder, interval=RECORD_POLL_INTERVAL, position=None, buttons=None
+    ):
+        if position is None or buttons is None:
+            position, buttons = _win32_mouse_state()
+        self.recorder = recorder
+        self.interval = interval
+        self.position = position
+        self.buttons = buttons
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="MouseSampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _run(self):
+        record = self.recorder.record
+        clock = self.recorder.clock
+        position, buttons = self.position, self.buttons
+        last_state = 0
+        wait = self._stop.wait
+        interval = self.interval
+        while not wait(interval):
+            t = clock()
+            state = buttons()
+            if state == last_state:
+                continue
+            x, y = position()
+            for bit in range(len(RECORD_BUTTONS)):
+                mask = 1 << bit
+                if state & (mask << 3):
+                    # 两次采样之间完成的点击：补一对按下/抬起
+                    record(EV_DOWN, x, y, bit, t)
+                    record(EV_UP, x, y, bit, t)
+                elif (state ^ last_state) & mask:
+                    record(EV_DOWN if state & mask else EV_UP, x, y, bit, t)
+            last_state = state & 0b111
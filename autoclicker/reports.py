@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+执行报告
+每次任务结束追加一行 JSON（JSONL）：参数、逐点统计、计数器和延迟分位数。
+- append_report(): 单次 write 追加一行，文件超过 REPORT_MAX_BYTES 时先轮换
+  （path -> path.1 -> ... -> path.REPORT_BACKUPS）
+- iter_reports(): 按时间顺序逐行读取当前文件和轮换文件，跳过损坏的行
+- export_reports(): 流式导出为 CSV / JSON / JSONL，内存占用与文件大小无关
+"""
+
+import csv
+import datetime
+import json
+import os
+
+from autoclicker.logwriter import rotate_file
+from autoclicker.stats import HISTOGRAMS
+
+REPORT_FILE = "click_report.jsonl"
+REPORT_MAX_BYTES = 5 * 1024 * 1024  # 超过该大小时轮换
+REPORT_BACKUPS = 3  # 保留的轮换文件数
+REPORT_SCHEMA_VERSION = 1
+
+EXPORT_FORMATS = ("csv", "json", "jsonl")
+
+# CSV 每次任务一行；逐点统计只在 JSON / JSONL 中保留
+CSV_COLUMNS = (
+    "written_at",
+    "version",
+    "completed",
+    "backend",
+    "point_count",
+    "loops",
+    "random_offset",
+    "random_delay",
+    "speed",
+    "start_time",
+    "end_time",
+    "total_click_attempts",
+    "successful_clicks",
+    "failed_clicks",
+    "loops_completed",
+    "lateness_mean_ms",
+    "lateness_max_ms",
+    "resyncs",
+)
+CSV_HISTOGRAM_FIELDS = ("p50_ms", "p99_ms", "max_ms")
+
+
+def build_run_report(snapshot, points, params=None, version=None, completed=None):
+    """由 RunStats.snapshot(points=True) 和点位列表组装一条报告"""
+    successes = snapshot.get("point_successes") or []
+    failures = snapshot.get("point_failures") or []
+    point_records = []
+    for i, p in enumerate(points):
+        point_records.append(
+            {
+                "index": i,
+                "name": p.get("name"),
+                "x": p.get("x"),
+                "y": p.get("y"),
+                "coord_mode": p.get("coord_mode", "absolute"),
+                "action_type": p.get("action_type", "click"),
+                "button": p.get("button"),
+                "delay": p.get("delay"),
+                "click_count": p.get("click_count"),
+                "click_interval": p.get("click_interval"),
+                "successful": successes[i] if i < len(successes) else 0,
+                "failed": failures[i] if i < len(failures) else 0,
+            }
+        )
+    return {
+        "schema_version": REPORT_SCHEMA_VERSION,
+        "written_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "version": version,
+        "completed": completed,
+        "params": dict(params or {}),
+        "stats": {
+            key: snapshot.get(key)
+            for key in (
+                "total_click_attempts",
+                "successful_clicks",
+                "failed_clicks",
+                "loops_completed",
+                "start_time",
+                "end_time",
+            )
+        },
+        "timing": snapshot.get("timing"),
+        "histograms": snapshot.get("histograms") or {},
+        "points": point_records,
+    }
+
+
+def report_paths(path=REPORT_FILE, backups=REPORT_BACKUPS):
+    """从旧到新的报告文件（只包含存在的文件）"""
+    paths = [f"{path}.{i}" for i in range(backups, 0, -1)] + [path]
+    return [p for p in paths if os.path.exists(p)]
+
+
+def append_report(
+    record, path=REPORT_FILE, max_bytes=REPORT_MAX_BYTES, backups=REPORT_BACKUPS
+):
+    line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+    data = line.encode("utf-8")
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        size = 0
+    if size and size + len(data) > max_bytes:
+        rotate_file(path, backups)
+    # 二进制追加、一次写入，避免与其他进程交错出半行
+    with open(path, "ab") as f:
+        f.write(data)
+
+
+def iter_reports(path=REPORT_FILE, backups=REPORT_BACKUPS):
+    """逐行产出报告 dict；不是合法 JSON 对象的行会被跳过"""
+    for p in report_paths(path, backups):
+        with open(p, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict):
+                    yield record
+
+
+def _csv_row(record):
+    params = record.get("params") or {}
+    stats = record.get("stats") or {}
+    timing = record.get("timing") or {}
+    row = [
+        record.get("written_at"),
+        record.get("version"),
+        record.get("completed"),
+        params.get("backend"),
+        len(record.get("points") or ()),
+        params.get("loops"),
+        params.get("random_offset"),
+        params.get("random_delay"),
+        params.get("speed"),
+        stats.get("start_time"),
+        stats.get("end_time"),
+        stats.get("total_click_attempts"),
+        stats.get("successful_clicks"),
+        stats.get("failed_clicks"),
+        stats.get("loops_completed"),
+        timing.get("mean_ms"),
+        timing.get("max_ms"),
+        timing.get("resyncs"),
+    ]
+    histograms = record.get("histograms") or {}
+    for name in HISTOGRAMS:
+        h = histograms.get(name) or {}
+        row.extend(h.get(field) for field in CSV_HISTOGRAM_FIELDS)
+    return row
+
+
+def export_reports(dest, fmt=None, path=REPORT_FILE, backups=REPORT_BACKUPS):
+    """把所有报告流式导出到 dest；fmt 缺省时按扩展名判断，返回导出的条数"""
+    if fmt is None:
+        ext = os.path.splitext(dest)[1].lower().lstrip(".")
+        fmt = ext if ext in EXPORT_FORMATS else "jsonl"
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"不支持的导出格式: {fmt}")
+
+    count = 0
+    records = iter_reports(path, backups)
+    if fmt == "csv":
+        # utf-8-sig 让 Excel 正确识别中文
+        with open(dest, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            header = list(CSV_COLUMNS)
+            for name in HISTOGRAMS:
+                header.extend(f"{name}_{field}" for field in CSV_HISTOGRAM_FIELDS)
+            writer.writerow(header)
+            for record in records:
+                writer.writerow(_csv_row(record))
+                count += 1
+    elif fmt == "json":
+        with open(dest, "w", encoding="utf-8") as f:
+            f.write("[")
+            for record in records:
+                f.write(",\n" if count else "\n")
+                json.dump(record, f, ensure_ascii=False)
+                count += 1
+            f.write("\n]\n")
+    else:
+        with open(dest, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+                f.write("\n")
+                count += 1
+    return count
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+防误触安全监测
+在独立线程中采样鼠标位置，与界面刷新解耦：
+- 任务运行中按 SAFETY_ACTIVE_INTERVAL 快速采样
+- 任务暂停时降到 SAFETY_PAUSED_INTERVAL，只刷新基准位置
+- 没有任务时线程阻塞在事件上，不再采样
+检测到异常移动时只设置 pause_event（引擎在下一个点位前暂停）并回调 on_trigger，
+不直接操作任何控件。
+"""
+
+import collections
+import math
+import threading
+import time
+
+from autoclicker.backends import cursor_position
+
+SAFETY_ACTIVE_INTERVAL = 0.02  # seconds，任务运行时的采样间隔
+SAFETY_PAUSED_INTERVAL = 0.5  # seconds，任务暂停时的采样间隔
+# 位移按该时间窗口计算，与原来每 120ms 比较一次的阈值含义保持一致
+SAFETY_MOVE_WINDOW = 0.12  # seconds
+SAFETY_COOLDOWN = 5.0  # seconds，两次触发之间的冷却时间
+TASK_MOVE_GRACE = 3.0  # seconds，点击后该时间内的移动视为任务移动
+TARGET_RADIUS = 100  # px，距离目标点位该范围内视为任务移动
+DEFAULT_THRESHOLD = 250  # px
+
+
+class SafetyMonitor:
+    def __init__(
+        self,
+        pause_event,
+        on_trigger=None,
+        position=cursor_position,
+        threshold=DEFAULT_THRESHOLD,
+        active_interval=SAFETY_ACTIVE_INTERVAL,
+        paused_interval=SAFETY_PAUSED_INTERVAL,
+    ):
+        self.pause_event = pause_event
+        self.on_trigger = on_trigger  # on_trigger(dist, threshold)，在监测线程中调用
+        self.position = position
+        self.active_interval = active_interval
+        self.paused_interval = paused_interval
+        # 以下字段由界面线程/引擎线程写入，监测线程只读
+        self.enabled = True
+        self.threshold = threshold
+        self.current_target = None
+        self.last_click_time = 0.0
+        self.last_trigger_time = 0.0
+
+        self._active = threading.Event()
+        self._wake = threading.Event()
+        self._closed = False
+        self._samples = collections.deque()
+        self._thread = None
+
+    # ---------------- control ----------------
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="SafetyMonitor", daemon=True
+            )
+            self._thread.start()
+
+    def activate(self):
+        """任务开始时调用"""
+        self.current_target = None
+        self._active.set()
+        self._wake.set()
+
+    def deactivate(self):
+        """任务结束时调用，监测线程随后进入阻塞"""
+        self._active.clear()
+        self.current_target = None
+        self._wake.set()
+
+    def close(self):
+        self._closed = True
+        self._active.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    @property
+    def active(self):
+        return self._active.is_set()
+
+    # ---------------- engine hooks ----------------
+    def note_target(self, x, y):
+        self.current_target = (x, y)
+
+    def clear_target(self):
+        self.current_target = None
+
+    def note_click(self):
+        self.last_click_time = time.time()
+
+    # ---------------- worker ----------------
+    def _run(self):
+        samples = self._samples
+        while not self._closed:
+            if not self._active.is_set():
+                samples.clear()
+                self._active.wait()
+                continue
+            if self.pause_event.is_set() or not self.enabled:
+                # 暂停期间不检测，恢复时从新的基准位置开始
+                samples.clear()
+                interval = self.paused_interval
+            else:
+                self.sample()
+                interval = self.active_interval
+            self._wake.wait(interval)
+            self._wake.clear()
+
+    def sample(self):
+        """采样一次并检查；返回触发时的移动距离，否则返回 None"""
+        try:
+            x, y = self.position()
+        except Exception:
+            return None
+        now = time.monotonic()
+        samples = self._samples
+        samples.append((now, x, y))
+        # 保留窗口内最早的一个样本作为比较基准
+        while len(samples) > 2 and now - samples[1][0] >= SAFETY_MOVE_WINDOW:
+            samples.popleft()
+        _, x0, y0 = samples[0]
+        dist = math.hypot(x - x0, y - y0)
+        if dist <= self.threshold or self._is_task_movement(x, y):
+            return None
+        wall = time.time()
+        if wall - self.last_trigger_time <= SAFETY_COOLDOWN:
+            return None
+        self.last_trigger_time = wall
+        samples.clear()
+        self.pause_event.set()
+        if self.on_trigger is not None:
+            self.on_trigger(dist, self.threshold)
+        return dist
+
+    def _is_task_movement(self, x, y):
+        if time.time() - self.last_click_time < TASK_MOVE_GRACE:
+            return True
+        target = self.current_target
+        if target is not None:
+            if math.hypot(x - target[0], y - target[1]) < TARGET_RADIUS:
+                return True
+        return False
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+程序设置（与点位配置分开保存）
+保存与具体点位无关、与本机相关的选项，例如输入后端和日志级别。
+"""
+
+import json
+import os
+
+from autoclicker.backends import DEFAULT_BACKEND
+from autoclicker.logwriter import DEFAULT_LOG_LEVEL
+
+SETTINGS_FILE = "autoclicker_settings.json"
+
+DEFAULT_SETTINGS = {
+    "input_backend": DEFAULT_BACKEND,
+    "log_level": DEFAULT_LOG_LEVEL,
+}
+
+
+def load_settings(path=SETTINGS_FILE):
+    """读取设置；文件不存在或损坏时返回默认值"""
+    settings = dict(DEFAULT_SETTINGS)
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                settings.update(data)
+        except Exception:
+            pass
+    return settings
+
+
+def save_settings(settings, path=SETTINGS_FILE):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(settings, f, ensure_ascii=False, indent=2)
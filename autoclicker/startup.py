@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+冷启动耗时测量与启动分析
+- cold_start_report(): 从进程创建（而不是从脚本第一行）算到主窗口第一次空闲，
+  打包的 exe 包含 PyInstaller 解包时间，因此与源码运行分别设定目标
+- StartupProfiler: --profile-startup 时记录 __init__ 各阶段耗时和每个模块的导入耗时
+  （与 -X importtime 相同的 自身/累计 口径），结果写入日志和 STARTUP_PROFILE_FILE
+"""
+
+import builtins
+import contextlib
+import importlib
+import importlib.util
+import json
+import sys
+import threading
+import time
+
+# 冷启动目标（毫秒）
+STARTUP_TARGETS_MS = {
+    "source": 1500,  # python AutoClicker_2.5.py
+    "frozen": 3000,  # PyInstaller 单文件 exe（含解包）
+}
+
+STARTUP_PROFILE_FILE = "startup_profile.json"
+PROFILE_LOG_TOP = 20  # 日志中最多列出的模块数（JSON 中是完整列表）
+
+_MODULE_T0 = time.perf_counter()
+
+
+def startup_kind():
+    return "frozen" if getattr(sys, "frozen", False) else "source"
+
+
+def _windows_uptime():
+    import ctypes
+    from ctypes import wintypes
+
+    kernel32 = ctypes.windll.kernel32
+    creation = wintypes.FILETIME()
+    unused = [wintypes.FILETIME() for _ in range(3)]
+    if not kernel32.GetProcessTimes(
+        kernel32.GetCurrentProcess(),
+        ctypes.byref(creation),
+        ctypes.byref(unused[0]),
+        ctypes.byref(unused[1]),
+        ctypes.byref(unused[2]),
+    ):
+        return None
+    now = wintypes.FILETIME()
+    kernel32.GetSystemTimeAsFileTime(ctypes.byref(now))
+
+    def ticks(ft):
+        return (ft.dwHighDateTime << 32) | ft.dwLowDateTime
+
+    # FILETIME 单位为 100ns
+    return (ticks(now) - ticks(creation)) / 1e7
+
+
+def _linux_uptime():
+    import os
+
+    with open("/proc/self/stat", "r") as f:
+        # comm 字段可能包含空格，从最后一个 ')' 之后开始切分
+        fields = f.read().rsplit(")", 1)[1].split()
+    start_ticks = int(fields[19])
+    with open("/proc/uptime", "r") as f:
+        system_uptime = float(f.read().split()[0])
+    return system_uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+
+
+def process_uptime():
+    """进程已运行的秒数；无法获取进程创建时间时，从导入本模块算起"""
+    try:
+        if sys.platform == "win32":
+            uptime = _windows_uptime()
+        elif sys.platform.startswith("linux"):
+            uptime = _linux_uptime()
+        else:
+            uptime = None
+        if uptime is not None and uptime >= 0:
+            return uptime
+    except Exception:
+        pass
+    return time.perf_counter() - _MODULE_T0
+
+
+def cold_start_report():
+    kind = startup_kind()
+    elapsed_ms = process_uptime() * 1000.0
+    target_ms = STARTUP_TARGETS_MS[kind]
+    return {
+        "kind": kind,
+        "elapsed_ms": elapsed_ms,
+        "target_ms": target_ms,
+        "within_target": elapsed_ms <= target_ms,
+    }
+
+
+class ImportTimer:
+    """替换 __import__ / importlib.import_module，记录主线程中首次导入每个模块的耗时"""
+
+    def __init__(self):
+        self.records = {}  # name -> (self_s, cumulative_s)
+        self._stack = []  # 正在导入的模块中，子模块已占用的时间
+        self._owner = threading.get_ident()
+        self._orig_import = None
+        self._orig_import_module = None
+
+    def install(self):
+        if self._orig_import is not None:
+            return
+        self._orig_import = builtins.__import__
+        self._orig_import_module = importlib.import_module
+        orig_import = self._orig_import
+        orig_import_module = self._orig_import_module
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level:
+                # 相对导入：按包名解析出完整模块名
+                package = (globals or {}).get("__package__") or ""
+                full = importlib.util.resolve_name("." * level + name, package)
+            else:
+                full = name
+            if not fromlist or threading.get_ident() != self._owner:
+                return self._timed(
+                    full, orig_import, name, globals, locals, fromlist, level
+                )
+            # from pkg import sub：先导入包本身，再逐个计时尚未导入的子模块；
+            # 否则子模块的耗时会算在包上，包已导入时则完全漏记
+            self._timed(full, orig_import, name, globals, locals, (), level)
+            parent = sys.modules.get(full)
+            if parent is not None and hasattr(parent, "__path__"):
+                for item in fromlist:
+                    sub = f"{full}.{item}"
+                    if item == "*" or hasattr(parent, item) or sub in sys.modules:
+                        continue
+                    try:
+                        self._timed(sub, orig_import_module, sub)
+                    except ModuleNotFoundError as e:
+                        # 不是子模块：交给原始导入按原样处理（报 ImportError）
+                        if e.name != sub:
+                            raise
+                        self.records.pop(sub, None)
+            return orig_import(name, globals, locals, fromlist, level)
+
+        def timed_import_module(name, package=None):
+            full = importlib.util.resolve_name(name, package) if package else name
+            return self._timed(full, orig_import_module, name, package)
+
+        builtins.__import__ = timed_import
+        importlib.import_module = timed_import_module
+
+    def uninstall(self):
+        if self._orig_import is None:
+            return
+        builtins.__import__ = self._orig_import
+        importlib.import_module = self._orig_import_module
+        self._orig_import = None
+        self._orig_import_module = None
+
+    def _timed(self, name, func, *args):
+        if name in sys.modules or threading.get_ident() != self._owner:
+            return func(*args)
+        stack = self._stack
+        stack.append(0.0)
+        t0 = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - t0
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            if name not in self.records:
+                self.records[name] = (elapsed - children, elapsed)
+
+
+class StartupProfiler:
+    """未启用时 phase() 为空操作，不安装导入钩子"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.phases = []  # [(name, seconds)]
+        self.imports = ImportTimer() if enabled else None
+        self._t0 = time.perf_counter()
+
+    @classmethod
+    def from_argv(cls, argv):
+        profiler = cls(enabled="--profile-startup" in argv)
+        if profiler.enabled:
+            profiler.imports.install()
+        return profiler
+
+    def phase(self, name):
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._phase(name)
+
+    @contextlib.contextmanager
+    def _phase(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - t0))
+
+    def report(self, cold_start=None):
+        phases = sorted(self.phases, key=lambda p: p[1], reverse=True)
+        imports = sorted(
+            self.imports.records.items(), key=lambda r: r[1][1], reverse=True
+        )
+        return {
+            "total_ms": (time.perf_counter() - self._t0) * 1000.0,
+            "cold_start": cold_start,
+            "phases": [{"name": n, "ms": sec * 1000.0} for n, sec in phases],
+            "imports": [
+                {"module": n, "self_ms": s * 1000.0, "cumulative_ms": c * 1000.0}
+                for n, (s, c) in imports
+            ],
+        }
+
+    def finish(self, log, cold_start=None, path=STARTUP_PROFILE_FILE):
+        """卸载导入钩子，把排序后的报告写入日志和 JSON；返回报告（未启用时返回 None）"""
+        if not self.enabled:
+            return None
+        self.imports.uninstall()
+        report = self.report(cold_start)
+        log(f"启动分析: 从导入到首次空闲 {report['total_ms']:.1f} ms")
+        for p in report["phases"]:
+            log(f"  阶段 {p['name']}: {p['ms']:.1f} ms")
+        for m in report["imports"][:PROFILE_LOG_TOP]:
+            log(
+                f"  导入 {m['module']}: 累计 {m['cumulative_ms']:.1f} ms，"
+                f"自身 {m['self_ms']:.1f} ms"
+            )
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            log(f"启动分析已保存到 {path}")
+        except Exception as e:
+            log(f"保存启动分析失败: {e}")
+        return report
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+运行统计
+RunStats 只由引擎线程写入（单写者），计数器是普通的 int 属性，
+界面线程/报告通过 snapshot() 取一份副本读取，不需要加锁。
+LatencyHistogram 为 HDR 风格的对数分桶直方图：
+按微秒记录，每个 2 的幂区间再均分为 16 个子桶（相对误差约 6%），
+记录一次只是一次下标计算和一次数组自增，容量固定，不随样本数增长。
+"""
+
+from array import array
+
+SUB_BITS = 5
+SUB_BUCKETS = 1 << SUB_BITS  # 0..31 微秒精确记录
+HALF_BUCKETS = SUB_BUCKETS >> 1
+MAX_SHIFT = 40  # 覆盖到约 2^45 微秒，远超任何实际间隔
+BUCKET_COUNT = SUB_BUCKETS + MAX_SHIFT * HALF_BUCKETS
+
+
+def _bucket_index(us):
+    if us < SUB_BUCKETS:
+        return us if us > 0 else 0
+    shift = us.bit_length() - SUB_BITS
+    if shift > MAX_SHIFT:
+        return BUCKET_COUNT - 1
+    return SUB_BUCKETS + (shift - 1) * HALF_BUCKETS + ((us >> shift) - HALF_BUCKETS)
+
+
+def _bucket_value(index):
+    """桶的代表值（区间中点，微秒）"""
+    if index < SUB_BUCKETS:
+        return float(index)
+    shift = (index - SUB_BUCKETS) // HALF_BUCKETS + 1
+    mantissa = (index - SUB_BUCKETS) % HALF_BUCKETS + HALF_BUCKETS
+    return (mantissa << shift) + (1 << shift) / 2.0
+
+
+class LatencyHistogram:
+    __slots__ = ("counts", "count", "total_us", "max_us")
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * BUCKET_COUNT))
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def record(self, seconds):
+        us = int(seconds * 1e6)
+        if us < 0:
+            us = 0
+        self.counts[_bucket_index(us)] += 1
+        self.count += 1
+        self.total_us += us
+        if us > self.max_us:
+            self.max_us = us
+
+    def copy(self):
+        other = LatencyHistogram()
+        other.counts = array("Q", self.counts)
+        other.count = self.count
+        other.total_us = self.total_us
+        other.max_us = self.max_us
+        return other
+
+    def percentile(self, q):
+        """返回第 q（0~1）分位的近似值（毫秒）"""
+        if self.count == 0:
+            return 0.0
+        rank = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            if n:
+                seen += n
+                if seen >= rank:
+                    return min(_bucket_value(index), self.max_us) / 1000.0
+        return self.max_us / 1000.0
+
+    def summary(self):
+        if self.count == 0:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean_ms": self.total_us / self.count / 1000.0,
+            "p50_ms": self.percentile(0.50),
+            "p90_ms": self.percentile(0.90),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": self.max_us / 1000.0,
+        }
+
+
+# 直方图名称 -> 显示名称
+HISTOGRAMS = {
+    "input": "输入调用耗时",
+    "lateness": "调度迟到",
+    "click_interval": "点击间隔",
+    "wait": "条件等待",
+}
+
+
+class RunStats:
+    """一次任务的统计；只允许引擎线程修改"""
+
+    def __init__(self):
+        self.total_click_attempts = 0
+        self.successful_clicks = 0
+        self.failed_clicks = 0
+        self.loops_completed = 0
+        self.start_time = None
+        self.end_time = None
+        self.timing = None  # DeadlineScheduler.lateness_summary()
+        self.histograms = {name: LatencyHistogram() for name in HISTOGRAMS}
+        # 按点位下标的成功/失败次数
+        self.point_successes = array("L")
+        self.point_failures = array("L")
+
+    def reset_points(self, count):
+        """按计划的点位数分配逐点计数（引擎开始执行前调用）"""
+        if len(self.point_successes) != count:
+            self.point_successes = array("L", [0]) * count
+            self.point_failures = array("L", [0]) * count
+
+    def snapshot(self, histograms=True, points=False):
+        """返回普通 dict 副本；histograms=True 时附带各直方图的分位数摘要，
+        points=True 时附带逐点计数（点位多时较大，只在写报告时使用）"""
+        snap = {
+            "total_click_attempts": self.total_click_attempts,
+            "successful_clicks": self.successful_clicks,
+            "failed_clicks": self.failed_clicks,
+            "loops_completed": self.loops_completed,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "timing": self.timing,
+        }
+        if histograms:
+            # 先复制数组（C 层一次拷贝）再在读取方线程中计算分位数
+            copies = {name: h.copy() for name, h in self.histograms.items()}
+            snap["histograms"] = {name: h.summary() for name, h in copies.items()}
+        if points:
+            snap["point_successes"] = self.point_successes.tolist()
+            snap["point_failures"] = self.point_failures.tolist()
+        return snap
+
+
+def format_histogram_lines(histograms):
+    """把 snapshot()['histograms'] 转为可读的多行文本"""
+    lines = []
+    for name, label in HISTOGRAMS.items():
+        h = histograms.get(name) or {}
+        if h.get("count"):
+            lines.append(
+                f"{label}: p50 {h['p50_ms']:.2f} ms，p99 {h['p99_ms']:.2f} ms，"
+                f"最大 {h['max_ms']:.2f} ms（{h['count']} 次）"
+            )
+    return lines
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+高精度调度
+每个动作都对应一个绝对截止时间（time.perf_counter，单调时钟）：
+下一个截止时间 = 上一个截止时间 + 间隔，而不是"执行完再 sleep 间隔"，
+因此点击/日志/界面调用的耗时不会累积成漂移。
+等待采用"先 sleep、最后 spin_window 秒忙等"的混合策略，并统计每个动作的迟到时间。
+距截止时间还有不足 merge_below 秒的等待直接跳过（高倍速回放时的极短间隔）：
+截止时间照常推进，欠下的时间由下一次较长的等待一并补足，总时长不变。
+"""
+
+import time
+
+SPIN_WINDOW = 0.002  # seconds，截止前最后这段时间忙等
+STOP_POLL_INTERVAL = 0.05  # seconds，长时间等待时检查停止事件的间隔
+MAX_CATCHUP = 0.25  # seconds，迟到超过该值时放弃追赶，从当前时间重新计时
+MERGE_WAIT = 0.0005  # seconds，低于该值的等待合并到下一次等待
+
+
+class DeadlineScheduler:
+    def __init__(
+        self,
+        spin_window=SPIN_WINDOW,
+        stop_event=None,
+        max_catchup=None,
+        histogram=None,
+        merge_below=MERGE_WAIT,
+    ):
+        self.spin_window = max(0.0, spin_window)
+        self.merge_below = merge_below
+        self.stop_event = stop_event
+        self.max_catchup = MAX_CATCHUP if max_catchup is None else max_catchup
+        # 可选的 LatencyHistogram，每次等待的迟到同时计入直方图
+        self.histogram = histogram
+        self._deadline = None
+
+        # 迟到统计（秒）
+        self.actions = 0
+        self.total_lateness = 0.0
+        self.max_lateness = 0.0
+        self.last_lateness = 0.0
+        self.resyncs = 0  # 放弃追赶的次数
+        self.merged = 0  # 合并（跳过）的极短等待次数
+
+    def start(self):
+        """以当前时间作为第一个动作的截止时间"""
+        self._deadline = time.perf_counter()
+
+    def rebase(self):
+        """暂停或调试单步之后从当前时间重新计时，避免恢复后连续补点击"""
+        self._deadline = time.perf_counter()
+
+    def wait(self, interval):
+        """等待到 上一截止时间 + interval，返回本次迟到秒数；被停止时返回 None"""
+        if self._deadline is None:
+            self.start()
+        deadline = self._deadline + max(0.0, interval)
+        now = time.perf_counter()
+        if now - deadline > self.max_catchup:
+            deadline = now
+            self.resyncs += 1
+        self._deadline = deadline
+        if 0.0 <= deadline - now < self.merge_below:
+            # 不值得一次 sleep/忙等：本次不等待也不计入迟到统计（已迟到的等待照常统计）
+            self.merged += 1
+            return 0.0
+
+        if not self.wait_until(deadline):
+            return None
+        lateness = time.perf_counter() - deadline
+        self.record(lateness)
+        return lateness
+
+    def wait_until(self, deadline):
+        """混合等待：先分段 sleep（可响应停止），最后 spin_window 秒忙等"""
+        stop_event = self.stop_event
+        while True:
+            remaining = deadline - time.perf_counter() - self.spin_window
+            if remaining <= 0:
+                break
+            time.sleep(min(remaining, STOP_POLL_INTERVAL))
+            if stop_event is not None and stop_event.is_set():
+                return False
+        while time.perf_counter() < deadline:
+            pass
+        return not (stop_event is not None and stop_event.is_set())
+
+    def record(self, lateness):
+        self.actions += 1
+        self.total_lateness += lateness
+        self.last_lateness = lateness
+        if lateness > self.max_lateness:
+            self.max_lateness = lateness
+        if self.histogram is not None:
+            self.histogram.record(lateness)
+
+    def lateness_summary(self):
+        """返回迟到统计（毫秒）"""
+        mean = self.total_lateness / self.actions if self.actions else 0.0
+        return {
+            "actions": self.actions,
+            "mean_ms": mean * 1000.0,
+            "max_ms": self.max_lateness * 1000.0,
+            "resyncs": self.resyncs,
+            "merged": self.merged,
+        }
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+更新检查
+- 所有镜像同时请求，第一个返回有效版本信息的镜像胜出，其余结果丢弃
+- 安装了 requests 时复用同一个连接池会话，否则回退到 urllib
+- 结果缓存在 UPDATE_CACHE_FILE 中：UPDATE_CACHE_TTL 内的启动不发任何请求；
+  过期后带 If-None-Match / If-Modified-Since 请求，304 时沿用缓存内容
+"""
+
+import collections
+import concurrent.futures
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from autoclicker.lazy import has_module
+from autoclicker.logwriter import log_warning
+
+UPDATE_CACHE_FILE = "autoclicker_update_cache.json"
+UPDATE_CACHE_TTL = 6 * 3600  # seconds，缓存有效期内不联网
+UPDATE_TIMEOUT = 8.0  # seconds，整个镜像竞速的最长等待时间
+USER_AGENT = "AutoClicker-UpdateCheck"
+
+# data: version.json 内容；source: 返回结果的 URL；
+# cached: 结果来自缓存（未联网或 304）；error: 全部失败时最后一个错误
+UpdateResult = collections.namedtuple("UpdateResult", "data source cached error")
+
+
+def is_newer_version(remote, current):
+    """比较 "v2.5.3" 形式的版本号；无法解析为数字时按字符串比较"""
+    try:
+        remote_parts = [int(x) for x in str(remote).lstrip("vV").split(".")]
+        current_parts = [int(x) for x in str(current).lstrip("vV").split(".")]
+    except ValueError:
+        return str(remote) > str(current)
+    size = max(len(remote_parts), len(current_parts))
+    remote_parts += [0] * (size - len(remote_parts))
+    current_parts += [0] * (size - len(current_parts))
+    return remote_parts > current_parts
+
+
+def load_cache(path=UPDATE_CACHE_FILE):
+    """{"checked_at", "source", "data", "validators": {url: {etag, last_modified}}}"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        if isinstance(cache, dict):
+            return cache
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def save_cache(cache, path=UPDATE_CACHE_FILE):
+    tmp = f"{path}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+    except OSError as e:
+        log_warning("写入更新缓存失败: %s", e)
+
+
+# ------------- HTTP transport -------------
+_session = None
+_session_lock = threading.Lock()
+
+
+def _get_session():
+    """进程内共享的 requests 会话（连接池按镜像数设置）"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_maxsize=8)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers["User-Agent"] = USER_AGENT
+                _session = session
+    return _session
+
+
+def http_get(url, headers, timeout):
+    """返回 (状态码, 响应头 dict, 正文 bytes)；网络错误时抛出异常"""
+    if has_module("requests"):
+        resp = _get_session().get(url, headers=headers, timeout=timeout)
+        return resp.status_code, dict(resp.headers), resp.content
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT, **headers})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as resp:
+            return resp.status, dict(resp.headers), resp.read()
+    except urllib.error.HTTPError as e:
+        # urllib 把 304 也当作错误抛出
+        return e.code, dict(e.headers or {}), b""
+
+
+def _fetch_one(url, validators, cached_data, timeout, get):
+    """请求单个镜像，返回 (data, from_cache, 新的校验信息)；结果无效时抛出异常"""
+    headers = {}
+    if cached_data is not None:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+    status, resp_headers, body = get(url, headers, timeout)
+    if status == 304 and cached_data is not None:
+        return cached_data, True, validators
+    if status != 200:
+        raise RuntimeError(f"HTTP状态码: {status}")
+    data = json.loads(body.decode("utf-8-sig"))
+    if not isinstance(data, dict) or not data.get("version"):
+        raise ValueError("响应中没有 version 字段")
+    lowered = {k.lower(): v for k, v in resp_headers.items()}
+    return (
+        data,
+        False,
+        {"etag": lowered.get("etag"), "last_modified": lowered.get("last-modified")},
+    )
+
+
+def fetch_update_info(
+    urls,
+    cache_path=UPDATE_CACHE_FILE,
+    ttl=UPDATE_CACHE_TTL,
+    timeout=UPDATE_TIMEOUT,
+    force=False,
+    get=http_get,
+):
+    """并发请求全部镜像，返回 UpdateResult；force=True 时忽略 TTL（仍发条件请求）"""
+    cache = load_cache(cache_path) if cache_path else {}
+    cached_data = cache.get("data") if isinstance(cache.get("data"), dict) else None
+    now = time.time()
+    checked_at = cache.get("checked_at") or 0
+    if not force and cached_data is not None and 0 <= now - checked_at < ttl:
+        return UpdateResult(cached_data, cache.get("source"), True, None)
+    if not urls:
+        return UpdateResult(None, None, False, "未配置更新地址")
+
+    all_validators = cache.get("validators") or {}
+    deadline = time.monotonic() + timeout
+    pool = concurrent.futures.ThreadPoolExecutor(
+        max_workers=len(urls), thread_name_prefix="UpdateCheck"
+    )
+    futures = {
+        pool.submit(
+            _fetch_one, url, all_validators.get(url) or {}, cached_data, timeout, get
+        ): url
+        for url in urls
+    }
+    winner = None
+    error = None
+    try:
+        for future in concurrent.futures.as_completed(
+            futures, timeout=max(0.0, deadline - time.monotonic())
+        ):
+            url = futures[future]
+            try:
+                winner = (url,) + future.result()
+                break
+            except Exception as e:
+                error = f"{url}: {e}"
+                log_warning("更新检查失败 [%s]: %s", url, e)
+    except concurrent.futures.TimeoutError:
+        error = error or "连接超时"
+    finally:
+        # 不等待较慢的镜像，它们的结果直接丢弃
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    if winner is None:
+        return UpdateResult(None, None, False, error or "连接超时")
+    url, data, from_cache, validators = winner
+    if cache_path:
+        all_validators = dict(all_validators)
+        all_validators[url] = validators
+        save_cache(
+            {
+                "checked_at": now,
+                "source": url,
+                "data": data,
+                "validators": all_validators,
+            },
+            cache_path,
+        )
+    return UpdateResult(data, url, from_cache, None)
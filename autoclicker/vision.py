@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+图像模板定位（find_and_click）
+- match_template(): NumPy 向量化的归一化互相关（NCC）。分子用 FFT 一次算出所有位置的相关值，
+  分母的局部方差用积分图求得，不逐像素循环
+- TemplateMatcher: 按点位的 ROI（屏幕区域）搜索模板；命中位置按 (模板, ROI) 缓存，
+  下次先只在上次命中位置附近 HIT_MARGIN 像素的小窗口中搜索，未命中再搜索整个 ROI
+- 截图函数可替换：grab(region) -> (灰度数组, left, top)，便于用合成截图测试
+numpy 和 Pillow 为可选依赖，首次定位时才导入。
+"""
+
+import os
+
+from autoclicker.lazy import has_module, lazy_import
+
+np = lazy_import("numpy")
+
+DEFAULT_THRESHOLD = 0.85  # NCC 得分（-1 ~ 1）达到该值视为命中
+HIT_MARGIN = 24  # px，上次命中位置周围的搜索范围
+_EPS = 1e-6
+
+
+def vision_available():
+    """需要 numpy 和 Pillow（读取模板和截图）"""
+    return has_module("numpy") and has_module("PIL")
+
+
+def match_template(image, template):
+    """返回 NCC 得分图，形状为 (H-h+1, W-w+1)；模板大于图像或模板为纯色时返回 None"""
+    image = np.asarray(image, dtype=np.float64)
+    template = np.asarray(template, dtype=np.float64)
+    ih, iw = image.shape
+    th, tw = template.shape
+    if th > ih or tw > iw:
+        return None
+    t = template - template.mean()
+    t_norm = np.sqrt((t * t).sum())
+    if t_norm < _EPS:
+        return None
+
+    # 分子：sum(I * (T - mean(T)))。循环相关在有效区域内不会回绕，FFT 尺寸取图像大小即可
+    spectrum = np.fft.rfft2(image) * np.conj(np.fft.rfft2(t, s=(ih, iw)))
+    corr = np.fft.irfft2(spectrum, s=(ih, iw))[: ih - th + 1, : iw - tw + 1]
+
+    # 分母：窗口内图像的标准差 * 模板范数，窗口和/平方和由积分图得到
+    n = th * tw
+    window_sum = _window_sums(image, th, tw)
+    window_sq = _window_sums(image * image, th, tw)
+    variance = np.maximum(window_sq - window_sum * window_sum / n, 0.0)
+    denom = np.sqrt(variance) * t_norm
+    scores = np.zeros_like(corr)
+    np.divide(corr, denom, out=scores, where=denom > _EPS)
+    return scores
+
+
+def _window_sums(a, h, w):
+    ii = np.zeros((a.shape[0] + 1, a.shape[1] + 1))
+    np.cumsum(np.cumsum(a, axis=0), axis=1, out=ii[1:, 1:])
+    return ii[h:, w:] - ii[:-h, w:] - ii[h:, :-w] + ii[:-h, :-w]
+
+
+def best_match(image, template):
+    """返回 (x, y, score)，x/y 为模板左上角在 image 中的位置；无法匹配时返回 None"""
+    scores = match_template(image, template)
+    if scores is None:
+        return None
+    y, x = np.unravel_index(int(np.argmax(scores)), scores.shape)
+    return int(x), int(y), float(scores[y, x])
+
+
+def grab_screen(region=None):
+    """截取屏幕区域 (left, top, width, height) 的灰度图；region 为 None 时截取整个屏幕"""
+    from PIL import ImageGrab
+
+    if region is None:
+        image = ImageGrab.grab(all_screens=True)
+        left = top = 0
+    else:
+        left, top, width, height = region
+        image = ImageGrab.grab(bbox=(left, top, left + width, top + height))
+    return np.asarray(image.convert("L")), left, top
+
+
+def load_template(path):
+    from PIL import Image
+
+    with Image.open(path) as image:
+        return np.asarray(image.convert("L"))
+
+
+def _intersect(a, b):
+    """两个 (left, top, width, height) 的交集；b 为 None 表示不限制"""
+    if b is None:
+        return a
+    left = max(a[0], b[0])
+    top = max(a[1], b[1])
+    right = min(a[0] + a[2], b[0] + b[2])
+    bottom = min(a[1] + a[3], b[1] + b[3])
+    if right <= left or bottom <= top:
+        return None
+    return (left, top, right - left, bottom - top)
+
+
+class TemplateMatcher:
+    """在引擎线程中使用；模板按路径和修改时间缓存"""
+
+    def __init__(self, grab=grab_screen, loader=load_template, margin=HIT_MARGIN):
+        self.grab = grab
+        self.loader = loader
+        self.margin = margin
+        self._templates = {}  # path -> (mtime, array)
+        self._hits = {}  # (path, roi) -> 上次命中的模板左上角（屏幕坐标）
+        self.searches = 0
+        self.cache_hits = 0
+
+    def template(self, path):
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = None
+        cached = self._templates.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        array = self.loader(path)
+        self._templates[path] = (mtime, array)
+        return array
+
+    def locate(self, path, threshold=DEFAULT_THRESHOLD, roi=None):
+        """返回模板中心的屏幕坐标 (x, y, score)；未找到返回 None"""
+        template = self.template(path)
+        th, tw = template.shape
+        roi = tuple(roi) if roi else None
+        key = (path, roi)
+        last = self._hits.get(key)
+        if last is not None:
+            m = self.margin
+            window = _intersect((last[0] - m, last[1] - m, tw + 2 * m, th + 2 * m), roi)
+            hit = self._search(window, template, threshold) if window else None
+            if hit is not None:
+                self.cache_hits += 1
+                self._hits[key] = hit[:2]
+                return hit[0] + tw // 2, hit[1] + th // 2, hit[2]
+        hit = self._search(roi, template, threshold)
+        if hit is None:
+            self._hits.pop(key, None)
+            return None
+        self._hits[key] = hit[:2]
+        return hit[0] + tw // 2, hit[1] + th // 2, hit[2]
+
+    def _search(self, region, template, threshold):
+        self.searches += 1
+        image, left, top = self.grab(region)
+        found = best_match(image, template)
+        if found is None or found[2] < threshold:
+            return None
+        return left + found[0], top + found[1], found[2]
+
+
+class ArrayScreen:
+    """用数组模拟屏幕（测试用）：grab() 按区域裁剪并记录截取的面积"""
+
+    def __init__(self, image):
+        self.image = image
+        self.grabbed_pixels = 0
+
+    def grab(self, region=None):
+        h, w = self.image.shape[:2]
+        if region is None:
+            region = (0, 0, w, h)
+        left, top, width, height = _intersect(region, (0, 0, w, h)) or (0, 0, 0, 0)
+        self.grabbed_pixels += width * height
+        return self.image[top : top + height, left : left + width], left, top
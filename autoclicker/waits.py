@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+条件等待（wait 点位）
+等到屏幕区域满足条件再继续，代替估计的固定延时：
+- color: 区域平均颜色与目标颜色每个通道相差不超过 tolerance（如"按钮变绿"）
+- change: 区域内容与开始等待时不同（如"画面已刷新"）：保留开始时的下采样结果，
+  任一块的平均值偏离超过 change_threshold 即满足；所有块同向的小幅整体偏移
+  （不超过 SHIFT_TOLERANCE，如亮度抖动）先扣除，不算变化
+每次采样把截图按块求平均下采样到不超过 SAMPLE_SIDE x SAMPLE_SIDE（每个像素都参与），
+对结果求 CRC32：哈希与上次相同说明画面完全没变，跳过判断，轮询间隔按 POLL_GROWTH
+逐步放慢到 POLL_MAX；哈希一变就重新判断条件并恢复到 POLL_MIN。
+截图函数可替换，便于用合成画面测试。
+numpy 和 Pillow 为可选依赖，首次等待时才导入。
+"""
+
+import collections
+import threading
+import time
+import zlib
+
+from autoclicker.lazy import has_module, lazy_import
+
+np = lazy_import("numpy")
+
+WAIT_MODES = ("color", "change")
+DEFAULT_WAIT_TIMEOUT = 10.0  # seconds
+DEFAULT_COLOR_TOLERANCE = 24  # 每个通道允许的差值（0 ~ 255）
+SAMPLE_SIDE = 16  # 下采样后的最大边长（像素）
+CHANGE_THRESHOLD = 0.5  # change 模式下块平均值的最小变化（0 ~ 255）
+SHIFT_TOLERANCE = 2.0  # 低于该值的整体偏移视为噪声（0 ~ 255）
+POLL_MIN = 0.01  # seconds
+POLL_MAX = 0.2  # seconds
+POLL_GROWTH = 1.5
+
+# met: 条件是否满足；elapsed: 等待秒数；polls: 采样次数
+WaitResult = collections.namedtuple("WaitResult", "met elapsed polls")
+
+
+def waits_available():
+    """需要 numpy 和 Pillow（截图）"""
+    return has_module("numpy") and has_module("PIL")
+
+
+def grab_region(region):
+    """截取屏幕区域 (left, top, width, height)，返回 RGB 数组"""
+    from PIL import ImageGrab
+
+    left, top, width, height = region
+    image = ImageGrab.grab(bbox=(left, top, left + width, top + height))
+    return np.asarray(image.convert("RGB"))
+
+
+def downsample(image, side=SAMPLE_SIDE):
+    """分块求平均（浮点），结果不超过 side x side；块内任何像素变化都会反映到均值上"""
+    image = np.asarray(image)
+    h, w = image.shape[:2]
+    bh = -(-h // side)
+    bw = -(-w // side)
+    if bh == 1 and bw == 1:
+        return image.astype(np.float64)
+    # 边缘补齐到块大小的整数倍（复制边缘像素），再 reshape 后对块求平均
+    pad = ((0, -h % bh), (0, -w % bw)) + ((0, 0),) * (image.ndim - 2)
+    if pad[0][1] or pad[1][1]:
+        image = np.pad(image, pad, mode="edge")
+    blocks = image.reshape(
+        image.shape[0] // bh, bh, image.shape[1] // bw, bw, *image.shape[2:]
+    )
+    return blocks.mean(axis=(1, 3))
+
+
+def sample_hash(sample):
+    """只用于判断"完全没变"，是否满足条件由 region_changed / color_matches 判断"""
+    return zlib.crc32(np.ascontiguousarray(sample).tobytes())
+
+
+def region_changed(sample, baseline, threshold=CHANGE_THRESHOLD):
+    """与基准相比，扣除整体偏移后任一块变化达到 threshold，或整体偏移超过 SHIFT_TOLERANCE"""
+    diff = sample - baseline
+    shift = float(np.median(diff))
+    if abs(shift) > SHIFT_TOLERANCE:
+        return True
+    return float(np.abs(diff - shift).max()) >= threshold
+
+
+def mean_color(sample):
+    """返回 (r, g, b)；灰度图返回 (v, v, v)"""
+    if sample.ndim == 2:
+        v = float(sample.mean())
+        return (v, v, v)
+    return tuple(float(c) for c in sample[..., :3].reshape(-1, 3).mean(axis=0))
+
+
+def color_matches(sample, color, tolerance):
+    return all(abs(a - b) <= tolerance for a, b in zip(mean_color(sample), color))
+
+
+class RegionWaiter:
+    """在引擎线程中使用；polls/grabs 为累计的采样次数，便于观察开销"""
+
+    def __init__(
+        self,
+        grab=grab_region,
+        poll_min=POLL_MIN,
+        poll_max=POLL_MAX,
+        clock=time.monotonic,
+        change_threshold=CHANGE_THRESHOLD,
+    ):
+        self.grab = grab
+        self.poll_min = poll_min
+        self.poll_max = poll_max
+        self.change_threshold = change_threshold
+        self.clock = clock
+        self.polls = 0
+
+    def wait(
+        self,
+        region,
+        mode="change",
+        color=None,
+        tolerance=DEFAULT_COLOR_TOLERANCE,
+        timeout=DEFAULT_WAIT_TIMEOUT,
+        stop_event=None,
+    ):
+        """等待条件满足，返回 WaitResult；超时或 stop_event 被设置时 met 为 False"""
+        if stop_event is None:
+            stop_event = threading.Event()
+        clock = self.clock
+        start = clock()
+        deadline = start + timeout
+        interval = self.poll_min
+        threshold = self.change_threshold
+        baseline = None  # change 模式：开始等待时的下采样结果
+        last = None
+        polls = 0
+        while True:
+            sample = downsample(self.grab(region))
+            h = sample_hash(sample)
+            polls += 1
+            if h != last:
+                # 画面有任何变化才重新判断条件；变化后恢复快速轮询
+                if mode == "change":
+                    if baseline is None:
+                        baseline = sample
+                    met = region_changed(sample, baseline, threshold)
+                else:
+                    met = color_matches(sample, color, tolerance)
+                if met:
+                    self.polls += polls
+                    return WaitResult(True, clock() - start, polls)
+                if last is not None:
+                    interval = self.poll_min
+                last = h
+            else:
+                interval = min(interval * POLL_GROWTH, self.poll_max)
+            remaining = deadline - clock()
+            if remaining <= 0 or stop_event.wait(min(interval, remaining)):
+                self.polls += polls
+                return WaitResult(False, clock() - start, polls)
+
+
+class FrameScreen:
+    """用数组模拟屏幕（测试用）：frames 为 [(开始时间, 画面)]，按 clock() 选择当前画面"""
+
+    def __init__(self, frames, clock=time.monotonic):
+        self.frames = sorted(frames, key=lambda f: f[0])
+        self.clock = clock
+        self.grabs = 0
+
+    def grab(self, region):
+        self.grabs += 1
+        now = self.clock()
+        image = self.frames[0][1]
+        for t, frame in self.frames:
+            if t > now:
+                break
+            image = frame
+        left, top, width, height = region
+        return image[top : top + height, left : left + width]
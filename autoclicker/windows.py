@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+"""
+窗口查找与激活
+- WindowProvider: 窗口系统接口；Win32WindowProvider 基于 pywin32（首次使用时导入），
+  FakeWindowProvider 在内存中模拟窗口，便于在没有 Windows 的环境中测试
+- WindowIndex: 标题 -> 句柄索引。命中的句柄在失效（窗口关闭或标题改变）时才重新查找，
+  枚举结果缓存 WINDOW_INDEX_TTL 秒，避免每次切换都完整 EnumWindows
+- WindowGeometry: 目标窗口客户区的缓存，窗口矩形不变时不重新计算客户区
+- WindowIndex / WindowGeometry 内部加锁：引擎线程（每轮换算窗口坐标）和界面线程
+  （捕获坐标、刷新窗口列表）会同时使用同一个实例
+- activate_window(): 请求激活后轮询前台窗口，确认切换成功即返回，超时返回 False，
+  不再固定 sleep 0.5 秒
+"""
+
+import collections
+import sys
+import threading
+import time
+
+from autoclicker.lazy import has_module
+
+WINDOW_INDEX_TTL = 2.0  # seconds，枚举结果的有效期
+ACTIVATE_TIMEOUT = 1.0  # seconds，等待窗口成为前台的最长时间
+ACTIVATE_POLL_INTERVAL = 0.01  # seconds
+
+# 不在窗口列表中显示的系统窗口类
+SYSTEM_WINDOW_CLASSES = frozenset(("Progman", "WorkerW", "Shell_TrayWnd"))
+
+WindowInfo = collections.namedtuple("WindowInfo", "hwnd title class_name rect")
+
+
+class WindowProvider:
+    name = "base"
+
+    def enum_windows(self):
+        """返回所有可见的顶层窗口 [WindowInfo]"""
+        raise NotImplementedError
+
+    def is_window(self, hwnd):
+        raise NotImplementedError
+
+    def title(self, hwnd):
+        raise NotImplementedError
+
+    def foreground(self):
+        raise NotImplementedError
+
+    def is_foreground(self, hwnd):
+        return self.foreground() == hwnd
+
+    def request_activate(self, hwnd):
+        """请求把窗口切换到前台（不等待）；请求被拒绝时返回 False"""
+        raise NotImplementedError
+
+    def window_rect(self, hwnd):
+        """窗口外框 (left, top, right, bottom)，窗口不存在时抛出异常"""
+        raise NotImplementedError
+
+    def client_rect(self, hwnd):
+        """客户区的屏幕位置和大小 (left, top, width, height)"""
+        raise NotImplementedError
+
+
+class Win32WindowProvider(WindowProvider):
+    name = "win32"
+
+    def __init__(self):
+        import win32con
+        import win32gui
+
+        self._win32gui = win32gui
+        self._win32con = win32con
+
+    def enum_windows(self):
+        win32gui = self._win32gui
+        windows = []
+
+        def callback(hwnd, ctx):
+            if win32gui.IsWindowVisible(hwnd):
+                try:
+                    windows.append(
+                        WindowInfo(
+                            hwnd,
+                            win32gui.GetWindowText(hwnd),
+                            win32gui.GetClassName(hwnd),
+                            win32gui.GetWindowRect(hwnd),
+                        )
+                    )
+                except Exception:
+                    pass  # 枚举期间窗口被关闭
+
+        win32gui.EnumWindows(callback, None)
+        return windows
+
+    def is_window(self, hwnd):
+        return bool(hwnd) and bool(self._win32gui.IsWindow(hwnd))
+
+    def title(self, hwnd):
+        return self._win32gui.GetWindowText(hwnd)
+
+    def foreground(self):
+        return self._win32gui.GetForegroundWindow()
+
+    def is_foreground(self, hwnd):
+        fg = self._win32gui.GetForegroundWindow()
+        if fg == hwnd:
+            return True
+        # 前台可能是目标窗口的对话框等子窗口
+        try:
+            return self._win32gui.GetAncestor(fg, 3) == hwnd  # GA_ROOTOWNER
+        except Exception:
+            return False
+
+    def request_activate(self, hwnd):
+        win32gui = self._win32gui
+        try:
+            if win32gui.IsIconic(hwnd):
+                win32gui.ShowWindow(hwnd, self._win32con.SW_RESTORE)
+            win32gui.SetForegroundWindow(hwnd)
+            return True
+        except Exception:
+            return False
+
+    def window_rect(self, hwnd):
+        return tuple(self._win32gui.GetWindowRect(hwnd))
+
+    def client_rect(self, hwnd):
+        win32gui = self._win32gui
+        _, _, width, height = win32gui.GetClientRect(hwnd)
+        left, top = win32gui.ClientToScreen(hwnd, (0, 0))
+        return (left, top, width, height)
+
+
+class FakeWindowProvider(WindowProvider):
+    """内存中的窗口；激活在 activation_delay 秒后生效，模拟异步的前台切换"""
+
+    name = "fake"
+
+    def __init__(self, activation_delay=0.0, refuse_activation=False):
+        self.activation_delay = activation_delay
+        self.refuse_activation = refuse_activation
+        self.windows = {}  # hwnd -> WindowInfo
+        self.enum_calls = 0
+        self._next_hwnd = 0x1000
+        self._foreground = None
+        self._pending = None  # (hwnd, 生效时间)
+        self._lock = threading.Lock()
+
+    def add_window(self, title, class_name="FakeWindow", rect=(0, 0, 800, 600)):
+        with self._lock:
+            self._next_hwnd += 1
+            hwnd = self._next_hwnd
+            self.windows[hwnd] = WindowInfo(hwnd, title, class_name, tuple(rect))
+            return hwnd
+
+    def close_window(self, hwnd):
+        with self._lock:
+            self.windows.pop(hwnd, None)
+            if self._foreground == hwnd:
+                self._foreground = None
+
+    def move_window(self, hwnd, rect):
+        with self._lock:
+            self.windows[hwnd] = self.windows[hwnd]._replace(rect=tuple(rect))
+
+    def set_title(self, hwnd, title):
+        with self._lock:
+            self.windows[hwnd] = self.windows[hwnd]._replace(title=title)
+
+    def enum_windows(self):
+        with self._lock:
+            self.enum_calls += 1
+            return list(self.windows.values())
+
+    def is_window(self, hwnd):
+        return hwnd in self.windows
+
+    def title(self, hwnd):
+        info = self.windows.get(hwnd)
+        return info.title if info is not None else ""
+
+    def foreground(self):
+        with self._lock:
+            pending = self._pending
+            if pending is not None and time.monotonic() >= pending[1]:
+                if pending[0] in self.windows:
+                    self._foreground = pending[0]
+                self._pending = None
+            return self._foreground
+
+    def window_rect(self, hwnd):
+        return self.windows[hwnd].rect
+
+    def client_rect(self, hwnd):
+        # 模拟的窗口没有边框，客户区即整个窗口
+        left, top, right, bottom = self.windows[hwnd].rect
+        return (left, top, right - left, bottom - top)
+
+    def request_activate(self, hwnd):
+        if hwnd not in self.windows or self.refuse_activation:
+            return False
+        with self._lock:
+            self._pending = (hwnd, time.monotonic() + self.activation_delay)
+        return True
+
+
+def create_window_provider():
+    """Windows 且安装了 pywin32 时返回 Win32WindowProvider，否则返回 None"""
+    if sys.platform != "win32" or not has_module("win32gui"):
+        return None
+    return Win32WindowProvider()
+
+
+class WindowIndex:
+    def __init__(self, provider, ttl=WINDOW_INDEX_TTL):
+        self.provider = provider
+        self.ttl = ttl
+        self._windows = []  # 最近一次枚举结果
+        self._lowered = []  # [(小写标题, hwnd)]
+        self._stamp = None
+        self._hits = {}  # 小写查询 -> hwnd
+        self._lock = threading.RLock()  # find() 内部会调用 refresh()
+
+    def refresh(self):
+        with self._lock:
+            windows = self.provider.enum_windows()
+            self._windows = windows
+            self._lowered = [(w.title.lower(), w.hwnd) for w in windows if w.title]
+            self._stamp = time.monotonic()
+            return windows
+
+    def windows(self, max_age=None):
+        """返回枚举结果；超过 max_age（默认 ttl）秒时重新枚举"""
+        age = self.ttl if max_age is None else max_age
+        with self._lock:
+            if self._stamp is None or time.monotonic() - self._stamp > age:
+                self.refresh()
+            return self._windows
+
+    def invalidate(self, hwnd=None):
+        """句柄失效（激活失败等）时调用；hwnd 为 None 时清空整个索引"""
+        with self._lock:
+            if hwnd is None:
+                self._hits.clear()
+                self._stamp = None
+                return
+            for key in [k for k, v in self._hits.items() if v == hwnd]:
+                del self._hits[key]
+            self._stamp = None
+
+    def find(self, title):
+        """按标题（不区分大小写的子串）查找窗口句柄，找不到返回 None"""
+        key = title.strip().lower()
+        if not key:
+            return None
+        with self._lock:
+            return self._find(key)
+
+    def _find(self, key):
+        provider = self.provider
+        hwnd = self._hits.get(key)
+        if hwnd is not None:
+            # 命中缓存：只验证句柄仍有效且标题仍匹配
+            try:
+                if provider.is_window(hwnd) and key in provider.title(hwnd).lower():
+                    return hwnd
+            except Exception:
+                pass
+            del self._hits[key]
+            self._stamp = None
+        fresh = self._stamp is None or time.monotonic() - self._stamp > self.ttl
+        if fresh:
+            self.refresh()
+        hwnd = self._scan(key)
+        if hwnd is None and not fresh:
+            # 缓存的枚举结果可能已过时，再枚举一次
+            self.refresh()
+            hwnd = self._scan(key)
+        if hwnd is not None:
+            self._hits[key] = hwnd
+        return hwnd
+
+    def _scan(self, key):
+        for lowered, hwnd in self._lowered:
+            if key in lowered:
+                return hwnd
+        return None
+
+
+class WindowGeometry:
+    """目标窗口客户区缓存：每次只读取窗口外框，外框变化（移动/缩放）时才重新计算客户区"""
+
+    def __init__(self, provider, hwnd):
+        self.provider = provider
+        self.hwnd = hwnd
+        self.refreshes = 0
+        self._window_rect = None
+        self._client_rect = None
+        self._lock = threading.Lock()
+
+    def client_rect(self):
+        """返回 (left, top, width, height)；窗口已关闭时返回 None"""
+        with self._lock:
+            try:
+                rect = self.provider.window_rect(self.hwnd)
+                if rect != self._window_rect:
+                    self._client_rect = tuple(self.provider.client_rect(self.hwnd))
+                    self._window_rect = rect
+                    self.refreshes += 1
+            except Exception:
+                self._window_rect = None
+                return None
+            return self._client_rect
+
+
+def wait_foreground(
+    provider, hwnd, timeout=ACTIVATE_TIMEOUT, poll_interval=ACTIVATE_POLL_INTERVAL
+):
+    """轮询直到 hwnd 成为前台窗口；超时返回 False"""
+    deadline = time.monotonic() + timeout
+    while True:
+        if provider.is_foreground(hwnd):
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(poll_interval)
+
+
+def activate_window(provider, hwnd, timeout=ACTIVATE_TIMEOUT):
+    """已在前台时直接返回 True；否则请求激活并等待生效"""
+    if provider.is_foreground(hwnd):
+        return True
+    if not provider.request_activate(hwnd):
+        return False
+    return wait_foreground(provider, hwnd, timeout)
@@ -101,6 +101,15 @@ def build_app():
         '--hidden-import=PIL._imagingtk', 
         '--hidden-import=PIL._webp',
         '--hidden-import=win32timezone',
+        '--hidden-import=pyautogui',
+        '--hidden-import=keyboard',
+        '--hidden-import=requests',
+        '--hidden-import=pystray',
+        '--hidden-import=PIL.Image',
+        '--hidden-import=PIL.ImageDraw',
+        '--hidden-import=numpy',
+        '--hidden-import=win32gui',
+        '--hidden-import=win32con',
         '--clean'
     ]
     
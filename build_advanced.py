@@ -341,6 +341,17 @@ def build_single_exe(progress):
         "--hidden-import=PIL._webp",
         "--hidden-import=win32timezone",
         "--hidden-import=win32api",
+        # 主程序通过 autoclicker.lazy 延迟导入，PyInstaller 无法自动发现
+        "--hidden-import=pyautogui",
+        "--hidden-import=keyboard",
+        "--hidden-import=requests",
+        "--hidden-import=pystray",
+        "--hidden-import=PIL.Image",
+        "--hidden-import=PIL.ImageDraw",
+        # 图像点位和等待条件（autoclicker.vision / waits）延迟导入 numpy
+        "--hidden-import=numpy",
+        "--hidden-import=win32gui",
+        "--hidden-import=win32con",
         "--noconfirm",
         "--clean",
         "--noupx",